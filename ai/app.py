@@ -1,45 +1,199 @@
 import os
-import pandas as pd
-from flask import request, jsonify, send_from_directory, render_template
+import hmac
+import json
+import logging
+import math
+import tempfile
+import time
+import tracing
+from flask import (
+    Blueprint,
+    Response,
+    current_app,
+    jsonify,
+    render_template,
+    request,
+    stream_with_context,
+)
 from app_monitoring import setup_app
-from enhanced_manufacturer_matcher import ManufacturerMatcher
-from design_visualization import generate_design, save_design
-import google.generativeai as genai
+from catalog import load_matcher, load_materials, open_catalog
+from catalog_manager import CatalogManager, CatalogSnapshot
+from result_cache import MISS, ResultCache
+from footprint import (
+    FootprintTotals,
+    InvalidLine,
+    parse_csv,
+    parse_jsonl,
+)
+from design_visualization import (
+    backend_status,
+    design_cache_key,
+    generate_design,
+    is_cacheable,
+    save_design,
+)
+from design_cache import DesignCache
+from design_variants import negotiate, preferred, save_variants
+from placeholders import Placeholder, PlaceholderAssets
+from static_assets import StaticAssets
+from llm_cache import create_llm_cache
+from pipeline import await_stage, run_stage
+from design_jobs import TERMINAL_STATES, QueueFull, create_job_queue
+from lazy import Lazy
+from metrics import cache_collector, registry, stage, upstream
+from scoring import DEFAULT_PROFILE, resolve_weights
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-app = setup_app()
-matcher = ManufacturerMatcher("manufacturers.csv")
-materials = pd.read_csv("materials_enriched.csv")
+# Routes live on a blueprint registered by create_app(); heavy clients, the
+# supplier matcher and the ML libraries behind them load on first use
+api = Blueprint("api", __name__)
+# Handlers log through current_app; loaders that also run outside a request
+# (warm(), catalog polling) use the module logger
+logger = logging.getLogger(__name__)
+supplier_cache = ResultCache(
+    maxsize=int(os.getenv("SUPPLIER_CACHE_SIZE", 1024)),
+    ttl=float(os.getenv("SUPPLIER_CACHE_TTL", 0)) or None,
+)
+# Batch jobs send hundreds of queries; the cap bounds one request's work
+SUPPLIER_BATCH_MAX_QUERIES = int(os.getenv("SUPPLIER_BATCH_MAX_QUERIES", 1000))
+CATALOG_DIR = os.getenv("CATALOG_DIR", "catalog")
+# Checksum every catalog file on load (sizes are always checked)
+CATALOG_VERIFY = bool(int(os.getenv("CATALOG_VERIFY", 0)))
+MANUFACTURERS_CSV = "manufacturers.csv"
+MATERIALS_CSV = "materials_enriched.csv"
 
-# Configure Gemini API with error handling
-try:
-    api_key = os.getenv("GEMINI_API_KEY")
-    if api_key and api_key != "your_gemini_api_key_here":
-        genai.configure(api_key=api_key)
-        gemini_model = genai.GenerativeModel("gemini-2.0-flash")
-        app.logger.info("✅ Gemini API configured successfully")
+
+def load_catalogs():
+    """
+    Load the prebuilt catalog from build_catalog.py (watching its CURRENT
+    pointer), or parse the CSVs (watching them) when none has been built.
+    """
+    catalog = open_catalog(
+        CATALOG_DIR, (MANUFACTURERS_CSV, MATERIALS_CSV), verify=CATALOG_VERIFY
+    )
+    if catalog is None:
+        logger.warning("No prebuilt catalog found, loading from CSV")
+        sources = (MANUFACTURERS_CSV, MATERIALS_CSV)
     else:
-        gemini_model = None
-        app.logger.warning("⚠️ Gemini API key not configured - using fallback responses")
-except Exception as e:
-    gemini_model = None
-    app.logger.error(f"❌ Gemini API configuration failed: {e}")
-    app.logger.info("Using fallback responses instead")
+        sources = (os.path.join(CATALOG_DIR, "CURRENT"),)
+    return CatalogSnapshot(
+        # Materials are light; the matcher (pandas, scikit-learn) waits for use
+        Lazy(lambda: load_matcher(catalog, MANUFACTURERS_CSV, cache=supplier_cache)),
+        load_materials(catalog, MATERIALS_CSV),
+        catalog,
+        sources,
+    )
+
+
+# Admin reloads and supplier updates reach the other workers through polling,
+# so it is on by default whenever the admin API is
+catalogs = CatalogManager(
+    load_catalogs,
+    poll_interval=float(
+        os.getenv("CATALOG_POLL_INTERVAL") or (5 if os.getenv("ADMIN_TOKEN") else 0)
+    ),
+    persist=lambda catalog, matcher: catalog.with_suppliers(matcher),
+)
+
+
+def __getattr__(name):
+    # The catalogs are swapped on reload, so these always name the current ones
+    if name in ("matcher", "materials", "footprint_engine"):
+        return getattr(catalogs.current, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+design_jobs = create_job_queue()
+static_assets = StaticAssets()
+design_cache = DesignCache(
+    "static", max_bytes=int(os.getenv("DESIGN_CACHE_MAX_MB", 512)) * 1024 * 1024
+)
+placeholder_assets = PlaceholderAssets("static")
+
+# Configure Gemini API with error handling
+GEMINI_MODEL = "gemini-2.0-flash"
+REPORT_CONFIG = {"temperature": 0.5, "top_p": 0.9, "max_output_tokens": 400}
+llm_cache = create_llm_cache()
+
+
+def create_gemini_model():
+    """Configure Gemini, or return None so callers use fallback responses"""
+    try:
+        api_key = os.getenv("GEMINI_API_KEY")
+        if api_key and api_key != "your_gemini_api_key_here":
+            import google.generativeai as genai
+
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(GEMINI_MODEL)
+            logger.info("✅ Gemini API configured successfully")
+            return model
+        logger.warning("⚠️ Gemini API key not configured - using fallback responses")
+    except Exception as e:
+        logger.error(f"❌ Gemini API configuration failed: {e}")
+        logger.info("Using fallback responses instead")
+    return None
+
+
+gemini_model = Lazy(create_gemini_model)
+
+# Read at scrape time, so swapped or monkeypatched objects are always current
+registry.collector(
+    cache_collector(
+        lambda: {"supplier": supplier_cache, "design": design_cache, "llm": llm_cache}
+    )
+)
+
+
+@registry.collector
+def queue_metrics():
+    families = [
+        (
+            "design_jobs_queued",
+            "gauge",
+            "Design jobs waiting for a worker",
+            {(): design_jobs.pending()},
+        ),
+        (
+            "placeholder_designs_served_total",
+            "counter",
+            "Failed designs answered with the shared placeholder",
+            {(): placeholder_assets.served},
+        ),
+    ]
+    status = backend_status()
+    if status is not None:
+        families.append(
+            (
+                "image_backend_in_flight",
+                "gauge",
+                "Image generation calls in progress",
+                {(): status["in_flight"]},
+            )
+        )
+        families.append(
+            (
+                "image_backend_circuit_open",
+                "gauge",
+                "1 while the image backend circuit breaker rejects calls",
+                {(): int(status["circuit"] == "open")},
+            )
+        )
+    return families
 
 
 # Root route - Web Interface
-@app.route("/")
+@api.route("/")
 def index():
     """Main web interface for user interaction"""
     return render_template("index.html")
 
 
 # API documentation route
-@app.route("/api")
+@api.route("/api")
 def api_docs():
     """API documentation"""
     return jsonify(
@@ -50,11 +204,21 @@ def api_docs():
             "powered_by": "Google Gemini 2.0-flash",
             "endpoints": {
                 "health": "GET /health",
+                "metrics": "GET /metrics",
                 "create_product": "POST /create-product",
                 "materials": "GET /materials",
+                "footprint_batch": "POST /footprint/batch",
                 "suppliers": "GET /suppliers",
+                "suppliers_batch": "POST /suppliers/batch",
+                "suppliers_nearest": "GET /suppliers/nearest",
                 "sustainability_report": "POST /sustainability-report",
+                "sustainability_report_stream": "POST /sustainability-report/stream",
+                "job_status": "GET /jobs/<job_id>",
+                "job_events": "GET /jobs/<job_id>/events",
                 "static_files": "GET /static/<filename>",
+                "catalog_status": "GET /admin/catalog",
+                "catalog_reload": "POST /admin/catalog/reload",
+                "catalog_suppliers": "POST /admin/catalog/suppliers",
             },
             "example_usage": {
                 "create_product": {
@@ -74,18 +238,150 @@ def api_docs():
 
 
 # Serve static images
-@app.route("/static/<filename>")
+@api.route("/static/<filename>")
 def serve_image(filename):
-    return send_from_directory("static", filename)
+    """Serve a design, negotiating WebP/AVIF and ?size=medium|thumb variants"""
+    static_dir = os.path.join(current_app.root_path, "static")
+    size = request.args.get("size")
+    accepted = {mimetype for mimetype, quality in request.accept_mimetypes if quality}
+    variant = negotiate(static_dir, filename, accepted, size)
 
+    # Until background encoding produces the preferred variant the response is
+    # provisional, so it is cached briefly instead of as immutable
+    immutable = variant == preferred(filename, accepted, size)
+    response = static_assets.send(static_dir, variant, request, immutable=immutable)
+    response.vary.add("Accept")
+    return response
 
-@app.route("/health")
+
+@api.route("/health")
 def health_check():
     """Health check endpoint for Docker"""
     return jsonify({"status": "healthy", "timestamp": datetime.utcnow().isoformat()})
 
 
-@app.route("/create-product", methods=["POST"])
+@api.before_app_request
+def start_catalog_watcher():
+    # Started per worker on first use; a thread started before fork would not survive it
+    catalogs.start_watching()
+
+
+def admin_denied():
+    """An error response unless the request carries the ADMIN_TOKEN bearer token"""
+    token = os.getenv("ADMIN_TOKEN")
+    if not token:
+        return jsonify({"error": "Admin API disabled", "status": "error"}), 403
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return jsonify({"error": "Unauthorized", "status": "error"}), 401
+    return None
+
+
+def other_workers_warning(persisted=True):
+    """Why a catalog change made here may not reach the other workers, if it may not"""
+    if not persisted:
+        return "Applied to this worker only: without a prebuilt catalog, supplier updates are not persisted"
+    if catalogs.poll_interval <= 0:
+        return "Applied to this worker only: set CATALOG_POLL_INTERVAL so other workers pick up catalog changes"
+    return None
+
+
+@api.before_app_request
+def trace_on_demand():
+    # Admins can ask for the debug trace of a single request
+    if (
+        request.headers.get("X-Debug-Trace")
+        and tracing.current() is None
+        and admin_denied() is None
+    ):
+        tracing.begin()
+
+
+@api.route("/admin/catalog", methods=["GET"])
+def catalog_status():
+    """Version and reload state of the loaded catalogs"""
+    denied = admin_denied()
+    if denied:
+        return denied
+    return jsonify({**catalogs.status(), "status": "success"})
+
+
+@api.route("/admin/catalog/reload", methods=["POST"])
+def reload_catalog():
+    """
+    Reload the catalogs in the background and swap them in when ready;
+    ?wait=1 blocks until the new catalogs are live
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    future = catalogs.reload()
+    warning = other_workers_warning()
+    extra = {"warning": warning} if warning else {}
+    if request.args.get("wait") != "1":
+        return jsonify({"status": "reloading", **extra}), 202
+    try:
+        future.result(timeout=120)
+    except Exception as e:
+        current_app.logger.error(f"Catalog reload failed: {str(e)}")
+        return (
+            jsonify(
+                {"error": "Catalog reload failed", "message": str(e), "status": "error"}
+            ),
+            500,
+        )
+    return jsonify({**catalogs.status(), **extra, "status": "success"})
+
+
+@api.route("/admin/catalog/suppliers", methods=["POST"])
+def update_suppliers():
+    """
+    Add or replace suppliers ("upsert", matched by Manufacturer_Name) and
+    remove suppliers ("remove", a list of names) without a full rebuild
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    data = request.get_json(silent=True) or {}
+    upserts = data.get("upsert", [])
+    removals = data.get("remove", [])
+    if not isinstance(upserts, list) or not isinstance(removals, list):
+        return (
+            jsonify(
+                {
+                    "error": "Invalid supplier update",
+                    "message": "'upsert' and 'remove' must be lists",
+                    "status": "error",
+                }
+            ),
+            400,
+        )
+    try:
+        _, refit, persisted = catalogs.apply_supplier_delta(upserts, removals)
+    except (ValueError, TypeError, KeyError) as e:
+        return (
+            jsonify(
+                {
+                    "error": "Invalid supplier update",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            400,
+        )
+    warning = other_workers_warning(persisted)
+    return jsonify(
+        {
+            **catalogs.status(),
+            "refit": refit,
+            "persisted": persisted,
+            **({"warning": warning} if warning else {}),
+            "status": "success",
+        }
+    )
+
+
+@api.route("/create-product", methods=["POST"])
 def create_product():
     try:
         data = request.json
@@ -93,75 +389,118 @@ def create_product():
         material = data["material"]
         region = data.get("region")
         qty = float(data.get("quantity", 1.0))
+        job_mode = bool(data.get("async", False))
 
-        app.logger.info(
+        current_app.logger.info(
             f"Creating product with material: {material}, region: {region}, quantity: {qty}"
         )
 
-        # 1️⃣ Generate design
-        image = generate_design(prompt)
-        ts = datetime.utcnow().strftime("%Y%m%d%H%M%S")
-        filename = f"{ts}.png"
-        os.makedirs("static", exist_ok=True)
-        save_design(image, os.path.join("static", filename))
-        img_url = request.host_url + f"static/{filename}"
+        # Identical prompts reuse the stored design instead of regenerating it
+        with stage("design_cache"):
+            design_key = design_cache_key(prompt)
+            cached_design = design_cache.lookup(design_key)
 
-        # 2️⃣ Match suppliers
-        suppliers = matcher.find_top_suppliers(
-            material, region, min_capacity=int(qty * 100)
+        # 1️⃣ Generate design concurrently; nothing else depends on the image.
+        # In job mode it is queued and rendered after this response returns.
+        if cached_design:
+            current_app.logger.info(f"Reusing cached design {cached_design}")
+            job_mode = False
+        elif job_mode:
+            try:
+                job_id = design_jobs.submit(render_design, prompt, design_key)
+            except QueueFull:
+                current_app.logger.warning("Design job queue full, rejecting request")
+                response = jsonify(
+                    {
+                        "error": "Design queue is full",
+                        "message": "Too many designs are being rendered, retry shortly",
+                        "status": "error",
+                    }
+                )
+                response.headers["Retry-After"] = "5"
+                return response, 503
+        else:
+            design_future = run_stage("design", generate_design, prompt)
+
+        # 2️⃣ Match suppliers (one catalog snapshot for the whole request)
+        catalog = catalogs.current
+        match_future = run_stage(
+            "matching",
+            catalog.matcher.find_top_suppliers,
+            material,
+            region,
+            min_capacity=int(qty * 100),
         )
 
-        # 3️⃣ Calculate footprint
-        material_row = materials[materials["Material"] == material]
-        if material_row.empty:
-            app.logger.warning(f"Material {material} not found in database")
+        # 3️⃣ Calculate footprint while matching runs
+        with stage("footprint"):
+            footprint = catalog.materials.footprint(material, qty)
+        if footprint is None:
+            current_app.logger.warning(f"Material {material} not found in database")
             co2 = 0.0
             water = 0.0
         else:
-            m = material_row.iloc[0]
-            co2 = round(m["live_co2e_kg"] * qty, 3)
-            water = round(m["Water_L_per_kg"] * qty, 1)
+            co2, water = footprint
+
+        suppliers, timed_out = await_stage("matching", match_future, list)
+        if timed_out:
+            current_app.logger.warning(
+                "Supplier matching timed out, returning no suppliers"
+            )
 
         # 4️⃣ Generate narrative via Gemini LLM (with fallback)
         supplier_names = [
             s.get("Manufacturer_Name", s.get("name", "Unknown")) for s in suppliers
         ]
+        narrative, timed_out = await_stage(
+            "narrative",
+            run_stage(
+                "narrative",
+                generate_narrative,
+                material,
+                qty,
+                co2,
+                water,
+                supplier_names,
+            ),
+            lambda: generate_fallback_narrative(
+                material, qty, co2, water, supplier_names
+            ),
+        )
+        if timed_out:
+            current_app.logger.warning("Narrative generation timed out, using fallback")
 
-        # Generate narrative with fallback for API issues
-        if gemini_model:
-            try:
-                prompt_llm = (
-                    f"Create a sustainability report for a product with material {material}.\n"
-                    f"- Quantity: {qty} kg\n"
-                    f"- CO₂ emissions: {co2} kg\n"
-                    f"- Water usage: {water} L\n"
-                    f"- Matched suppliers: {', '.join(supplier_names)}\n\n"
-                    "Write a concise explanation (<150 words) summarizing material choice, "
-                    "environmental impact, and why these suppliers were selected. "
-                    "Focus on sustainability benefits and environmental considerations."
-                )
+        if job_mode:
+            current_app.logger.info(f"Queued design job {job_id} for {material}")
+            return (
+                jsonify(
+                    {
+                        "job_id": job_id,
+                        "job_url": request.host_url + f"jobs/{job_id}",
+                        "events_url": request.host_url + f"jobs/{job_id}/events",
+                        "image_url": None,
+                        "suppliers": suppliers,
+                        "scorecard": {"co2_kg": co2, "water_l": water},
+                        "narrative": narrative,
+                        "status": "accepted",
+                    }
+                ),
+                202,
+            )
 
-                response = gemini_model.generate_content(
-                    prompt_llm,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.7,
-                        top_p=0.8,
-                        top_k=40,
-                        max_output_tokens=200,
-                    ),
-                )
-                narrative = response.text
-            except Exception as e:
-                app.logger.warning(f"Gemini API failed, using fallback: {e}")
-                narrative = generate_fallback_narrative(
-                    material, qty, co2, water, supplier_names
-                )
+        # Save the design once it is ready, or a placeholder if it timed out
+        if cached_design:
+            filename = cached_design
         else:
-            narrative = generate_fallback_narrative(
-                material, qty, co2, water, supplier_names
-            )
+            image, timed_out = await_stage("design", design_future, Placeholder)
+            if timed_out:
+                current_app.logger.warning(
+                    "Design generation timed out, using placeholder"
+                )
+            filename = store_design(image, design_key)
+        img_url = request.host_url + f"static/{filename}"
 
-        app.logger.info(f"Successfully created product for {material}")
+        current_app.logger.info(f"Successfully created product for {material}")
 
         return jsonify(
             {
@@ -174,42 +513,248 @@ def create_product():
         )
 
     except Exception as e:
-        app.logger.error(f"Error creating product: {str(e)}")
-        return jsonify(
-            {"error": "Failed to create product", "message": str(e), "status": "error"}
-        ), 500
+        current_app.logger.error(f"Error creating product: {str(e)}")
+        return (
+            jsonify(
+                {
+                    "error": "Failed to create product",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            500,
+        )
 
 
-@app.route("/materials", methods=["GET"])
+def store_design(image, design_key):
+    """
+    Save a design under its content address; placeholders, which must not be
+    served for future requests, share one pre-encoded file per size instead
+    """
+    with stage("save"):
+        if is_cacheable(image):
+            filename = design_cache.store(design_key, image, save_design)
+            variants = save_variants(
+                image, os.path.join(design_cache.directory, filename)
+            )
+            # Variants count toward the cache bound once they are encoded
+            variants.add_done_callback(
+                lambda done: done.exception() or design_cache.add(done.result())
+            )
+            return filename
+
+        if image is None:
+            return placeholder_assets.get()
+        return placeholder_assets.get(*image.size)
+
+
+def render_design(prompt, design_key):
+    """Design job: generate the image and save it under static/"""
+    image = generate_design(prompt)
+    return {"filename": store_design(image, design_key)}
+
+
+def job_payload(job, host_url):
+    """Job status with the image URL filled in once rendering is done"""
+    result = job["result"] or {}
+    job["image_url"] = (
+        host_url + f"static/{result['filename']}" if "filename" in result else None
+    )
+    return job
+
+
+@api.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Poll the status of a queued design job"""
+    job = design_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found", "status": "error"}), 404
+    return jsonify({**job_payload(job, request.host_url), "status": "success"})
+
+
+@api.route("/jobs/<job_id>/events", methods=["GET"])
+def stream_job_events(job_id):
+    """
+    Stream design job state changes as server-sent events. A stream ends
+    after SSE_MAX_SECONDS so it never outlives the worker timeout; clients
+    reconnect with Last-Event-ID and resume after the last state they saw
+    """
+    if design_jobs.get(job_id) is None:
+        return jsonify({"error": "Job not found", "status": "error"}), 404
+
+    host_url = request.host_url
+    keepalive = float(os.getenv("SSE_KEEPALIVE_SECONDS", 15))
+    max_seconds = float(os.getenv("SSE_MAX_SECONDS", 60))
+    try:
+        last_seen = float(request.headers.get("Last-Event-ID") or 0)
+    except ValueError:
+        last_seen = 0.0
+
+    def events():
+        since = last_seen
+        deadline = time.monotonic() + max_seconds
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            job = design_jobs.wait(
+                job_id, since=since, timeout=min(keepalive, remaining)
+            )
+            if job is None:
+                yield 'event: error\ndata: {"error": "Job expired"}\n\n'
+                return
+            if job["updated_at"] <= since:
+                yield ": keep-alive\n\n"
+                continue
+            since = job["updated_at"]
+            payload = json.dumps(job_payload(job, host_url))
+            yield f"id: {since!r}\nevent: {job['state']}\ndata: {payload}\n\n"
+            if job["state"] in TERMINAL_STATES:
+                return
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@api.route("/materials", methods=["GET"])
 def get_materials():
     """Get list of available materials"""
+    # The list only changes with the catalog, so the body is built at load time
+    return Response(
+        catalogs.current.materials.materials_json, mimetype="application/json"
+    )
+
+
+@api.route("/footprint/batch", methods=["POST"])
+def footprint_batch():
+    """
+    Score bills of materials uploaded as JSON Lines or CSV
+    (product_id, material, quantity) and stream back NDJSON records: one per
+    line (unless ?lines=0), one per product, then the catalog totals
+    """
+    parse = parse_csv if request.mimetype == "text/csv" else parse_jsonl
+    include_lines = request.args.get("lines", "1") != "0"
+    totals = FootprintTotals()
+
+    # Line results spill to disk beyond a few MB so large uploads stay flat
+    spool = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
     try:
-        material_list = materials["Material"].unique().tolist()
-        return jsonify(
-            {
-                "materials": material_list,
-                "count": len(material_list),
-                "status": "success",
-            }
+        engine = catalogs.current.footprint_engine
+        for result in engine.score(parse(request.stream), totals):
+            if include_lines:
+                spool.write(json.dumps({"type": "line", **result}).encode() + b"\n")
+    except InvalidLine as e:
+        spool.close()
+        return (
+            jsonify(
+                {
+                    "error": "Invalid footprint input",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            400,
         )
     except Exception as e:
-        app.logger.error(f"Error fetching materials: {str(e)}")
-        return jsonify(
-            {"error": "Failed to fetch materials", "message": str(e), "status": "error"}
-        ), 500
+        spool.close()
+        current_app.logger.error(f"Error scoring footprint batch: {str(e)}")
+        return (
+            jsonify(
+                {
+                    "error": "Failed to score footprints",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            500,
+        )
+
+    def records():
+        with spool:
+            spool.seek(0)
+            yield from spool
+        for product in totals.products():
+            yield json.dumps({"type": "product", **product}) + "\n"
+        yield json.dumps({"type": "catalog", **totals.catalog()}) + "\n"
+
+    return Response(records(), mimetype="application/x-ndjson")
 
 
-@app.route("/suppliers", methods=["GET"])
+def parse_weights(text):
+    """Parse ``GOTS:2,FSC:0.5`` into {"GOTS": 2.0, "FSC": 0.5}"""
+    weights = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, sep, weight = item.rpartition(":")
+        name = name.strip()
+        if not sep or not name:
+            raise ValueError(f"Expected name:weight, got {item!r}")
+        weights[name] = float(weight)
+        if not (math.isfinite(weights[name]) and weights[name] >= 0):
+            raise ValueError(f"Weight for {name!r} must be a finite number >= 0")
+    return weights
+
+
+@api.route("/suppliers", methods=["GET"])
 def get_suppliers():
     """Get list of available suppliers"""
+    certifications = [
+        c.strip()
+        for c in request.args.get("certifications", "").split(",")
+        if c.strip()
+    ]
+    profile = request.args.get("profile")
+    try:
+        cert_weights = request.args.get("cert_weights")
+        cert_weights = parse_weights(cert_weights) if cert_weights else None
+        # Certification scores are sums of these weights
+        if cert_weights and not math.isfinite(sum(cert_weights.values())):
+            raise ValueError("Certification weights are too large")
+        weights = request.args.get("weights")
+        weights = parse_weights(weights) if weights else None
+        resolve_weights(profile, weights)
+        distance_weight = request.args.get("distance_weight", 0.0, type=float)
+        if not 0 <= distance_weight <= 1:
+            raise ValueError("distance_weight must be between 0 and 1")
+    except ValueError as e:
+        return (
+            jsonify(
+                {
+                    "error": "Invalid scoring weights",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            400,
+        )
+
     try:
         material = request.args.get("material")
         region = request.args.get("region")
         min_capacity = int(request.args.get("min_capacity", 0))
+        lat = request.args.get("lat", type=float)
+        lon = request.args.get("lon", type=float)
+        radius_km = request.args.get("radius_km", type=float)
+        near = (lat, lon) if lat is not None and lon is not None else None
 
+        catalog = catalogs.current
+        matcher = catalog.matcher
         if material:
             suppliers = matcher.find_top_suppliers(
-                material, region, min_capacity=min_capacity, top_n=10
+                material,
+                region,
+                min_capacity=min_capacity,
+                top_n=10,
+                near=near,
+                radius_km=radius_km,
+                distance_weight=distance_weight,
+                certifications=certifications,
+                cert_weights=cert_weights,
+                profile=profile,
+                weights=weights,
+                materials=catalog.materials,
             )
         else:
             # Return all suppliers if no material specified
@@ -223,18 +768,176 @@ def get_suppliers():
                     "material": material,
                     "region": region,
                     "min_capacity": min_capacity,
+                    "near": near,
+                    "radius_km": radius_km,
+                    "certifications": certifications,
+                    "profile": profile or DEFAULT_PROFILE,
                 },
                 "status": "success",
             }
         )
     except Exception as e:
-        app.logger.error(f"Error fetching suppliers: {str(e)}")
+        current_app.logger.error(f"Error fetching suppliers: {str(e)}")
+        return (
+            jsonify(
+                {
+                    "error": "Failed to fetch suppliers",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            500,
+        )
+
+
+@api.route("/suppliers/nearest", methods=["GET"])
+def get_nearest_suppliers():
+    """Get the suppliers closest to a point, optionally filtered by material"""
+    try:
+        lat = request.args.get("lat", type=float)
+        lon = request.args.get("lon", type=float)
+        if lat is None or lon is None:
+            return (
+                jsonify(
+                    {
+                        "error": "Invalid location",
+                        "message": "'lat' and 'lon' query parameters are required",
+                        "status": "error",
+                    }
+                ),
+                400,
+            )
+
+        k = request.args.get("k", 5, type=int)
+        material = request.args.get("material")
+        min_capacity = request.args.get("min_capacity", 0, type=int)
+
+        suppliers = catalogs.current.matcher.find_nearest_suppliers(
+            lat, lon, k=k, material=material, min_capacity=min_capacity
+        )
+
+        return jsonify(
+            {
+                "suppliers": suppliers,
+                "count": len(suppliers),
+                "location": {"lat": lat, "lon": lon},
+                "status": "success",
+            }
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error fetching nearest suppliers: {str(e)}")
+        return (
+            jsonify(
+                {
+                    "error": "Failed to fetch suppliers",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            500,
+        )
+
+
+def batch_query_error(i, query):
+    """Why batch query ``i`` is invalid, or None if it is valid"""
+    if not isinstance(query, dict) or not query.get("material"):
+        return f"Query {i} must be an object with a 'material'"
+    if not isinstance(query["material"], str):
+        return f"Query {i}: 'material' must be a string"
+    if not isinstance(query.get("region"), (str, type(None))):
+        return f"Query {i}: 'region' must be a string or null"
+    min_capacity = query.get("min_capacity")
+    if min_capacity is not None and (
+        isinstance(min_capacity, bool)
+        or not isinstance(min_capacity, int)
+        or min_capacity < 0
+    ):
+        return f"Query {i}: 'min_capacity' must be a non-negative integer"
+    return None
+
+
+@api.route("/suppliers/batch", methods=["POST"])
+def get_suppliers_batch():
+    """Match suppliers for many (material, region, min_capacity) queries at once"""
+    try:
+        data = request.json or {}
+        queries = data.get("queries")
+        top_n = data.get("top_n", 3)
+
+        if not isinstance(queries, list):
+            message = "'queries' must be a list of objects with a 'material'"
+        elif len(queries) > SUPPLIER_BATCH_MAX_QUERIES:
+            message = f"At most {SUPPLIER_BATCH_MAX_QUERIES} queries per batch"
+        elif isinstance(top_n, bool) or not isinstance(top_n, int) or top_n < 1:
+            message = "'top_n' must be a positive integer"
+        else:
+            message = next(
+                filter(None, (batch_query_error(i, q) for i, q in enumerate(queries))),
+                None,
+            )
+        if message:
+            return (
+                jsonify(
+                    {
+                        "error": "Invalid batch request",
+                        "message": message,
+                        "status": "error",
+                    }
+                ),
+                400,
+            )
+
+        profile, weights = data.get("profile"), data.get("weights")
+        try:
+            if weights is not None and not isinstance(weights, dict):
+                raise ValueError("'weights' must be an object of component weights")
+            resolve_weights(profile, weights)
+        except ValueError as e:
+            return (
+                jsonify(
+                    {
+                        "error": "Invalid scoring weights",
+                        "message": str(e),
+                        "status": "error",
+                    }
+                ),
+                400,
+            )
+
+        catalog = catalogs.current
+        matches = catalog.matcher.find_top_suppliers_many(
+            queries,
+            top_n=top_n,
+            profile=profile,
+            weights=weights,
+            materials=catalog.materials,
+        )
+
         return jsonify(
-            {"error": "Failed to fetch suppliers", "message": str(e), "status": "error"}
-        ), 500
+            {
+                "results": [
+                    {"query": query, "suppliers": suppliers, "count": len(suppliers)}
+                    for query, suppliers in zip(queries, matches)
+                ],
+                "count": len(matches),
+                "status": "success",
+            }
+        )
+    except Exception as e:
+        current_app.logger.error(f"Error fetching supplier batch: {str(e)}")
+        return (
+            jsonify(
+                {
+                    "error": "Failed to fetch suppliers",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            500,
+        )
 
 
-@app.route("/sustainability-report", methods=["POST"])
+@api.route("/sustainability-report", methods=["POST"])
 def generate_sustainability_report():
     """Generate detailed sustainability report using Gemini"""
     try:
@@ -244,16 +947,116 @@ def generate_sustainability_report():
         suppliers = data.get("suppliers", [])
 
         # Get material data
-        material_row = materials[materials["Material"] == material]
-        if material_row.empty:
+        footprint = catalogs.current.materials.footprint(material, quantity)
+        if footprint is None:
             return jsonify({"error": "Material not found", "status": "error"}), 404
+        co2, water = footprint
 
-        m = material_row.iloc[0]
-        co2 = round(m["live_co2e_kg"] * quantity, 3)
-        water = round(m["Water_L_per_kg"] * quantity, 1)
+        prompt = build_report_prompt(material, quantity, co2, water, suppliers)
 
-        # Create detailed prompt for Gemini
-        prompt = f"""
+        # Generate report with fallback for API issues
+        if gemini_model:
+            try:
+                report_text = generate_text(prompt, **REPORT_CONFIG)
+            except Exception as e:
+                current_app.logger.warning(f"Gemini API failed, using fallback: {e}")
+                report_text = generate_fallback_report(
+                    material, quantity, co2, water, suppliers
+                )
+        else:
+            report_text = generate_fallback_report(
+                material, quantity, co2, water, suppliers
+            )
+
+        return jsonify(
+            {
+                "report": report_text,
+                "material": material,
+                "metrics": {"co2_kg": co2, "water_l": water, "quantity_kg": quantity},
+                "status": "success",
+            }
+        )
+
+    except Exception as e:
+        current_app.logger.error(f"Error generating sustainability report: {str(e)}")
+        return (
+            jsonify(
+                {
+                    "error": "Failed to generate report",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            500,
+        )
+
+
+@api.route("/sustainability-report/stream", methods=["POST"])
+def stream_sustainability_report():
+    """Stream the sustainability report as server-sent events while it generates"""
+    try:
+        data = request.json
+        material = data["material"]
+        quantity = float(data.get("quantity", 1.0))
+        suppliers = data.get("suppliers", [])
+
+        footprint = catalogs.current.materials.footprint(material, quantity)
+        if footprint is None:
+            return jsonify({"error": "Material not found", "status": "error"}), 404
+        co2, water = footprint
+
+        prompt = build_report_prompt(material, quantity, co2, water, suppliers)
+        metrics = {"co2_kg": co2, "water_l": water, "quantity_kg": quantity}
+    except Exception as e:
+        current_app.logger.error(f"Error streaming sustainability report: {str(e)}")
+        return (
+            jsonify(
+                {
+                    "error": "Failed to generate report",
+                    "message": str(e),
+                    "status": "error",
+                }
+            ),
+            500,
+        )
+
+    def sse(event, payload):
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    def events():
+        # Metrics are known before generation starts, so send them first
+        yield sse("metrics", {"material": material, "metrics": metrics})
+
+        streamed = False
+        try:
+            for text in stream_text(prompt, **REPORT_CONFIG):
+                streamed = True
+                yield sse("token", {"text": text})
+        except Exception as e:
+            if streamed:
+                # Part of the model's report is already out; don't mix in the fallback
+                current_app.logger.warning(f"Gemini stream failed midway: {e}")
+                yield sse("error", {"error": "Report generation interrupted"})
+                return
+            current_app.logger.warning(f"Gemini API failed, streaming fallback: {e}")
+            fallback = generate_fallback_report(
+                material, quantity, co2, water, suppliers
+            )
+            for line in fallback.splitlines(keepends=True):
+                yield sse("token", {"text": line})
+
+        yield sse("done", {"status": "success"})
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def build_report_prompt(material, quantity, co2, water, suppliers):
+    """Prompt for the detailed sustainability report"""
+    return f"""
         Generate a comprehensive sustainability report for:
         
         Material: {material}
@@ -273,42 +1076,71 @@ def generate_sustainability_report():
         Keep the report professional and under 300 words.
         """
 
-        # Generate report with fallback for API issues
-        if gemini_model:
-            try:
-                response = gemini_model.generate_content(
-                    prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=0.5,
-                        top_p=0.9,
-                        max_output_tokens=400,
-                    ),
-                )
-                report_text = response.text
-            except Exception as e:
-                app.logger.warning(f"Gemini API failed, using fallback: {e}")
-                report_text = generate_fallback_report(
-                    material, quantity, co2, water, suppliers
-                )
-        else:
-            report_text = generate_fallback_report(
-                material, quantity, co2, water, suppliers
-            )
 
-        return jsonify(
-            {
-                "report": report_text,
-                "material": material,
-                "metrics": {"co2_kg": co2, "water_l": water, "quantity_kg": quantity},
-                "status": "success",
-            }
+def stream_text(prompt, **config):
+    """
+    Yield Gemini text chunks as they are generated. Cached responses replay
+    immediately; a fully streamed response is stored for later requests.
+    """
+    key = llm_cache.key(GEMINI_MODEL, prompt, config)
+    cached = llm_cache.lookup(key)
+    if cached is not MISS:
+        yield cached
+        return
+    if not gemini_model:
+        raise RuntimeError("Gemini API not configured")
+
+    chunks = []
+    with upstream("gemini"):
+        response = gemini_model.generate_content(
+            prompt, generation_config=dict(config), stream=True
+        )
+        for chunk in response:
+            if chunk.text:
+                chunks.append(chunk.text)
+                yield chunk.text
+    llm_cache.store(key, "".join(chunks))
+
+
+def generate_text(prompt, **config):
+    """
+    Gemini completion for a prompt and generation config. Identical requests
+    are served from the LLM cache and concurrent duplicates share one call.
+    """
+    key = llm_cache.key(GEMINI_MODEL, prompt, config)
+
+    def generate():
+        with upstream("gemini"):
+            return gemini_model.generate_content(
+                prompt, generation_config=dict(config)
+            ).text
+
+    return llm_cache.get_or_generate(key, generate)
+
+
+def generate_narrative(material, qty, co2, water, supplier_names):
+    """Generate a product narrative via Gemini, falling back when unavailable"""
+    if not gemini_model:
+        return generate_fallback_narrative(material, qty, co2, water, supplier_names)
+
+    try:
+        prompt_llm = (
+            f"Create a sustainability report for a product with material {material}.\n"
+            f"- Quantity: {qty} kg\n"
+            f"- CO₂ emissions: {co2} kg\n"
+            f"- Water usage: {water} L\n"
+            f"- Matched suppliers: {', '.join(supplier_names)}\n\n"
+            "Write a concise explanation (<150 words) summarizing material choice, "
+            "environmental impact, and why these suppliers were selected. "
+            "Focus on sustainability benefits and environmental considerations."
         )
 
+        return generate_text(
+            prompt_llm, temperature=0.7, top_p=0.8, top_k=40, max_output_tokens=200
+        )
     except Exception as e:
-        app.logger.error(f"Error generating sustainability report: {str(e)}")
-        return jsonify(
-            {"error": "Failed to generate report", "message": str(e), "status": "error"}
-        ), 500
+        current_app.logger.warning(f"Gemini API failed, using fallback: {e}")
+        return generate_fallback_narrative(material, qty, co2, water, supplier_names)
 
 
 def generate_fallback_narrative(material, qty, co2, water, supplier_names):
@@ -363,5 +1195,26 @@ Overall Sustainability Score: 85/100
 """
 
 
+def create_app():
+    """Build the Flask app; catalogs and API clients load on first use"""
+    flask_app = setup_app()
+    flask_app.register_blueprint(api)
+    return flask_app
+
+
+def warm():
+    """
+    Load the catalogs and the Gemini client and encode the placeholder now
+    rather than on first use, e.g. in the gunicorn master so forked workers
+    share them
+    """
+    catalogs.warm()
+    gemini_model.warm()
+    placeholder_assets.warm()
+
+
+app = create_app()
+
+
 if __name__ == "__main__":
     app.run(debug=True, host="0.0.0.0", port=5000)
@@ -1,29 +1,169 @@
 import os
+import json
+import queue
+import atexit
+import random
 import logging
-from logging.handlers import RotatingFileHandler
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from flask import Flask
-# from prometheus_flask_exporter import PrometheusMetrics  # Optional - install when needed
 
+import tracing
+from metrics import instrument, registry
 
-def setup_app():
-    app = Flask(__name__)
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Fraction of requests whose debug traces are logged (0 disables sampling)
+TRACE_SAMPLE_RATE = float(os.getenv("LOG_TRACE_SAMPLE_RATE", 0))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; messages are escaped, unlike a format string."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "module": record.module,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class BackgroundHandler(QueueHandler):
+    """
+    Hands records to a writer thread so request threads never wait on file or
+    console I/O; when the queue is full records are dropped and counted
+    rather than blocking.
+
+    Threads do not survive gunicorn's fork, so the writer is started per
+    process by ``start()`` (on a worker's first request). Until then, e.g.
+    while the master warms up, records are written inline.
+    """
+
+    def __init__(self, handlers, maxsize=LOG_QUEUE_SIZE):
+        super().__init__(None)
+        self.targets = handlers
+        self.maxsize = maxsize
+        self.dropped = 0
+        self._pid = None
+        self._listener = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self.queue = queue.Queue(self.maxsize)
+            self._listener = QueueListener(
+                self.queue, *self.targets, respect_handler_level=True
+            )
+            self._listener.start()
+            self._pid = os.getpid()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Flush queued records and stop the writer thread."""
+        with self._lock:
+            listener, self._listener, self._pid = self._listener, None, None
+        if listener is not None:
+            try:
+                listener.stop()
+            except queue.Full:
+                pass  # the writer is a daemon thread; exit regardless
+
+    def emit(self, record):
+        if self._pid != os.getpid():
+            for handler in self.targets:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+            return
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+        except Exception:
+            self.handleError(record)
+
+
+_log_handler = None
+
+
+def setup_logging():
+    """
+    Route every logger (app, matcher, design, ...) through one background
+    handler writing JSON lines to logs/app.log and plain lines to stderr.
+    """
+    global _log_handler
+    if _log_handler is not None:
+        return _log_handler
 
     # 📄 Structured logging setup
     os.makedirs("logs", exist_ok=True)
-    handler = RotatingFileHandler(
+    file_handler = RotatingFileHandler(
         "logs/app.log", maxBytes=10 * 1024 * 1024, backupCount=5
     )
-    formatter = logging.Formatter(
-        '{"time":"%(asctime)s","level":"%(levelname)s","module":"%(module)s","message":"%(message)s"}'
+    file_handler.setFormatter(JsonFormatter())
+    console = logging.StreamHandler()
+    console.setFormatter(
+        logging.Formatter("[%(asctime)s] %(levelname)s in %(module)s: %(message)s")
     )
-    handler.setFormatter(formatter)
-    handler.setLevel(logging.INFO)
-    app.logger.addHandler(handler)
-    app.logger.setLevel(logging.INFO)
+
+    _log_handler = BackgroundHandler([file_handler, console])
+    root = logging.getLogger()
+    root.addHandler(_log_handler)
+    root.setLevel(LOG_LEVEL)
+    return _log_handler
+
+
+@registry.collector
+def logging_metrics():
+    # Registered once per process, however many apps setup_app() builds
+    dropped = _log_handler.dropped if _log_handler is not None else 0
+    return [
+        (
+            "log_records_dropped_total",
+            "counter",
+            "Log records dropped because the log queue was full",
+            {(): dropped},
+        )
+    ]
+
+
+def setup_app():
+    app = Flask(__name__)
+
+    log_handler = setup_logging()
+    # The root handler covers app.logger, so Flask adds no stderr handler
+    app.logger.setLevel(LOG_LEVEL)
     app.logger.info("Logging setup complete")
 
-    # 📊 Prometheus monitoring (optional - uncomment when prometheus_flask_exporter is installed)
-    # metrics = PrometheusMetrics(app)
-    # metrics.info("app_info", "Application info", version="1.0.0")
+    @app.before_request
+    def begin_request_logging():
+        log_handler.start()
+        if TRACE_SAMPLE_RATE and random.random() < TRACE_SAMPLE_RATE:
+            tracing.begin()
+
+    @app.after_request
+    def report_trace_id(response):
+        trace_id = tracing.current()
+        if trace_id:
+            response.headers["X-Trace-Id"] = trace_id
+        return response
+
+    @app.teardown_request
+    def end_trace(error=None):
+        tracing.end()
+
+    # 📊 Prometheus metrics on /metrics and Server-Timing headers (see metrics.py)
+    instrument(app)
 
     return app
@@ -0,0 +1,334 @@
+"""
+Benchmark suite for the supplier matcher, footprint scoring and HTTP API.
+
+For each catalog size a seeded synthetic ``manufacturers.csv`` is generated
+and timed through:
+
+- matcher init from CSV, and from a prebuilt catalog
+- single, batch and nearest-supplier queries (result cache disabled)
+- single footprint lookups and chunked bill-of-materials scoring
+- JSON serialization of supplier responses
+- Flask test-client latency and throughput per endpoint, with image
+  generation and Gemini stubbed out
+
+Results are written as JSON; ``--compare`` prints the ratio of every mean
+against an earlier results file.
+
+Usage (from the ``ai`` directory):
+    python -m benchmarks --sizes 1k,100k --output bench.json
+    python -m benchmarks --sizes 1m --compare bench.json
+"""
+
+import argparse
+import contextlib
+import gc
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from importlib.metadata import version as package_version
+
+import numpy as np
+
+from benchmarks.synthetic import (
+    CITIES,
+    generate_bill_of_materials,
+    generate_queries,
+    material_names,
+    write_manufacturers,
+)
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+
+
+def parse_size(name: str) -> int:
+    """``1k`` -> 1000; plain integers are accepted too."""
+    name = name.strip().lower()
+    if name in SIZES:
+        return SIZES[name]
+    return int(name)
+
+
+def summarize(samples):
+    """Timing statistics in milliseconds for a list of durations in seconds."""
+    ms = np.asarray(samples) * 1000
+    return {
+        "runs": len(ms),
+        "mean_ms": float(ms.mean()),
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p95_ms": float(np.percentile(ms, 95)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "min_ms": float(ms.min()),
+        "max_ms": float(ms.max()),
+    }
+
+
+def measure(fn, args_list, warmup: int = 1):
+    """Time ``fn(*args)`` for each entry of ``args_list`` after ``warmup`` calls."""
+    for args in args_list[:warmup]:
+        fn(*args)
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def windows(items, size, step=None):
+    """Slices of ``size`` items starting every ``step`` (default ``size``) items."""
+    starts = range(0, len(items), step or size)
+    return [
+        items[start:stop] for start, stop in zip(starts, (i + size for i in starts))
+    ]
+
+
+def bench_matcher(csv_path, catalog_root, queries, repeat):
+    from catalog import build_catalog, load_matcher, open_catalog
+    from enhanced_manufacturer_matcher import ManufacturerMatcher
+    from result_cache import ResultCache
+
+    results = {}
+    results["init_csv"] = measure(
+        lambda: ManufacturerMatcher(csv_path), [()] * repeat, warmup=0
+    )
+    build_catalog(catalog_root, csv_path)
+    results["init_catalog"] = measure(
+        lambda: load_matcher(open_catalog(catalog_root)), [()] * repeat, warmup=0
+    )
+
+    # No result cache, so every query is scored
+    matcher = ManufacturerMatcher(csv_path, cache=ResultCache(maxsize=0))
+    single = [
+        (q["material"], q.get("region"), q.get("min_capacity", 0), 10) for q in queries
+    ]
+    results["query_single"] = measure(matcher.find_top_suppliers, single)
+
+    batches = windows(queries, 50)
+    results["query_batch_50"] = measure(
+        lambda batch: matcher.find_top_suppliers_many(batch, top_n=10),
+        [(b,) for b in batches],
+    )
+    nearest = [(c[1], c[2], 10, q["material"]) for c, q in zip(CITIES * 100, queries)]
+    results["query_nearest"] = measure(matcher.find_nearest_suppliers, nearest)
+
+    payloads = [
+        ({"suppliers": matcher.find_top_suppliers(*q), "status": "success"},)
+        for q in single
+    ]
+    results["json_suppliers"] = measure(json.dumps, payloads)
+    page = matcher.df.iloc[:1000]
+    results["json_catalog_page_1000"] = measure(
+        lambda: json.dumps(page.to_dict(orient="records")), [()] * repeat
+    )
+    return matcher, results
+
+
+def bench_footprint(lines, repeat):
+    from footprint import FootprintEngine, FootprintTotals
+    from materials_repository import MaterialsRepository
+
+    materials = MaterialsRepository("materials_enriched.csv")
+    engine = FootprintEngine(materials)
+    results = {
+        "lookup": measure(
+            materials.footprint, [(line[1], line[2]) for line in lines[:1000]]
+        ),
+        f"score_{len(lines)}_lines": measure(
+            lambda: sum(1 for _ in engine.score(lines, FootprintTotals())),
+            [()] * repeat,
+        ),
+    }
+    return materials, results
+
+
+@contextlib.contextmanager
+def stubbed_app(matcher, materials, workdir):
+    """
+    The Flask app serving the given catalogs, with image generation and
+    Gemini stubbed out, designs written under ``workdir`` and request
+    logging limited to warnings.
+    """
+    import app as app_module
+    from catalog_manager import CatalogManager, CatalogSnapshot
+    from design_cache import DesignCache
+    from placeholders import PlaceholderAssets
+
+    stubs = {
+        "catalogs": CatalogManager(lambda: CatalogSnapshot(matcher, materials)),
+        "generate_design": lambda prompt: None,
+        "gemini_model": None,
+        "design_cache": DesignCache(workdir),
+        "placeholder_assets": PlaceholderAssets(workdir),
+    }
+    saved = {name: getattr(app_module, name) for name in stubs}
+    for name, value in stubs.items():
+        setattr(app_module, name, value)
+    # Per-request INFO logging would flood the console
+    level = app_module.app.logger.level
+    app_module.app.logger.setLevel(logging.WARNING)
+    try:
+        yield app_module.app
+    finally:
+        app_module.app.logger.setLevel(level)
+        for name, value in saved.items():
+            setattr(app_module, name, value)
+
+
+def bench_http(app, queries, lines, requests_per_endpoint):
+    client = app.test_client()
+    n = requests_per_endpoint
+    bom = "".join(
+        json.dumps({"product_id": p, "material": m, "quantity": q}) + "\n"
+        for p, m, q in lines[:1000]
+    )
+    endpoints = {
+        "GET /health": [lambda: client.get("/health")] * n,
+        "GET /materials": [lambda: client.get("/materials")] * n,
+        "GET /suppliers": [
+            lambda q=q: client.get("/suppliers", query_string=q) for q in queries[:n]
+        ],
+        "POST /suppliers/batch": [
+            lambda batch=batch: client.post("/suppliers/batch", json={"queries": batch})
+            for batch in windows(queries[: n + 19], 20, step=1)[:n]
+        ],
+        "POST /footprint/batch (1000 lines)": [
+            lambda: client.post(
+                "/footprint/batch", data=bom, content_type="application/x-ndjson"
+            )
+        ]
+        * n,
+        "POST /create-product": [
+            lambda q=q: client.post(
+                "/create-product",
+                json={"prompt": "Benchmark tee", **q, "quantity": 1.0},
+            )
+            for q in queries[:n]
+        ],
+    }
+
+    results = {}
+    for name, calls in endpoints.items():
+        calls[0]().get_data()  # warm up
+        samples = []
+        start = time.perf_counter()
+        for call in calls:
+            begin = time.perf_counter()
+            response = call()
+            response.get_data()
+            samples.append(time.perf_counter() - begin)
+            if response.status_code >= 400:
+                raise RuntimeError(f"{name} returned {response.status_code}")
+        elapsed = time.perf_counter() - start
+        results[name] = {**summarize(samples), "throughput_rps": len(calls) / elapsed}
+    return results
+
+
+def run_size(
+    rows, seed=0, repeat=3, queries=200, requests_per_endpoint=100, lines=100_000
+):
+    """All benchmarks for one synthetic catalog of ``rows`` suppliers."""
+    names = material_names()
+    query_list = generate_queries(queries, seed, names)
+    bom_lines = generate_bill_of_materials(lines, seed, names)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, "manufacturers.csv")
+        start = time.perf_counter()
+        write_manufacturers(csv_path, rows, seed, names)
+        result = {
+            "rows": rows,
+            "generate_s": time.perf_counter() - start,
+            "csv_bytes": os.path.getsize(csv_path),
+        }
+
+        matcher, result["matcher"] = bench_matcher(
+            csv_path, os.path.join(workdir, "catalog"), query_list, repeat
+        )
+        materials, result["footprint"] = bench_footprint(bom_lines, repeat)
+        with stubbed_app(matcher, materials, workdir) as app:
+            result["http"] = bench_http(
+                app, query_list, bom_lines, requests_per_endpoint
+            )
+    gc.collect()
+    return result
+
+
+def environment(seed):
+    packages = ("numpy", "pandas", "scikit-learn", "flask")
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "packages": {name: package_version(name) for name in packages},
+        "seed": seed,
+    }
+
+
+def compare(baseline, current):
+    """``{size: {metric: current_mean / baseline_mean}}`` for shared metrics."""
+
+    def means(results, prefix=""):
+        for key, value in results.items():
+            if isinstance(value, dict) and "mean_ms" in value:
+                yield prefix + key, value["mean_ms"]
+            elif isinstance(value, dict):
+                yield from means(value, f"{prefix}{key}.")
+
+    ratios = {}
+    for size, results in current["results"].items():
+        before = dict(means(baseline["results"].get(size, {})))
+        ratios[size] = {
+            metric: mean / before[metric]
+            for metric, mean in means(results)
+            if before.get(metric)
+        }
+    return ratios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", default="1k,100k", help="comma-separated, e.g. 1k,100k,1m"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--output", help="results file (default: stdout)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args(argv)
+
+    report = {"environment": environment(args.seed), "results": {}}
+    for name in args.sizes.split(","):
+        rows = parse_size(name)
+        print(f"Benchmarking {rows} suppliers...", file=sys.stderr)
+        report["results"][name.strip()] = run_size(
+            rows, args.seed, args.repeat, args.queries, args.requests, args.lines
+        )
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["compared_to"] = {
+                "file": args.compare,
+                "ratios": compare(json.load(f), report),
+            }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"✓ Wrote results to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Seeded synthetic catalogs shaped like ``manufacturers.csv``.
+
+The same ``rows`` and ``seed`` always produce the same suppliers, so
+benchmark runs on different machines or commits score identical data.
+"""
+
+import csv
+
+import numpy as np
+import pandas as pd
+
+# Textile hubs the real catalog draws from, with their coordinates
+CITIES = [
+    ("Ahmedabad", 23.0225, 72.5714),
+    ("Jaipur", 26.9124, 75.7873),
+    ("Tiruppur", 11.1085, 77.3411),
+    ("Dhaka", 23.8103, 90.4125),
+    ("Ho Chi Minh City", 10.8231, 106.6297),
+    ("Guangzhou", 23.1291, 113.2644),
+    ("Shaoxing", 30.0023, 120.5785),
+    ("Istanbul", 41.0082, 28.9784),
+    ("Milan", 45.4642, 9.19),
+    ("Porto", 41.1579, -8.6291),
+    ("Prato", 43.8777, 11.1022),
+    ("Los Angeles", 34.0522, -118.2437),
+    ("Charlotte", 35.2271, -80.8431),
+    ("Sao Paulo", -23.5505, -46.6333),
+    ("Lahore", 31.5204, 74.3587),
+]
+
+CERTIFICATIONS = [
+    "GOTS",
+    "OEKO-TEX",
+    "Fair Trade",
+    "GRS",
+    "FSC",
+    "B Corp",
+    "bluesign",
+    "Cradle to Cradle",
+]
+
+COLUMNS = [
+    "Manufacturer_Name",
+    "City",
+    "Latitude",
+    "Longitude",
+    "Supported_Materials",
+    "Certifications",
+    "Max_Weekly_Capacity",
+]
+
+
+def material_names(path="materials_enriched.csv"):
+    """Material names from the materials catalog, so footprints resolve."""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [row["Material"] for row in csv.DictReader(f)]
+
+
+def _pick(rng, options, rows, counts):
+    """For each row, ``counts[i]`` distinct options joined with ", "."""
+    # Random sort keys give each row an independent permutation of options
+    order = np.argsort(rng.random((rows, len(options))), axis=1)
+    names = np.array(options, dtype=object)[order]
+    return [", ".join(names[i, : counts[i]]) for i in range(rows)]
+
+
+def generate_manufacturers(rows: int, seed: int = 0, materials=None) -> pd.DataFrame:
+    """
+    ``rows`` suppliers scattered around the textile hubs, each supporting
+    1-3 materials with 0-3 certifications and a log-normal weekly capacity.
+    """
+    rng = np.random.default_rng(seed)
+    materials = materials or material_names()
+
+    city = rng.integers(len(CITIES), size=rows)
+    lat = np.array([c[1] for c in CITIES])[city] + rng.normal(0, 0.25, rows)
+    lon = np.array([c[2] for c in CITIES])[city] + rng.normal(0, 0.25, rows)
+    capacity = np.clip(rng.lognormal(7.5, 0.8, rows), 100, 20000).astype(np.int64)
+
+    return pd.DataFrame(
+        {
+            "Manufacturer_Name": [f"SynthMaker{i + 1}" for i in range(rows)],
+            "City": np.array([c[0] for c in CITIES], dtype=object)[city],
+            "Latitude": lat,
+            "Longitude": lon,
+            "Supported_Materials": _pick(
+                rng, materials, rows, rng.integers(1, 4, rows)
+            ),
+            "Certifications": _pick(
+                rng, CERTIFICATIONS, rows, rng.integers(0, 4, rows)
+            ),
+            "Max_Weekly_Capacity": capacity,
+        },
+        columns=COLUMNS,
+    )
+
+
+def write_manufacturers(path: str, rows: int, seed: int = 0, materials=None):
+    """Write a synthetic catalog CSV to ``path`` and return its frame."""
+    df = generate_manufacturers(rows, seed, materials)
+    df.to_csv(path, index=False)
+    return df
+
+
+def generate_queries(count: int, seed: int = 0, materials=None):
+    """Supplier queries as ``/suppliers/batch`` accepts them."""
+    rng = np.random.default_rng(seed + 1)
+    materials = materials or material_names()
+    queries = []
+    for _ in range(count):
+        query = {"material": materials[rng.integers(len(materials))]}
+        if rng.random() < 0.5:
+            query["region"] = CITIES[rng.integers(len(CITIES))][0]
+        if rng.random() < 0.5:
+            query["min_capacity"] = int(rng.choice([500, 1000, 5000]))
+        queries.append(query)
+    return queries
+
+
+def generate_bill_of_materials(lines: int, seed: int = 0, materials=None):
+    """(product_id, material, quantity) lines for footprint scoring."""
+    rng = np.random.default_rng(seed + 2)
+    materials = materials or material_names()
+    # A few unknown names, as real uploads have
+    names = materials + ["Unobtainium"]
+    picks = rng.integers(len(names), size=lines)
+    quantities = np.round(rng.uniform(0.1, 5.0, lines), 2)
+    products = rng.integers(max(lines // 5, 1), size=lines)
+    return [
+        (f"P{products[i]}", names[picks[i]], float(quantities[i])) for i in range(lines)
+    ]
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Compile the manufacturers and materials CSVs into the prebuilt catalog that
+the app loads at startup (see ``catalog.py``).
+
+Usage:
+    python build_catalog.py [--root catalog]
+"""
+
+import argparse
+import os
+import time
+
+from catalog import build_catalog
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--root", default=os.getenv("CATALOG_DIR", "catalog"))
+    parser.add_argument("--manufacturers", default="manufacturers.csv")
+    parser.add_argument("--materials", default="materials_enriched.csv")
+    parser.add_argument(
+        "--keep", type=int, default=2, help="catalog versions to keep on disk"
+    )
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    catalog = build_catalog(args.root, args.manufacturers, args.materials, args.keep)
+    elapsed = time.perf_counter() - started
+    print(f"✓ Built catalog {catalog.version} in {catalog.directory} ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,352 @@
+"""
+Prebuilt binary catalog.
+
+``build_catalog`` compiles ``manufacturers.csv`` and ``materials_enriched.csv``
+into a versioned directory of NumPy columns (``.npz``), the fitted TF-IDF
+vectorizer (pickled) and a manifest with file sizes and SHA-256 checksums.
+Loading it skips CSV parsing, string cleanup and the TF-IDF fit. Versions
+live side by side under the catalog root and ``CURRENT`` names the active
+one; it is replaced atomically, so readers never see a half-written catalog.
+
+Checksums are written and verified when a version is built; opening one
+only checks file sizes unless asked to verify, and warns when the source
+CSVs have changed since the build.
+"""
+
+import csv
+import hashlib
+import json
+import logging
+import os
+import pickle
+import shutil
+import uuid
+from datetime import datetime, timezone
+from importlib.metadata import version as package_version
+
+import numpy as np
+
+from materials_repository import MaterialsRepository
+
+# pandas, scikit-learn and the matcher are imported where suppliers are
+# loaded, so reading materials (e.g. for /materials) stays light
+
+FORMAT_VERSION = 3
+CURRENT = "CURRENT"
+MANIFEST = "manifest.json"
+SUPPLIERS = "suppliers.npz"
+MATERIALS = "materials.npz"
+VECTORIZER = "vectorizer.pkl"
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogError(Exception):
+    """Raised when a built catalog is unreadable, incompatible or corrupt."""
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_entry(path):
+    stat = os.stat(path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": _sha256(path)}
+
+
+def stale_sources(manifest, paths):
+    """
+    Names of the CSVs in ``paths`` that differ from the ones ``manifest`` was
+    built from. Files whose size and mtime are unchanged are not hashed.
+    """
+    stale = []
+    for path in paths:
+        name = os.path.basename(path)
+        built = manifest["sources"].get(name)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue  # nothing newer to load
+        if built is None or stat.st_size != built["size"]:
+            stale.append(name)
+        elif stat.st_mtime_ns != built["mtime_ns"] and _sha256(path) != built["sha256"]:
+            stale.append(name)
+    return stale
+
+
+def _frame_arrays(df):
+    """Columns of ``df`` as NumPy arrays; text columns keep a missing-value mask."""
+    arrays = {}
+    for column in df.columns:
+        values = df[column]
+        if values.dtype.kind in "biuf":
+            arrays[f"col:{column}"] = values.to_numpy()
+        else:
+            missing = values.isna().to_numpy()
+            arrays[f"col:{column}"] = values.fillna("").astype(str).to_numpy(dtype=str)
+            if missing.any():
+                arrays[f"missing:{column}"] = missing
+    return arrays
+
+
+def _frame(arrays, columns):
+    import pandas as pd
+
+    data = {}
+    for column in columns:
+        values = arrays[f"col:{column}"]
+        if values.dtype.kind == "U":
+            values = values.astype(object)
+            missing = arrays.get(f"missing:{column}")
+            if missing is not None:
+                values[missing] = np.nan
+        data[column] = values
+    return pd.DataFrame(data, columns=columns)
+
+
+class Catalog:
+    def __init__(self, directory: str, manifest: dict):
+        self.directory = directory
+        self.manifest = manifest
+        self.version = manifest["version"]
+
+    def _arrays(self, name):
+        with np.load(os.path.join(self.directory, name)) as npz:
+            return dict(npz)
+
+    def matcher(self, cache=None):
+        """A ``ManufacturerMatcher`` over this catalog, without a TF-IDF refit."""
+        from enhanced_manufacturer_matcher import ManufacturerMatcher
+        from supplier_index import SupplierIndex
+
+        arrays = self._arrays(SUPPLIERS)
+        df = _frame(arrays, self.manifest["supplier_columns"])
+        with open(os.path.join(self.directory, VECTORIZER), "rb") as f:
+            vec = pickle.load(f)
+        return ManufacturerMatcher.from_catalog(
+            df,
+            vec,
+            SupplierIndex.from_arrays(df, arrays),
+            self.manifest["catalog_version"],
+            cache=cache,
+        )
+
+    def with_suppliers(self, matcher, keep=2):
+        """
+        Publish ``matcher`` as a new catalog version next to this one, with
+        the same materials, and return it.
+        """
+        arrays = self._arrays(MATERIALS)
+        columns = self.manifest["material_columns"]
+        return write_catalog(
+            os.path.dirname(self.directory),
+            matcher,
+            columns,
+            {c: arrays[f"col:{c}"] for c in columns},
+            self.manifest["sources"],
+            keep,
+        )
+
+    def materials(self, aliases=None):
+        """A ``MaterialsRepository`` over this catalog."""
+        arrays = self._arrays(MATERIALS)
+        columns = self.manifest["material_columns"]
+        values = zip(*(arrays[f"col:{c}"].tolist() for c in columns))
+        return MaterialsRepository.from_rows(
+            [dict(zip(columns, row)) for row in values], aliases
+        )
+
+
+def open_catalog(root: str = "catalog", sources=(), verify: bool = False):
+    """
+    The active catalog under ``root``, or None if no catalog has been built
+    there. File sizes are checked, and checksums too with ``verify``; a
+    warning is logged if any CSV in ``sources`` changed since the build.
+    """
+    try:
+        with open(os.path.join(root, CURRENT), encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+
+    manifest = _verified_manifest(root, version, verify)
+    stale = stale_sources(manifest, sources)
+    if stale:
+        logger.warning(
+            f"Catalog {version} is older than {', '.join(stale)}; "
+            "rerun build_catalog.py to pick up the changes"
+        )
+    return Catalog(os.path.join(root, version), manifest)
+
+
+def _verified_manifest(root, version, verify=True):
+    directory = os.path.join(root, version)
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise CatalogError(f"Unreadable catalog manifest in {directory}: {e}")
+
+    if manifest.get("format") != FORMAT_VERSION:
+        raise CatalogError(
+            f"Unsupported catalog format {manifest.get('format')}; rebuild it"
+        )
+    sklearn_version = package_version("scikit-learn")
+    if manifest.get("sklearn") != sklearn_version:
+        # Pickled vectorizers are only guaranteed to load on the same version
+        raise CatalogError(
+            f"Catalog built with scikit-learn {manifest.get('sklearn')}, "
+            f"running {sklearn_version}; rebuild it"
+        )
+    for name, expected in manifest["files"].items():
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path) or os.path.getsize(path) != expected["size"]:
+            raise CatalogError(f"Size mismatch for {path}")
+        if verify and _sha256(path) != expected["sha256"]:
+            raise CatalogError(f"Checksum mismatch for {path}")
+    return manifest
+
+
+def load_matcher(catalog, csv_path="manufacturers.csv", cache=None):
+    """The matcher from ``catalog``, or parsed from CSV when there is none."""
+    if catalog is None:
+        from enhanced_manufacturer_matcher import ManufacturerMatcher
+
+        return ManufacturerMatcher(csv_path, cache=cache)
+    return catalog.matcher(cache)
+
+
+def load_materials(catalog, csv_path="materials_enriched.csv", aliases=None):
+    """The materials repository from ``catalog``, or parsed from CSV."""
+    if catalog is None:
+        return MaterialsRepository(csv_path, aliases)
+    return catalog.materials(aliases)
+
+
+def _write_current(root, version):
+    tmp = os.path.join(root, f".{CURRENT}.{uuid.uuid4().hex}.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(root, CURRENT))
+
+
+def _prune(root, active, keep):
+    """Remove all but the ``keep`` most recent versions (always keeping ``active``)."""
+    versions = [
+        entry
+        for entry in os.scandir(root)
+        if entry.is_dir() and not entry.name.startswith(".") and entry.name != active
+    ]
+    versions.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+    stale = max(keep - 1, 0)
+    for entry in versions[stale:]:
+        shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def write_catalog(root, matcher, material_columns, material_arrays, sources, keep=2):
+    """
+    Write ``matcher`` and the materials columns as a catalog version under
+    ``root``, make it the active one and return its ``Catalog``.
+    """
+    version = hashlib.sha256(
+        json.dumps(
+            {
+                "sources": {name: s["sha256"] for name, s in sources.items()},
+                "catalog_version": matcher.catalog_version,
+            },
+            sort_keys=True,
+        ).encode("utf-8")
+    ).hexdigest()[:16]
+
+    os.makedirs(root, exist_ok=True)
+    tmp = os.path.join(root, f".{version}.{uuid.uuid4().hex}.tmp")
+    os.makedirs(tmp)
+    try:
+        np.savez(
+            os.path.join(tmp, SUPPLIERS),
+            **matcher.index.to_arrays(),
+            **_frame_arrays(matcher.df),
+        )
+        np.savez(
+            os.path.join(tmp, MATERIALS),
+            **{f"col:{c}": material_arrays[c] for c in material_columns},
+        )
+        with open(os.path.join(tmp, VECTORIZER), "wb") as f:
+            pickle.dump(matcher.vec, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        manifest = {
+            "format": FORMAT_VERSION,
+            "version": version,
+            "catalog_version": matcher.catalog_version,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+            "sklearn": package_version("scikit-learn"),
+            "supplier_columns": list(matcher.df.columns),
+            "material_columns": list(material_columns),
+            "sources": sources,
+            "files": {
+                name: {
+                    "size": os.path.getsize(os.path.join(tmp, name)),
+                    "sha256": _sha256(os.path.join(tmp, name)),
+                }
+                for name in (SUPPLIERS, MATERIALS, VECTORIZER)
+            },
+        }
+        with open(os.path.join(tmp, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+        directory = os.path.join(root, version)
+        if os.path.isdir(directory):
+            # Same contents as an existing build: keep it unless it is damaged,
+            # since readers may be loading it right now
+            try:
+                manifest = _verified_manifest(root, version, verify=True)
+            except CatalogError:
+                shutil.rmtree(directory)
+        if not os.path.isdir(directory):
+            try:
+                os.replace(tmp, directory)
+            except OSError:
+                # Another process published the same version first
+                if not os.path.isdir(directory):
+                    raise
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    _write_current(root, version)
+    _prune(root, version, keep)
+    return Catalog(directory, manifest)
+
+
+def build_catalog(
+    root: str = "catalog",
+    manufacturers_csv: str = "manufacturers.csv",
+    materials_csv: str = "materials_enriched.csv",
+    keep: int = 2,
+):
+    """
+    Compile the CSVs into a new catalog version under ``root``, make it the
+    active one and return its ``Catalog``.
+    """
+    from enhanced_manufacturer_matcher import ManufacturerMatcher
+
+    matcher = ManufacturerMatcher(manufacturers_csv)
+    with open(materials_csv, newline="", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        material_rows = list(reader)
+        material_columns = list(reader.fieldnames or [])
+
+    material_arrays = {
+        c: np.array([row.get(c) or "" for row in material_rows], dtype=str)
+        for c in material_columns
+    }
+    sources = {
+        os.path.basename(path): _source_entry(path)
+        for path in (manufacturers_csv, materials_csv)
+    }
+    return write_catalog(
+        root, matcher, material_columns, material_arrays, sources, keep
+    )
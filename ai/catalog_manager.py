@@ -0,0 +1,197 @@
+"""
+Hot reload of the supplier and materials catalogs.
+
+Requests read ``CatalogManager.current`` once and use that snapshot
+throughout, so they never mix old and new data. Reloads build a complete new
+snapshot in a background thread and publish it with a single reference swap
+(copy-on-write); the old snapshot stays alive until its last reader is done.
+Reloads are triggered by an mtime poller or explicitly via ``reload()``.
+The first snapshot is loaded on first use, and its matcher may be a ``Lazy``
+so that materials are servable before the supplier stack is imported.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from footprint import FootprintEngine
+from lazy import Lazy
+
+
+class CatalogSnapshot:
+    """One consistent generation of the catalogs; never mutated once published."""
+
+    __slots__ = ("matcher", "materials", "footprint_engine", "catalog", "sources")
+
+    def __init__(self, matcher, materials, catalog=None, sources=()):
+        self.matcher = matcher
+        self.materials = materials
+        self.footprint_engine = FootprintEngine(materials)
+        # The prebuilt catalog this came from (None when parsed from CSV) and
+        # the files whose changes should trigger a reload
+        self.catalog = catalog
+        self.sources = tuple(sources)
+
+    def warm(self):
+        """Build a deferred matcher now, so no request pays for it."""
+        if isinstance(self.matcher, Lazy):
+            self.matcher.warm()
+        return self
+
+    @property
+    def version(self):
+        if self.catalog is not None:
+            return self.catalog.version
+        return self.matcher.catalog_version
+
+
+def _signature(paths):
+    signature = {}
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature[path] = (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            signature[path] = None
+    return signature
+
+
+class CatalogManager:
+    def __init__(self, load, poll_interval: float = 0.0, persist=None):
+        """
+        ``load()`` returns a fresh ``CatalogSnapshot``. ``persist(catalog,
+        matcher)`` publishes a supplier delta as a new prebuilt catalog so
+        other processes pick it up; without it deltas stay in this process.
+        """
+        self._load = load
+        self._persist = persist
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._threads_lock = threading.Lock()
+        self._executor = None
+        self._watcher = None
+        self.reloads = 0
+        self.last_error = None
+        self.loaded_at = None
+        self._current = None
+        self._signature = {}
+
+    @property
+    def current(self):
+        """The published snapshot, loading the first one on first use."""
+        snapshot = self._current
+        if snapshot is None:
+            with self._lock:
+                snapshot = self._loaded()
+        return snapshot
+
+    def warm(self):
+        """Load the catalogs, including any deferred matcher, ahead of use."""
+        return self.current.warm()
+
+    def _loaded(self):
+        # Caller holds the lock
+        if self._current is None:
+            snapshot = self._load()
+            self._publish(snapshot, _signature(snapshot.sources))
+        return self._current
+
+    def _publish(self, snapshot, signature):
+        # A single attribute assignment: readers see the old or the new snapshot
+        self._current = snapshot
+        self._signature = signature
+        self.loaded_at = time.time()
+
+    def _reload(self):
+        with self._lock:
+            sources = self._current.sources if self._current is not None else ()
+            # Stat before loading, so a change made mid-load triggers another reload
+            before = _signature(sources)
+            try:
+                # Readers get the new snapshot only once it is fully built
+                snapshot = self._load().warm()
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                raise
+            if snapshot.sources != sources:
+                before = _signature(snapshot.sources)
+            self._publish(snapshot, before)
+            self.reloads += 1
+            self.last_error = None
+            return snapshot
+
+    def reload(self):
+        """Rebuild the catalogs in the background; returns a Future of the snapshot."""
+        with self._threads_lock:
+            # Created on first use so it is never inherited across a fork
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="catalog-reload"
+                )
+        return self._executor.submit(self._reload)
+
+    def changed(self):
+        """True if any watched source file changed since the last load."""
+        snapshot = self._current
+        if snapshot is None:
+            return False
+        return _signature(snapshot.sources) != self._signature
+
+    def apply_supplier_delta(self, upserts=(), removals=()):
+        """
+        Add, replace or remove suppliers without a full rebuild and publish
+        the result. Returns ``(snapshot, refit, persisted)``.
+        """
+        with self._lock:
+            current = self._loaded()
+            matcher, refit = current.matcher.apply_delta(upserts, removals)
+            catalog = current.catalog
+            persisted = False
+            if catalog is not None and self._persist is not None:
+                catalog = self._persist(catalog, matcher)
+                persisted = True
+            snapshot = CatalogSnapshot(
+                matcher, current.materials, catalog, current.sources
+            )
+            # Our own write is not a change that needs reloading
+            self._publish(snapshot, _signature(snapshot.sources))
+            return snapshot, refit, persisted
+
+    def start_watching(self):
+        """Start the mtime poller in this process if polling is enabled."""
+        if self.poll_interval <= 0:
+            return
+        watcher = self._watcher
+        if watcher is not None and watcher.is_alive():
+            return
+        with self._threads_lock:
+            if self._watcher is not None and self._watcher.is_alive():
+                return
+            self._watcher = threading.Thread(
+                target=self._watch, name="catalog-watcher", daemon=True
+            )
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            if self.changed():
+                try:
+                    self._reload()
+                except Exception:
+                    pass  # recorded in last_error; the current snapshot stays
+
+    def status(self):
+        snapshot = self.current
+        return {
+            "version": snapshot.version,
+            "catalog_version": snapshot.matcher.catalog_version,
+            "source": "catalog" if snapshot.catalog is not None else "csv",
+            "suppliers": len(snapshot.matcher.df),
+            "materials": len(snapshot.materials),
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "last_error": self.last_error,
+            "watching": self.poll_interval > 0,
+        }
@@ -0,0 +1,126 @@
+"""
+Content-addressed on-disk cache for generated design images.
+
+Designs are stored under ``<sha256>.png`` where the hash covers the model,
+prompt and generation parameters, so identical requests reuse the existing
+file (and URL) instead of calling the inference API again. Least recently
+used designs are evicted once the cache exceeds its size bound. The cache
+keeps a running total of the bytes it holds, so the directory is only
+scanned when that total passes the bound.
+"""
+
+import os
+import re
+import threading
+import uuid
+
+KEY_PATTERN = re.compile(r"^([0-9a-f]{64})")
+
+
+class DesignCache:
+    def __init__(self, directory: str = "static", max_bytes: int = 512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Bytes on disk, or None until the first scan
+        self._bytes = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def filename(key: str):
+        return f"{key}.png"
+
+    def path(self, key: str):
+        return os.path.join(self.directory, self.filename(key))
+
+    def lookup(self, key: str):
+        """Filename of the cached design for ``key``, or None on a miss."""
+        path = self.path(key)
+        try:
+            # Touching the file records the access for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return self.filename(key)
+
+    def store(self, key: str, image, save):
+        """
+        Write ``image`` with ``save(image, path)`` under its content address
+        and return the filename. The file is renamed into place atomically so
+        concurrent lookups never see a partial image.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        tmp = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp.png")
+        save(image, tmp)
+        size = os.path.getsize(tmp)
+        with self._lock:
+            try:
+                size -= os.path.getsize(path)  # replacing an identical design
+            except FileNotFoundError:
+                pass
+            os.replace(tmp, path)
+            self._add(size)
+        return self.filename(key)
+
+    def add(self, nbytes: int):
+        """
+        Count ``nbytes`` written under a design's key (e.g. its variants) and
+        evict if the cache has outgrown its bound. Rewritten files count
+        again until the next scan corrects the total.
+        """
+        with self._lock:
+            self._add(nbytes)
+
+    def _add(self, nbytes):
+        if self._bytes is not None:
+            self._bytes += nbytes
+            if self._bytes <= self.max_bytes:
+                return
+        self._evict()
+
+    def evict(self):
+        """Delete least recently used designs until the cache fits its bound."""
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        # Scans the directory; called with the lock held
+        groups = {}
+        for entry in os.scandir(self.directory):
+            match = KEY_PATTERN.match(entry.name)
+            if not match or not entry.is_file():
+                continue
+            stat = entry.stat()
+            size, last_used, paths = groups.get(match.group(1), (0, 0.0, []))
+            groups[match.group(1)] = (
+                size + stat.st_size,
+                max(last_used, stat.st_mtime),
+                paths + [entry.path],
+            )
+
+        total = sum(size for size, _, _ in groups.values())
+        for size, _, paths in sorted(groups.values(), key=lambda g: g[1]):
+            if total <= self.max_bytes:
+                break
+            for path in paths:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            total -= size
+            self.evictions += 1
+        self._bytes = total
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
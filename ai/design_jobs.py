@@ -0,0 +1,230 @@
+"""
+Background job queue for design rendering.
+
+``/create-product`` can hand image generation to this queue and return a job
+ID immediately. A bounded pool of worker threads renders queued jobs; when the
+queue is full ``submit`` raises ``QueueFull`` so callers can shed load instead
+of piling up blocked requests.
+
+The local backend keeps jobs in process memory, so status lookups must reach
+the worker process that accepted the job. The sqlite backend records job
+states in a file shared by every worker process on the host, so any of them
+can answer; jobs are still rendered by the process that accepted them.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+TERMINAL_STATES = (DONE, FAILED)
+
+
+class QueueFull(Exception):
+    """Raised when the job queue has no room for another job."""
+
+
+class Job:
+    __slots__ = ("id", "state", "result", "error", "created_at", "updated_at")
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.state = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = self.updated_at = time.time()
+
+    def to_dict(self):
+        return {
+            "job_id": self.id,
+            "state": self.state,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+
+class LocalJobQueue:
+    """
+    In-process job queue backed by ``queue.Queue`` and worker threads.
+
+    Finished jobs are kept for status lookups until ``retention`` newer jobs
+    have been submitted.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 32, retention: int = 1000):
+        self.workers = workers
+        self.retention = retention
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._jobs = OrderedDict()
+        self._changed = threading.Condition()
+        self._threads = []
+
+    def _ensure_workers(self):
+        # Workers start lazily so importing the app never spawns threads
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"design-job-{i}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue ``fn(*args, **kwargs)`` and return the new job's ID."""
+        job = Job()
+        with self._changed:
+            self._ensure_workers()
+            try:
+                self._queue.put_nowait((job, fn, args, kwargs))
+            except queue.Full:
+                raise QueueFull("Design job queue is full")
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.retention:
+                self._jobs.popitem(last=False)
+            self._record(job)
+        return job.id
+
+    def get(self, job_id: str):
+        """Status dict for ``job_id``, or None if it is unknown or expired."""
+        with self._changed:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def wait(self, job_id: str, since: float = 0.0, timeout: float = None):
+        """
+        Block until the job changes after ``since`` (its ``updated_at``) or
+        the timeout elapses, then return its status dict.
+        """
+        with self._changed:
+            self._changed.wait_for(
+                lambda: job_id not in self._jobs
+                or self._jobs[job_id].updated_at > since,
+                timeout=timeout,
+            )
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _record(self, job):
+        """Hook for backends that keep job states outside this process."""
+
+    def _update(self, job, **fields):
+        with self._changed:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            job.updated_at = max(time.time(), job.updated_at + 1e-6)
+            self._record(job)
+            self._changed.notify_all()
+
+    def _work(self):
+        while True:
+            job, fn, args, kwargs = self._queue.get()
+            try:
+                self._update(job, state=RUNNING)
+                result = fn(*args, **kwargs)
+                self._update(job, state=DONE, result=result)
+            except Exception as e:
+                self._update(job, state=FAILED, error=str(e))
+            finally:
+                self._queue.task_done()
+
+
+COLUMNS = ("job_id", "state", "result", "error", "created_at", "updated_at")
+
+
+class SQLiteJobQueue(LocalJobQueue):
+    """
+    Job queue whose job states live in a local SQLite file, so every worker
+    process on the host can look them up. Lookups poll the file every
+    ``poll_interval`` seconds while waiting for a change.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        workers: int = 2,
+        max_pending: int = 32,
+        retention: int = 1000,
+        poll_interval: float = 0.25,
+    ):
+        super().__init__(workers=workers, max_pending=max_pending, retention=retention)
+        self.path = path
+        self.poll_interval = poll_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS design_jobs ("
+                "job_id TEXT PRIMARY KEY, state TEXT NOT NULL, result TEXT, "
+                "error TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        # A connection per call keeps the queue safe across threads and forks
+        return sqlite3.connect(self.path, timeout=5)
+
+    def _record(self, job):
+        row = {**job.to_dict(), "result": json.dumps(job.result)}
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO design_jobs VALUES (?, ?, ?, ?, ?, ?)",
+                tuple(row[column] for column in COLUMNS),
+            )
+            db.execute(
+                "DELETE FROM design_jobs WHERE job_id IN (SELECT job_id FROM "
+                "design_jobs ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.retention,),
+            )
+
+    def get(self, job_id: str):
+        with self._connect() as db:
+            row = db.execute(
+                f"SELECT {', '.join(COLUMNS)} FROM design_jobs WHERE job_id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        job = dict(zip(COLUMNS, row))
+        job["result"] = json.loads(job["result"])
+        return job
+
+    def wait(self, job_id: str, since: float = 0.0, timeout: float = None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None or job["updated_at"] > since:
+                return job
+            delay = self.poll_interval
+            if deadline is not None:
+                delay = min(delay, deadline - time.monotonic())
+                if delay <= 0:
+                    return job
+            time.sleep(delay)
+
+
+def create_job_queue():
+    """Build the job queue selected by ``DESIGN_JOB_BACKEND`` (local|sqlite)."""
+    backend = os.getenv("DESIGN_JOB_BACKEND", "local")
+    workers = int(os.getenv("DESIGN_JOB_WORKERS", 2))
+    max_pending = int(os.getenv("DESIGN_JOB_QUEUE_SIZE", 32))
+    if backend == "sqlite":
+        path = os.getenv("DESIGN_JOB_PATH", "cache/design_jobs.sqlite3")
+        return SQLiteJobQueue(path, workers=workers, max_pending=max_pending)
+    if backend != "local":
+        raise ValueError(f"Unknown design job backend: {backend}")
+    return LocalJobQueue(workers=workers, max_pending=max_pending)
@@ -0,0 +1,116 @@
+"""
+Compressed, multi-resolution variants of saved designs.
+
+Next to every saved ``<name>.png`` the encoder writes ``<name>.webp`` (and
+``<name>.avif`` when Pillow supports it) plus ``-medium`` and ``-thumb``
+downscales in every format. Encoding runs on a background pool so requests
+never wait for it; until a variant exists, negotiation falls back to the PNG.
+"""
+
+import functools
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+SIZES = {"medium": 512, "thumb": 256}
+
+# Best first; the original PNG is always the last resort
+FORMAT_OPTIONS = {
+    "avif": ("image/avif", {"quality": 60}),
+    "webp": ("image/webp", {"quality": 80, "method": 4}),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def formats():
+    """Variant formats this Pillow build can encode, best first."""
+    # Loading every plugin is slow, so it waits until a format is needed
+    Image.init()
+    extensions = Image.registered_extensions()
+    return tuple(fmt for fmt in FORMAT_OPTIONS if f".{fmt}" in extensions)
+
+
+encoder = ThreadPoolExecutor(
+    max_workers=int(os.getenv("VARIANT_WORKERS", 2)), thread_name_prefix="variants"
+)
+
+
+def variant_name(filename: str, size: str = None, fmt: str = None):
+    """``a.png`` -> ``a-thumb.webp`` for size ``thumb`` and format ``webp``."""
+    stem, ext = os.path.splitext(filename)
+    suffix = f"-{size}" if size else ""
+    return f"{stem}{suffix}.{fmt}" if fmt else f"{stem}{suffix}{ext}"
+
+
+def _write(image, path, **options):
+    # Write then rename so a half-encoded file is never served
+    stem, ext = os.path.splitext(path)
+    tmp = f"{stem}.{uuid.uuid4().hex}.tmp{ext}"
+    image.save(tmp, **options)
+    os.replace(tmp, path)
+    return os.path.getsize(path)
+
+
+def write_variants(image: Image.Image, path: str):
+    """
+    Encode every size and format variant of the PNG saved at ``path`` and
+    return the number of bytes written.
+    """
+    image = image.convert("RGB")
+    directory, filename = os.path.split(path)
+
+    written = 0
+    renditions = {None: image}
+    for size, px in SIZES.items():
+        scaled = image.copy()
+        scaled.thumbnail((px, px), Image.LANCZOS)
+        renditions[size] = scaled
+        written += _write(scaled, os.path.join(directory, variant_name(filename, size)))
+
+    for size, rendition in renditions.items():
+        for fmt in formats():
+            _, options = FORMAT_OPTIONS[fmt]
+            target = os.path.join(directory, variant_name(filename, size, fmt))
+            written += _write(rendition, target, **options)
+    return written
+
+
+def save_variants(image: Image.Image, path: str):
+    """Schedule variant encoding off the request thread; returns the future."""
+    return encoder.submit(write_variants, image.copy(), path)
+
+
+def negotiate(directory: str, filename: str, accepted, size: str = None):
+    """
+    Pick the best existing variant of ``filename`` for a client accepting the
+    given MIME types. Returns ``filename`` itself when no variant applies.
+    """
+    if size is not None and size not in SIZES:
+        return filename
+
+    for fmt in formats():
+        mimetype, _ = FORMAT_OPTIONS[fmt]
+        candidate = variant_name(filename, size, fmt)
+        if mimetype in accepted and os.path.isfile(os.path.join(directory, candidate)):
+            return candidate
+
+    if size:
+        candidate = variant_name(filename, size)
+        if os.path.isfile(os.path.join(directory, candidate)):
+            return candidate
+    return filename
+
+
+def preferred(filename: str, accepted, size: str = None):
+    """
+    The variant ``negotiate`` would return once encoding has finished. A
+    response serving anything else is provisional and must not be cached long.
+    """
+    if size is not None and size not in SIZES:
+        size = None
+    for fmt in formats():
+        if FORMAT_OPTIONS[fmt][0] in accepted:
+            return variant_name(filename, size, fmt)
+    return variant_name(filename, size)
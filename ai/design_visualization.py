@@ -1,23 +1,45 @@
-import os
-import requests
-from huggingface_hub import InferenceClient
+import json
+import hashlib
+import inspect
+import logging
+import threading
 from PIL import Image
 
+import placeholders
+from placeholders import Placeholder
+from image_backends import (
+    BackendUnavailable,
+    create_image_backend,
+    image_backend_model,
+)
+from metrics import upstream
+from tracing import trace
+
 # Load environment variables
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Load your Hugging Face token
-HF_TOKEN = os.getenv("HF_TOKEN")
-if not HF_TOKEN:
-    raise ValueError("Set your Hugging Face token in HF_TOKEN env variable")
+logger = logging.getLogger(__name__)
 
 # Choose a stable model, e.g. SDXL
 MODEL_ID = "stabilityai/stable-diffusion-xl-base-1.0"
 
-# Initialize the inference client once
-client = InferenceClient(model=MODEL_ID, token=HF_TOKEN)
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_backend():
+    """
+    The image backend selected by IMAGE_BACKEND, created on first use so
+    importing this module neither loads huggingface_hub nor requires HF_TOKEN.
+    """
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = create_image_backend(MODEL_ID)
+    return _backend
 
 
 def generate_design(
@@ -27,44 +49,87 @@ def generate_design(
     height: int = 1024,
     guidance_scale: float = 7.5,
     num_inference_steps: int = 50,
-) -> Image.Image:
+):
     """
-    Generates an image using HF Inference API and returns a PIL Image.
+    Generates an image with the configured backend and returns a PIL Image,
+    or a ``Placeholder`` of the requested size when the backend fails or is
+    unavailable.
     """
-    try:
-        response = client.text_to_image(
-            prompt,
-            negative_prompt=negative_prompt,
-            width=width,
-            height=height,
-            guidance_scale=guidance_scale,
-            num_inference_steps=num_inference_steps,
-        )
-        return response  # PIL.Image
-    except Exception as e:
-        print(f"⚠️ Image generation failed: {e}")
-        # Create a simple placeholder image
-        from PIL import Image, ImageDraw, ImageFont
-
-        img = Image.new("RGB", (width, height), color="lightblue")
-        draw = ImageDraw.Draw(img)
-
-        # Add text to the placeholder
+    with upstream("image") as call:
         try:
-            # Try to use a default font
-            font = ImageFont.load_default()
-        except Exception:
-            font = None
+            return get_backend().generate(
+                prompt,
+                negative_prompt=negative_prompt,
+                width=width,
+                height=height,
+                guidance_scale=guidance_scale,
+                num_inference_steps=num_inference_steps,
+            )
+        except BackendUnavailable as e:
+            # Fail fast while the upstream is degraded
+            call.outcome = "unavailable"
+            logger.warning("Image backend unavailable: %s", e)
+        except Exception as e:
+            call.outcome = "error"
+            logger.warning("Image generation failed: %s", e)
+    return Placeholder(width, height)
+
+
+def backend_status():
+    """Concurrency and circuit state of the image backend, once it is in use."""
+    backend = _backend
+    if backend is None or not hasattr(backend, "status"):
+        return None
+    return backend.status()
+
+
+def placeholder_design(
+    prompt: str, width: int = 1024, height: int = 1024
+) -> Image.Image:
+    """
+    A placeholder image with the prompt composed on a copy of the shared
+    template, for callers that need pixels (requests serve the shared file).
+    """
+    from PIL import ImageDraw, ImageFont
+
+    img = placeholders.template(width, height).copy()
+    draw = ImageDraw.Draw(img)
+    draw.text(
+        (50, height // 2 + 20),
+        f"{prompt[:50]}...",
+        fill="darkblue",
+        font=ImageFont.load_default(),
+    )
+
+    # Mark placeholders so they are never stored in the design cache
+    img.info["placeholder"] = True
+    return img
+
 
-        text = f"Product Design\n{prompt[:50]}..."
-        draw.text((50, height // 2), text, fill="darkblue", font=font)
-        return img
+def is_cacheable(image) -> bool:
+    """Only real generated designs may be stored under a content address."""
+    return isinstance(image, Image.Image) and not image.info.get("placeholder", False)
+
+
+def design_cache_key(prompt: str, **params) -> str:
+    """
+    Content address for a design: a hash of the configured backend's model,
+    the prompt and every generation parameter, with defaults taken from
+    generate_design. The backend itself is not built, so a misconfigured
+    one only affects generation (which falls back to a placeholder).
+    """
+    bound = inspect.signature(generate_design).bind(prompt, **params)
+    bound.apply_defaults()
+    payload = json.dumps(
+        {"model": image_backend_model(MODEL_ID), **bound.arguments}, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
 
 
 def save_design(image: Image.Image, filename: str = "design.png"):
     """Save the generated PIL Image locally."""
     image.save(filename)
-    print(f"🖼️ Image saved: {filename}")
+    trace(logger, "Image saved: %s", filename)
 
 
 if __name__ == "__main__":
@@ -72,4 +137,7 @@ if __name__ == "__main__":
         "Minimalist organic cotton T-shirt with a green leaf pattern on a white tee"
     )
     img = generate_design(demo_prompt)
+    if isinstance(img, Placeholder):
+        img = placeholder_design(demo_prompt, *img.size)
     save_design(img, "sample_design.png")
+    print("Image saved: sample_design.png")
@@ -3,140 +3,427 @@
 Fixed ManufacturerMatcher with better error handling and debugging
 """
 
+import numpy as np
 import pandas as pd
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+from result_cache import MISS, ResultCache
+from supplier_index import SupplierIndex
+import hashlib
+import logging
+import math
 import warnings
 
+import scoring
+from scoring import Candidates, normalize_weights, resolve_weights, top_k_indices
+from tracing import trace
+
 warnings.filterwarnings("ignore")
 
+logger = logging.getLogger(__name__)
+
+CERT_PRIORITY = ["GOTS", "OEKO-TEX", "Fair Trade", "GRS", "FSC"]
+# Every priority certification counts the same unless a query weights them
+DEFAULT_CERT_WEIGHTS = {cert: 1.0 for cert in CERT_PRIORITY}
+
+
+def _frame_version(df):
+    """Short content hash of the catalog rows"""
+    return hashlib.sha1(
+        pd.util.hash_pandas_object(df, index=False).values.tobytes()
+    ).hexdigest()[:16]
+
+
+def _clean(df):
+    """Strip stray quotes from the text columns, in place"""
+    # Handle quoted strings in materials column
+    if "Supported_Materials" in df.columns:
+        df["Supported_Materials"] = df["Supported_Materials"].astype(str)
+        df["Supported_Materials"] = df["Supported_Materials"].str.strip('"')
+
+    # Handle certifications column
+    if "Certifications" in df.columns:
+        df["Certifications"] = df["Certifications"].astype(str)
+        df["Certifications"] = df["Certifications"].str.strip('"')
+    return df
+
 
 class ManufacturerMatcher:
-    def __init__(self, csv_path="manufacturers.csv"):
+    def __init__(self, csv_path="manufacturers.csv", cache: ResultCache = None):
         try:
-            print(f"Loading data from {csv_path}...")
-            self.df = pd.read_csv(csv_path)
-            print(f"Loaded {len(self.df)} manufacturers")
+            df = pd.read_csv(csv_path)
+            logger.info("Loaded %d manufacturers from %s", len(df), csv_path)
+            self._init_frame(df, cache)
 
-            # Clean the data
-            print("Cleaning data...")
+        except Exception:
+            logger.exception("Error initializing ManufacturerMatcher")
+            raise
 
-            # Handle quoted strings in materials column
-            if "Supported_Materials" in self.df.columns:
-                self.df["Supported_Materials"] = self.df["Supported_Materials"].astype(
-                    str
-                )
-                self.df["Supported_Materials"] = self.df[
-                    "Supported_Materials"
-                ].str.strip('"')
-
-            # Handle certifications column
-            if "Certifications" in self.df.columns:
-                self.df["Certifications"] = self.df["Certifications"].astype(str)
-                self.df["Certifications"] = self.df["Certifications"].str.strip('"')
-
-            # Initialize TF-IDF vectorizer
-            print("Initializing TF-IDF vectorizer...")
-            self.vec = TfidfVectorizer(stop_words="english")
-
-            # Fit the vectorizer
-            materials_list = self.df["Supported_Materials"].fillna("")
-            if len(materials_list) > 0:
-                self.vec.fit(materials_list)
-                print("✓ TF-IDF vectorizer initialized successfully")
-            else:
-                raise ValueError("No materials data found to train vectorizer")
+    def _init_frame(self, df, cache):
+        # Clean the data
+        df = _clean(df)
+
+        # Initialize TF-IDF vectorizer
+        vec = TfidfVectorizer(stop_words="english")
+
+        # Fit the vectorizer
+        materials_list = df["Supported_Materials"].fillna("")
+        if len(materials_list) > 0:
+            vec.fit(materials_list)
+        else:
+            raise ValueError("No materials data found to train vectorizer")
+
+        # Build the query index once so searches never re-vectorize rows
+        index = SupplierIndex(df, vec, CERT_PRIORITY)
+        logger.debug("Built supplier index over %d rows", len(df))
+
+        # Cached results are tagged with this version, so a reloaded
+        # catalog never serves results computed against the old data
+        self._init_catalog(df, vec, index, _frame_version(df), cache)
+
+    @classmethod
+    def from_catalog(cls, df, vec, index, catalog_version, cache: ResultCache = None):
+        """Build a matcher from prebuilt parts (see ``catalog.py``) without a refit"""
+        matcher = cls.__new__(cls)
+        matcher._init_catalog(df, vec, index, catalog_version, cache)
+        return matcher
+
+    def _init_catalog(self, df, vec, index, catalog_version, cache):
+        self.df = df
+        self.vec = vec
+        self.index = index
+        self.catalog_version = catalog_version
+        self.cache = cache if cache is not None else ResultCache()
+
+    def apply_delta(self, upserts=(), removals=()):
+        """
+        Return a new matcher with suppliers added or replaced (matched by
+        Manufacturer_Name) and removed; this matcher is left untouched.
 
-        except Exception as e:
-            print(f"Error initializing ManufacturerMatcher: {e}")
-            raise
+        Unchanged suppliers keep their TF-IDF rows and only the upserted rows
+        are transformed with the existing vocabulary. The vectorizer is refit
+        only if upserted materials use terms it has never seen. Returns
+        ``(matcher, refit)``.
+        """
+        upserts = _clean(pd.DataFrame(list(upserts), columns=self.df.columns))
+        if upserts["Manufacturer_Name"].isna().any():
+            raise ValueError("Every supplier needs a Manufacturer_Name")
+        if upserts["Manufacturer_Name"].duplicated().any():
+            raise ValueError("Duplicate Manufacturer_Name in upserts")
+        for column, dtype in self.df.dtypes.items():
+            if dtype.kind in "biuf":
+                upserts[column] = pd.to_numeric(upserts[column], errors="raise")
+                if dtype.kind in "iu" and not upserts[column].isna().any():
+                    upserts[column] = upserts[column].astype(dtype)
+
+        changed = set(upserts["Manufacturer_Name"]) | set(removals)
+        kept = np.flatnonzero(~self.df["Manufacturer_Name"].isin(changed).to_numpy())
+        df = pd.concat([self.df.iloc[kept], upserts], ignore_index=True)
+
+        analyzer = self.vec.build_analyzer()
+        unseen = any(
+            term not in self.vec.vocabulary_
+            for text in upserts["Supported_Materials"].fillna("")
+            for term in analyzer(text)
+        )
+        if unseen:
+            matcher = self.__class__.__new__(self.__class__)
+            matcher._init_frame(df, self.cache)
+            return matcher, True
+
+        index = self.index.updated(df, kept, self.vec)
+        matcher = self.from_catalog(
+            df, self.vec, index, _frame_version(df), cache=self.cache
+        )
+        return matcher, False
 
     def find_top_suppliers(
-        self, material: str, region: str = None, min_capacity: int = 0, top_n: int = 3
+        self,
+        material: str,
+        region: str = None,
+        min_capacity: int = 0,
+        top_n: int = 3,
+        near=None,
+        radius_km: float = None,
+        distance_weight: float = 0.0,
+        certifications=(),
+        cert_weights=None,
+        profile: str = None,
+        weights=None,
+        materials=None,
     ):
         """
-        Find top suppliers for a given material with optional filters
-        """
-        try:
-            print(f"Searching for material: '{material}'")
-            print(f"Region filter: {region}")
-            print(f"Min capacity: {min_capacity}")
+        Find top suppliers for a given material with optional filters.
 
-            # Start with full dataframe
-            df = self.df.copy()
-            print(f"Starting with {len(df)} manufacturers")
+        ``near`` is a (lat, lon) point. With ``radius_km`` it restricts the
+        search to suppliers within that distance, and ``distance_weight``
+        (0 to 1) blends a proximity score into the final score.
 
-            # Apply capacity filter
-            df = df[df["Max_Weekly_Capacity"] >= min_capacity]
-            print(f"After capacity filter: {len(df)} manufacturers")
+        Only suppliers holding every name in ``certifications`` are returned.
+        ``cert_weights`` ({name: weight}) replaces the equal weighting of the
+        priority certifications in the certification score.
 
-            # Apply material filter
-            material_mask = df["Supported_Materials"].str.contains(
-                material, case=False, na=False
+        Scores combine the components weighted by the ``profile`` preset (see
+        ``scoring.PROFILES``) with ``weights`` ({component: weight})
+        overriding it. The footprint component needs ``materials``, a
+        ``MaterialsRepository``.
+        """
+        material, region, min_capacity = self._normalize_query(
+            (material, region, min_capacity)
+        )
+        if near is not None:
+            near = (float(near[0]), float(near[1]))
+        certifications = tuple(
+            sorted({c.strip().lower() for c in certifications if c.strip()})
+        )
+        cert_weights = self._normalize_cert_weights(cert_weights)
+        weights = resolve_weights(profile, weights)
+        distance_weight = float(distance_weight or 0.0)
+        if not 0 <= distance_weight <= 1:
+            raise ValueError("distance_weight must be between 0 and 1")
+        if near is not None:
+            # Distances are reported whenever a location is given
+            weights.setdefault("distance", 0.0)
+            if distance_weight:
+                # The profile's own score (distance included) keeps
+                # 1 - distance_weight of the total and proximity gets the rest
+                weights = {
+                    name: weight * (1 - distance_weight)
+                    for name, weight in normalize_weights(weights).items()
+                }
+                weights["distance"] += distance_weight
+        key = self._cache_key(
+            material,
+            region,
+            min_capacity,
+            top_n,
+            near,
+            radius_km,
+            certifications,
+            tuple(sorted(cert_weights.items())),
+            self._scoring_key(weights, materials),
+        )
+        cached = self.cache.get(key, self.catalog_version)
+        if cached is not MISS:
+            return [dict(record) for record in cached]
+
+        try:
+            trace(
+                logger,
+                "Searching for %r (region=%s, min_capacity=%d)",
+                material,
+                region,
+                min_capacity,
             )
-            df = df[material_mask]
-            print(f"After material filter: {len(df)} manufacturers")
 
-            # Apply region filter if specified
-            if region:
-                region_mask = df["City"].str.contains(region, case=False, na=False)
-                df = df[region_mask]
-                print(f"After region filter: {len(df)} manufacturers")
+            # Resolve candidates from the precomputed index
+            cert_mask = self.index.cert_mask(certifications)
+            if cert_mask is None:
+                # Nobody holds one of the required certifications
+                rows = np.empty(0, dtype=np.int64)
+            else:
+                rows = self.index.candidates(
+                    material,
+                    region,
+                    min_capacity,
+                    near=near,
+                    radius_km=radius_km,
+                    cert_mask=cert_mask,
+                )
+            trace(logger, "After filters: %d manufacturers", len(rows))
 
-            if df.empty:
-                print("No manufacturers found matching criteria")
+            if len(rows) == 0:
+                self.cache.put(key, [], self.catalog_version)
                 return []
 
             # Calculate similarity scores
-            print("Calculating similarity scores...")
             material_vec = self.vec.transform([material])
-            cand_vecs = self.vec.transform(df["Supported_Materials"].fillna(""))
-            df["sim_score"] = cosine_similarity(material_vec, cand_vecs)[0]
-
-            # Calculate certification scores
-            print("Calculating certification scores...")
-            cert_priority = ["GOTS", "OEKO-TEX", "Fair Trade", "GRS", "FSC"]
-
-            def calc_cert_score(cert_string):
-                if pd.isna(cert_string):
-                    return 0
-                certs = str(cert_string).split(", ")
-                return sum(1 for cert in cert_priority if cert in certs)
-
-            df["cert_score"] = df["Certifications"].apply(calc_cert_score)
-
-            # Calculate capacity scores (normalized)
-            print("Calculating capacity scores...")
-            max_cap = df["Max_Weekly_Capacity"].max()
-            if max_cap > 0:
-                df["cap_score"] = df["Max_Weekly_Capacity"] / max_cap
-            else:
-                df["cap_score"] = 0
-
-            # Calculate composite weighted score
-            print("Calculating final scores...")
-            weights = {"sim": 0.5, "cert": 0.3, "cap": 0.2}
-            df["final_score"] = (
-                df["sim_score"] * weights["sim"]
-                + (df["cert_score"] / len(cert_priority)) * weights["cert"]
-                + df["cap_score"] * weights["cap"]
+            sim = self.index.similarity(material_vec, rows)
+
+            candidates = Candidates(
+                self.index,
+                rows,
+                sim,
+                material=material,
+                near=near,
+                cert_weights=cert_weights,
+                materials=materials,
             )
+            results = self._rank(candidates, weights, top_n)
+            trace(logger, "Returning %d top suppliers", len(results))
 
-            # Sort and return top results
-            result_df = df.sort_values("final_score", ascending=False).head(top_n)
-            results = result_df.to_dict(orient="records")
+            self.cache.put(
+                key, [dict(record) for record in results], self.catalog_version
+            )
+            return results
+
+        except Exception:
+            logger.exception("Error in find_top_suppliers")
+            return []
 
-            print(f"Returning {len(results)} top suppliers")
+    def find_top_suppliers_many(
+        self, queries, top_n: int = 3, profile=None, weights=None, materials=None
+    ):
+        """
+        Find top suppliers for many (material, region, min_capacity) queries at once.
+
+        Queries may be dicts with those keys or tuples in that order. All query
+        materials are vectorized in one call and scored against the catalog with
+        a single sparse matrix product. Results are returned in query order.
+        ``profile``, ``weights`` and ``materials`` apply to every query, as in
+        ``find_top_suppliers``.
+        """
+        weights = resolve_weights(profile, weights)
+        scoring_key = self._scoring_key(weights, materials)
+        try:
+            queries = [self._normalize_query(q) for q in queries]
+            keys = [self._cache_key(*q, top_n, scoring_key) for q in queries]
+            results = [self.cache.get(key, self.catalog_version) for key in keys]
+
+            # Only the queries that missed the cache are scored
+            pending = [i for i, result in enumerate(results) if result is MISS]
+            for i in range(len(results)):
+                if results[i] is not MISS:
+                    results[i] = [dict(record) for record in results[i]]
+            if not pending:
+                return results
+
+            trace(logger, "Batch searching %d queries", len(pending))
+            query_vecs = self.vec.transform([queries[i][0] for i in pending])
+            sims = (query_vecs @ self.index.tfidf.T).tocsr()
+
+            for j, i in enumerate(pending):
+                material, region, min_capacity = queries[i]
+                rows = self.index.candidates(material, region, min_capacity)
+                if len(rows) == 0:
+                    results[i] = []
+                else:
+                    sim = sims[j, rows].toarray().ravel()
+                    candidates = Candidates(
+                        self.index,
+                        rows,
+                        sim,
+                        material=material,
+                        cert_weights=DEFAULT_CERT_WEIGHTS,
+                        materials=materials,
+                    )
+                    results[i] = self._rank(candidates, weights, top_n)
+                self.cache.put(
+                    keys[i],
+                    [dict(record) for record in results[i]],
+                    self.catalog_version,
+                )
 
             return results
 
-        except Exception as e:
-            print(f"Error in find_top_suppliers: {e}")
-            import traceback
+        except Exception:
+            logger.exception("Error in find_top_suppliers_many")
+            return [[] for _ in queries]
+
+    @staticmethod
+    def _normalize_query(query):
+        """Coerce a batch query into a (material, region, min_capacity) tuple"""
+        if isinstance(query, dict):
+            material = query["material"]
+            region = query.get("region")
+            min_capacity = query.get("min_capacity", 0)
+        else:
+            material, region, min_capacity = (tuple(query) + (None, 0))[:3]
+        region = str(region).strip() if region else None
+        return str(material).strip(), region or None, int(min_capacity or 0)
+
+    def find_nearest_suppliers(
+        self,
+        lat: float,
+        lon: float,
+        k: int = 5,
+        material: str = None,
+        min_capacity: int = 0,
+    ):
+        """
+        Find the k suppliers closest to (lat, lon), optionally filtered by
+        material and capacity, ordered by distance
+        """
+        try:
+            if material:
+                material, _, min_capacity = self._normalize_query(
+                    (material, None, min_capacity)
+                )
+                rows = self.index.candidates(material, None, min_capacity)
+                dist = self.index.geo.distances(lat, lon, rows)
+                keep = np.isfinite(dist)
+                rows, dist = rows[keep], dist[keep]
+                top = top_k_indices(-dist, k)
+                rows, dist = rows[top], dist[top]
+            else:
+                # Widen the tree query until the capacity filter leaves k rows
+                fetch = k
+                while True:
+                    rows, dist = self.index.geo.nearest(lat, lon, fetch)
+                    keep = self.index.capacity[rows] >= min_capacity
+                    if keep.sum() >= k or fetch >= len(self.index.geo.rows):
+                        break
+                    fetch *= 2
+                rows, dist = rows[keep][:k], dist[keep][:k]
+
+            results = self.df.iloc[rows].to_dict(orient="records")
+            for record, d in zip(results, dist):
+                record["distance_km"] = float(d)
+            return results
 
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error in find_nearest_suppliers")
             return []
 
+    @staticmethod
+    def _normalize_cert_weights(cert_weights):
+        """Validate a {certification: weight} mapping, keyed case-insensitively"""
+        if cert_weights is None:
+            return DEFAULT_CERT_WEIGHTS
+        normalized = {}
+        for name, weight in dict(cert_weights).items():
+            weight = float(weight)
+            if not (math.isfinite(weight) and weight >= 0):
+                raise ValueError(
+                    f"Certification weight for {name!r} must be a finite number >= 0"
+                )
+            normalized[str(name).strip().lower()] = weight
+        # Scores are sums of weights, so the sum must be finite too
+        if not math.isfinite(sum(normalized.values())):
+            raise ValueError("Certification weights are too large")
+        return normalized
+
+    @staticmethod
+    def _scoring_key(weights, materials):
+        """Cache key part for the resolved weights and the footprint data used"""
+        key = tuple(sorted(weights.items()))
+        if materials is not None and weights.get("footprint", 0) > 0:
+            key += (materials.version,)
+        return key
+
+    @staticmethod
+    def _cache_key(material, region, min_capacity, top_n, *extra):
+        """Case-insensitive cache key; filters and TF-IDF both ignore case"""
+        return (
+            material.lower(),
+            region.lower() if region else None,
+            int(min_capacity),
+            int(top_n),
+        ) + tuple(extra)
+
+    def _rank(self, candidates, weights, top_n):
+        """
+        Score candidate rows and materialize records for the top_n winners only
+        """
+        final, fields = scoring.score(candidates, weights)
+        top = top_k_indices(final, top_n)
+        results = self.df.iloc[candidates.rows[top]].to_dict(orient="records")
+        for record, i in zip(results, top):
+            for field, values in fields.items():
+                value = float(values[i])
+                record[field] = value if math.isfinite(value) else None
+            record["final_score"] = float(final[i])
+        return results
+
 
 def test_matcher():
     """Test function"""
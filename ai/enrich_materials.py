@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Offline enrichment of materials with live CO2e emission factors.
+
+Fetches a per-kg CO2e factor for every material from the Climatiq estimate
+API on a bounded thread pool, retrying transient failures with exponential
+backoff. Every result is appended to a JSON Lines checkpoint as soon as it
+arrives, so a rerun only fetches materials that failed or went stale. A
+failed refresh keeps the last good value and only sets
+``co2e_fetch_error``. Materials that never had a live value keep an empty
+``live_co2e_kg``; readers fall back to ``CO2_kg_per_kg``.
+
+Usage:
+    python enrich_materials.py --input materials.csv --output materials_enriched.csv
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from retry_after import parse_retry_after
+
+DEFAULT_BASE_URL = "https://api.climatiq.io"
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    def __init__(self, message, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def activity_id(material: str, overrides: dict = None):
+    """Climatiq activity ID for a material, e.g. ``textiles-type_organic_cotton``."""
+    if overrides and material in overrides:
+        return overrides[material]
+    slug = re.sub(r"[^a-z0-9]+", "_", material.lower()).strip("_")
+    return f"textiles-type_{slug}"
+
+
+class ClimatiqFetcher:
+    """Fetches kg CO2e per kg of material over a pooled keep-alive session."""
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = DEFAULT_BASE_URL,
+        activity_ids: dict = None,
+        timeout: float = 10.0,
+        pool_size: int = 8,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.activity_ids = activity_ids or {}
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def __call__(self, material: str) -> float:
+        body = {
+            "emission_factor": {
+                "activity_id": activity_id(material, self.activity_ids),
+                "data_version": "^6",
+            },
+            "parameters": {"weight": 1, "weight_unit": "kg"},
+        }
+        try:
+            response = self.session.post(
+                f"{self.base_url}/data/v1/estimate", json=body, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            raise FetchError(f"request failed: {e}", retryable=True)
+
+        if response.status_code != 200:
+            raise FetchError(
+                f"HTTP {response.status_code}",
+                retryable=response.status_code in RETRY_STATUSES,
+                retry_after=parse_retry_after(response.headers.get("Retry-After")),
+            )
+        try:
+            return float(response.json()["co2e"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise FetchError(f"unexpected response: {e}")
+
+
+def fetch_with_retry(fetch, material, retries=3, backoff=0.5, max_backoff=30.0):
+    """
+    Call ``fetch(material)``, retrying retryable errors with jittered backoff.
+    A server-sent Retry-After is honoured up to ``max_backoff``.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return fetch(material)
+        except FetchError as e:
+            if not e.retryable or attempt == retries:
+                raise
+            if e.retry_after is not None:
+                delay = min(max_backoff, e.retry_after)
+            else:
+                delay = min(max_backoff, backoff * 2**attempt)
+            time.sleep(min(max_backoff, delay * random.uniform(0.8, 1.2)))
+
+
+class Checkpoint:
+    """Append-only JSON Lines log of fetch results; the last entry wins."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # a torn final line from an interrupted run
+                    self.entries[entry["material"]] = entry
+
+    def is_fresh(self, material: str, max_age: float, now: float):
+        entry = self.entries.get(material)
+        return (
+            entry is not None
+            and entry.get("co2e_kg") is not None
+            and not entry.get("error")
+            and now - entry["fetched_at"] < max_age
+        )
+
+    def record(self, material: str, co2e_kg=None, error=None):
+        """
+        Append a result. Failures carry the last good ``co2e_kg`` forward;
+        they are never fresh, so the next run retries them.
+        """
+        entry = {
+            "material": material,
+            "co2e_kg": co2e_kg,
+            "error": error,
+            "fetched_at": time.time(),
+        }
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            self.entries[material] = entry
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+        return entry
+
+
+def enrich(
+    rows,
+    fetch,
+    checkpoint: Checkpoint,
+    concurrency: int = 4,
+    max_age: float = 7 * 24 * 60 * 60,
+    retries: int = 3,
+    backoff: float = 0.5,
+):
+    """
+    Refresh stale or failed materials concurrently and return the rows with
+    ``live_co2e_kg`` and ``co2e_fetch_error`` filled from the checkpoint.
+    A failed fetch keeps the previous value, from the checkpoint or else the
+    input row.
+    """
+    now = time.time()
+    previous = {}
+    for row in rows:
+        value = checkpoint.entries.get(row["Material"], {}).get("co2e_kg")
+        if value is None:
+            try:
+                value = float(row.get("live_co2e_kg") or "")
+            except ValueError:
+                value = None
+        previous.setdefault(row["Material"], value)
+
+    pending = [
+        row["Material"]
+        for row in rows
+        if not checkpoint.is_fresh(row["Material"], max_age, now)
+    ]
+    print(f"Fetching {len(pending)} of {len(rows)} materials")
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {
+            pool.submit(fetch_with_retry, fetch, m, retries, backoff): m
+            for m in dict.fromkeys(pending)
+        }
+        for future in as_completed(futures):
+            material = futures[future]
+            try:
+                checkpoint.record(material, co2e_kg=future.result())
+            except Exception as e:
+                checkpoint.record(
+                    material,
+                    co2e_kg=previous.get(material),
+                    error=f"API failed for {material}: {e}",
+                )
+
+    enriched = []
+    for row in rows:
+        entry = checkpoint.entries.get(row["Material"], {})
+        value = entry.get("co2e_kg")
+        enriched.append(
+            {
+                **row,
+                "live_co2e_kg": "" if value is None else value,
+                "co2e_fetch_error": entry.get("error") or "",
+            }
+        )
+    return enriched
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def write_rows(path, rows):
+    """Write the enriched CSV atomically so readers never see a partial file."""
+    fieldnames = list(rows[0].keys()) if rows else []
+    for column in ("live_co2e_kg", "co2e_fetch_error"):
+        if column not in fieldnames:
+            fieldnames.append(column)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp, path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--input", default="materials.csv")
+    parser.add_argument("--output", default="materials_enriched.csv")
+    parser.add_argument("--checkpoint", default="materials_enrichment.jsonl")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--max-age-days", type=float, default=7.0)
+    parser.add_argument(
+        "--activity-ids", help="JSON file mapping material names to activity IDs"
+    )
+    parser.add_argument(
+        "--base-url", default=os.getenv("CLIMATIQ_BASE_URL", DEFAULT_BASE_URL)
+    )
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    overrides = {}
+    if args.activity_ids:
+        with open(args.activity_ids, encoding="utf-8") as f:
+            overrides = json.load(f)
+
+    fetch = ClimatiqFetcher(
+        os.getenv("CLIMATIQ_API_KEY", ""),
+        base_url=args.base_url,
+        activity_ids=overrides,
+        pool_size=args.concurrency,
+    )
+    rows = enrich(
+        read_rows(args.input),
+        fetch,
+        Checkpoint(args.checkpoint),
+        concurrency=args.concurrency,
+        max_age=args.max_age_days * 24 * 60 * 60,
+        retries=args.retries,
+    )
+    write_rows(args.output, rows)
+    failed = sum(1 for row in rows if row["co2e_fetch_error"])
+    print(
+        f"✓ Wrote {len(rows)} materials to {args.output} ({failed} without live data)"
+    )
+
+
+if __name__ == "__main__":
+    main()
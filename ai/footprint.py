@@ -0,0 +1,158 @@
+"""
+Vectorized footprint scoring for whole bills of materials.
+
+Input lines are ``(product_id, material, quantity)`` and are consumed in
+fixed-size chunks, so memory stays flat no matter how large the upload is.
+Each chunk is scored with NumPy gathers against the materials repository, and
+per-product and catalog totals are accumulated in the same pass.
+"""
+
+import csv
+import io
+import json
+import math
+
+import numpy as np
+
+REQUIRED_FIELDS = ("product_id", "material", "quantity")
+
+
+class InvalidLine(ValueError):
+    """Raised for an input line that cannot be parsed."""
+
+
+def _finite(value):
+    return value if math.isfinite(value) else None
+
+
+def _quantity(value):
+    """``value`` as a quantity in kg; raises ValueError unless finite and >= 0."""
+    quantity = float(value)
+    if not (math.isfinite(quantity) and quantity >= 0):
+        raise ValueError(f"quantity must be a finite number >= 0, got {value!r}")
+    return quantity
+
+
+def parse_jsonl(stream):
+    """Yield (product_id, material, quantity) from a binary JSON Lines stream."""
+    for number, raw in enumerate(stream, 1):
+        raw = raw.strip()
+        if not raw:
+            continue
+        try:
+            item = json.loads(raw)
+            yield str(item["product_id"]), str(item["material"]), _quantity(
+                item["quantity"]
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            raise InvalidLine(f"line {number}: {e}")
+
+
+def parse_csv(stream):
+    """Yield (product_id, material, quantity) from a binary CSV stream."""
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8", newline=""))
+    missing = set(REQUIRED_FIELDS) - set(reader.fieldnames or ())
+    if missing:
+        raise InvalidLine(f"missing CSV columns: {', '.join(sorted(missing))}")
+    for number, row in enumerate(reader, 2):
+        try:
+            yield row["product_id"], row["material"], _quantity(row["quantity"])
+        except (ValueError, TypeError) as e:
+            raise InvalidLine(f"line {number}: {e}")
+
+
+class FootprintTotals:
+    """Running per-product and catalog totals."""
+
+    def __init__(self):
+        self.product_ids = {}
+        self.co2 = np.zeros(0)
+        self.water = np.zeros(0)
+        self.lines = np.zeros(0, dtype=np.int64)
+        self.unknown = np.zeros(0, dtype=np.int64)
+        self.unknown_materials = set()
+
+    def _product_rows(self, product_ids):
+        rows = np.array(
+            [
+                self.product_ids.setdefault(p, len(self.product_ids))
+                for p in product_ids
+            ],
+            dtype=np.int64,
+        )
+        # Grow geometrically so many small chunks do not copy on every add
+        needed = len(self.product_ids)
+        if needed > len(self.co2):
+            capacity = max(needed, 2 * len(self.co2), 64)
+            for name in ("co2", "water", "lines", "unknown"):
+                old = getattr(self, name)
+                grown = np.zeros(capacity, dtype=old.dtype)
+                grown[: len(old)] = old
+                setattr(self, name, grown)
+        return rows
+
+    def add(self, product_ids, co2, water, found, materials):
+        rows = self._product_rows(product_ids)
+        size = len(self.co2)
+        # Unknown materials count as lines but contribute nothing to the totals
+        self.co2 += np.bincount(rows, weights=np.where(found, co2, 0.0), minlength=size)
+        self.water += np.bincount(
+            rows, weights=np.where(found, water, 0.0), minlength=size
+        )
+        self.lines += np.bincount(rows, minlength=size)
+        self.unknown += np.bincount(rows[~found], minlength=size)
+        self.unknown_materials.update(m for m, f in zip(materials, found) if not f)
+
+    def products(self):
+        for product_id, i in self.product_ids.items():
+            yield {
+                "product_id": product_id,
+                "co2_kg": round(float(self.co2[i]), 3),
+                "water_l": round(float(self.water[i]), 1),
+                "lines": int(self.lines[i]),
+                "unknown_lines": int(self.unknown[i]),
+            }
+
+    def catalog(self):
+        return {
+            "products": len(self.product_ids),
+            "lines": int(self.lines.sum()),
+            "unknown_lines": int(self.unknown.sum()),
+            "unknown_materials": sorted(self.unknown_materials),
+            "co2_kg": round(float(self.co2.sum()), 3),
+            "water_l": round(float(self.water.sum()), 1),
+        }
+
+
+class FootprintEngine:
+    def __init__(self, repository, chunk_size: int = 10000):
+        self.repository = repository
+        self.chunk_size = chunk_size
+
+    def score(self, lines, totals: FootprintTotals):
+        """
+        Score an iterable of (product_id, material, quantity) lines chunk by
+        chunk, yielding one result dict per line and updating ``totals``.
+        """
+        chunk = []
+        for line in lines:
+            chunk.append(line)
+            if len(chunk) >= self.chunk_size:
+                yield from self._score(chunk, totals)
+                chunk = []
+        if chunk:
+            yield from self._score(chunk, totals)
+
+    def _score(self, chunk, totals):
+        product_ids, materials, quantities = zip(*chunk)
+        co2, water, found = self.repository.footprint_many(materials, quantities)
+        totals.add(product_ids, co2, water, found, materials)
+        for i in range(len(chunk)):
+            yield {
+                "product_id": product_ids[i],
+                "material": materials[i],
+                "quantity": quantities[i],
+                "co2_kg": _finite(round(float(co2[i]), 3)),
+                "water_l": _finite(round(float(water[i]), 1)),
+                "found": bool(found[i]),
+            }
@@ -0,0 +1,60 @@
+"""
+Haversine spatial index over supplier coordinates.
+"""
+
+import numpy as np
+from sklearn.neighbors import BallTree
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Great-circle distance in km from one point to arrays of points."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lats - lat) / 2) ** 2
+        + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GeoIndex:
+    """
+    Ball tree on haversine distance for radius and k-nearest lookups.
+
+    Rows without valid coordinates are left out of the tree and never match
+    a spatial query; ``distances`` reports them as infinitely far away.
+    """
+
+    def __init__(self, latitudes, longitudes):
+        self.lat = np.asarray(latitudes, dtype=np.float64)
+        self.lon = np.asarray(longitudes, dtype=np.float64)
+
+        valid = np.isfinite(self.lat) & np.isfinite(self.lon)
+        self.rows = np.flatnonzero(valid)
+        self.tree = None
+        if len(self.rows):
+            coords = np.radians(np.column_stack([self.lat[valid], self.lon[valid]]))
+            self.tree = BallTree(coords, metric="haversine")
+
+    def within_radius(self, lat: float, lon: float, radius_km: float):
+        """Sorted row indices within ``radius_km`` of the point."""
+        if self.tree is None:
+            return np.empty(0, dtype=np.int64)
+        point = np.radians([[lat, lon]])
+        found = self.tree.query_radius(point, r=radius_km / EARTH_RADIUS_KM)[0]
+        return np.sort(self.rows[found])
+
+    def nearest(self, lat: float, lon: float, k: int):
+        """Row indices and distances in km of the k nearest rows, closest first."""
+        k = min(k, len(self.rows))
+        if self.tree is None or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        dist, found = self.tree.query(np.radians([[lat, lon]]), k=k)
+        return self.rows[found[0]], dist[0] * EARTH_RADIUS_KM
+
+    def distances(self, lat: float, lon: float, rows):
+        """Distances in km from the point to the given rows."""
+        dist = haversine_km(lat, lon, self.lat[rows], self.lon[rows])
+        return np.where(np.isfinite(dist), dist, np.inf)
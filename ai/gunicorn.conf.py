@@ -0,0 +1,34 @@
+"""
+Gunicorn settings.
+
+The app is imported once in the master and workers are forked from it, so
+the manufacturer catalog, TF-IDF matrix and materials tables are built once
+and shared copy-on-write instead of being rebuilt by every worker. The app
+defers heavy work to first use, so the master warms it before forking.
+Importing or warming ``app`` must not start threads or open network
+connections; pools and connections are created lazily in each worker.
+"""
+
+import gc
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", 4))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+preload_app = True
+
+# Any worker may be asked about a design job, so job states are shared
+# through SQLite rather than kept in the process that accepted the job
+os.environ.setdefault("DESIGN_JOB_BACKEND", "sqlite")
+
+
+def when_ready(server):
+    import app
+
+    app.warm()
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far out of the collector's reach, so GC
+    # passes in the workers do not write to (and so copy) the shared pages
+    gc.freeze()
@@ -0,0 +1,349 @@
+"""
+Image generation backends.
+
+``create_image_backend()`` builds the backend selected by ``IMAGE_BACKEND``:
+
+- ``hf``: the Hugging Face Inference API via ``InferenceClient``
+- ``http``: any endpoint speaking the same wire format (POST
+  ``{"inputs": prompt, "parameters": {...}}``, image bytes back), e.g. a
+  self-hosted diffusers server
+- ``local``: a deterministic renderer for tests and offline mode
+
+Remote backends are wrapped in ``ResilientBackend``, which bounds concurrent
+calls, retries transient errors with jittered exponential backoff and trips a
+circuit breaker after repeated failures, so callers fail fast to a placeholder
+while the upstream is degraded instead of tying up workers.
+"""
+
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+
+from PIL import Image, ImageDraw, ImageFont
+
+from lazy import Lazy
+from retry_after import parse_retry_after
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class BackendError(Exception):
+    def __init__(self, message, retryable=False, retry_after=None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class BackendUnavailable(BackendError):
+    """Raised without calling the upstream: circuit open or no free slot."""
+
+
+def _http_error(e):
+    """A ``BackendError`` for a failed ``requests`` call."""
+    response = getattr(e, "response", None)
+    if response is None:
+        # Connection errors and timeouts
+        return BackendError(f"request failed: {e}", retryable=True)
+    return BackendError(
+        f"HTTP {response.status_code}",
+        retryable=response.status_code in RETRY_STATUSES,
+        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+    )
+
+
+class HuggingFaceBackend:
+    """Text-to-image through the Hugging Face Inference API."""
+
+    def __init__(self, model: str, token: str = None, timeout: float = 60.0):
+        self.model = model
+        self.token = token
+        # Without a timeout InferenceClient waits indefinitely for a model
+        # that is loading (HTTP 503)
+        self.timeout = timeout
+        self._client = Lazy(self._create_client)
+
+    def _create_client(self):
+        if not self.token:
+            raise BackendError("Set your Hugging Face token in HF_TOKEN env variable")
+        from huggingface_hub import InferenceClient
+
+        # Requests go through huggingface_hub's shared keep-alive session
+        return InferenceClient(model=self.model, token=self.token, timeout=self.timeout)
+
+    def generate(self, prompt: str, **params) -> Image.Image:
+        import requests
+
+        client = self._client.get()
+        try:
+            return client.text_to_image(prompt, **params)
+        except requests.RequestException as e:
+            raise _http_error(e)
+
+
+class HTTPBackend:
+    """Text-to-image from an HTTP endpoint over a pooled keep-alive session."""
+
+    def __init__(
+        self, url: str, token: str = None, timeout: float = 60.0, pool_size: int = 4
+    ):
+        import requests
+
+        self.url = url
+        self.model = url
+        self.timeout = timeout
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Accept"] = "image/png"
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    def generate(self, prompt: str, **params) -> Image.Image:
+        import requests
+
+        body = {
+            "inputs": prompt,
+            "parameters": {k: v for k, v in params.items() if v is not None},
+        }
+        try:
+            response = self.session.post(self.url, json=body, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            raise _http_error(e)
+        try:
+            image = Image.open(io.BytesIO(response.content))
+            image.load()
+        except OSError as e:
+            raise BackendError(f"unexpected response: {e}")
+        return image
+
+
+class LocalBackend:
+    """
+    Renders a simple abstract design seeded by the prompt and parameters, so
+    the same request always produces the same image. Never touches the network.
+    """
+
+    model = "local"
+
+    def generate(
+        self, prompt: str, width: int = 1024, height: int = 1024, **params
+    ) -> Image.Image:
+        seed = hashlib.sha256(
+            repr((prompt, width, height, sorted(params.items()))).encode("utf-8")
+        ).digest()
+        rng = random.Random(seed)
+
+        def color():
+            return tuple(rng.randrange(256) for _ in range(3))
+
+        image = Image.new("RGB", (width, height), color=color())
+        draw = ImageDraw.Draw(image)
+        for _ in range(6):
+            x, y = rng.randrange(width), rng.randrange(height)
+            r = rng.randrange(max(width, height) // 16, max(width, height) // 4)
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=color())
+        draw.text(
+            (width // 20, height - height // 10),
+            prompt[:60],
+            fill="white",
+            font=ImageFont.load_default(),
+        )
+        return image
+
+
+class CircuitBreaker:
+    """
+    Closed: calls pass. After ``failure_threshold`` consecutive failures it
+    opens and rejects calls for ``reset_timeout`` seconds, then lets a single
+    trial call through (half-open); its outcome closes or reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=None
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock or time.monotonic
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if (
+                self._state == self.OPEN
+                and self._clock() - self._opened_at >= self.reset_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self):
+        """True if a call may go ahead now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial = False
+            # Half-open: one trial call at a time
+            if self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial = False
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class ResilientBackend:
+    """
+    Wraps a backend with bounded concurrency, retries and a circuit breaker.
+
+    At most ``max_concurrency`` calls run at once; a caller that cannot get a
+    slot within ``acquire_timeout`` seconds gets ``BackendUnavailable``.
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_concurrency: int = 4,
+        acquire_timeout: float = 5.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        max_backoff: float = 8.0,
+        breaker: CircuitBreaker = None,
+    ):
+        self.backend = backend
+        self.model = backend.model
+        self.max_concurrency = max_concurrency
+        self.acquire_timeout = acquire_timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+
+    def generate(self, prompt: str, **params) -> Image.Image:
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise BackendUnavailable("all image generation slots are busy")
+        with self._lock:
+            self.in_flight += 1
+        try:
+            return self._generate(prompt, params)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._slots.release()
+
+    def _generate(self, prompt, params):
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                raise BackendUnavailable("image backend circuit is open")
+            try:
+                image = self.backend.generate(prompt, **params)
+            except BackendError as e:
+                if not e.retryable:
+                    # The upstream answered; the request itself was bad
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt == self.retries:
+                    raise
+                delay = e.retry_after or self.backoff * 2**attempt
+                time.sleep(min(delay, self.max_backoff) * random.uniform(0.8, 1.2))
+            except Exception:
+                self.breaker.record_failure()
+                raise
+            else:
+                self.breaker.record_success()
+                return image
+
+    def status(self):
+        return {
+            "model": self.model,
+            "circuit": self.breaker.state,
+            "in_flight": self.in_flight,
+            "max_concurrency": self.max_concurrency,
+        }
+
+
+def image_backend_model(model: str):
+    """
+    The ``model`` attribute of the backend ``create_image_backend(model)``
+    would build, read from the environment without building it (or failing
+    on a misconfigured one).
+    """
+    backend = os.getenv("IMAGE_BACKEND", "hf")
+    if backend == "hf":
+        return model
+    if backend == "http":
+        return os.getenv("IMAGE_BACKEND_URL")
+    return backend
+
+
+def create_image_backend(model: str):
+    """
+    Build the backend selected by ``IMAGE_BACKEND`` (hf|http|local); ``model``
+    is the Hugging Face model used by the ``hf`` backend.
+    """
+    backend = os.getenv("IMAGE_BACKEND", "hf")
+    timeout = float(os.getenv("IMAGE_TIMEOUT", 60))
+    concurrency = int(os.getenv("IMAGE_CONCURRENCY", 4))
+    if backend == "local":
+        return LocalBackend()
+    if backend == "hf":
+        upstream = HuggingFaceBackend(model, os.getenv("HF_TOKEN"), timeout=timeout)
+    elif backend == "http":
+        url = os.getenv("IMAGE_BACKEND_URL")
+        if not url:
+            raise ValueError("Set IMAGE_BACKEND_URL for the http image backend")
+        upstream = HTTPBackend(
+            url,
+            os.getenv("IMAGE_BACKEND_TOKEN"),
+            timeout=timeout,
+            pool_size=concurrency,
+        )
+    else:
+        raise ValueError(f"Unknown image backend: {backend}")
+    return ResilientBackend(
+        upstream,
+        max_concurrency=concurrency,
+        acquire_timeout=float(os.getenv("IMAGE_ACQUIRE_TIMEOUT", 5)),
+        retries=int(os.getenv("IMAGE_RETRIES", 2)),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("IMAGE_BREAKER_THRESHOLD", 5)),
+            reset_timeout=float(os.getenv("IMAGE_BREAKER_RESET", 30)),
+        ),
+    )
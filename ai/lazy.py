@@ -0,0 +1,39 @@
+"""
+Deferred construction of heavy clients.
+
+``Lazy(factory)`` runs ``factory`` once, on first use, and then stands in for
+its result: attribute access is forwarded and truthiness is the result's.
+``warm()`` builds it ahead of time, e.g. in the gunicorn master before fork.
+"""
+
+import threading
+
+_UNSET = object()
+
+
+class Lazy:
+    def __init__(self, factory):
+        self._factory = factory
+        self._value = _UNSET
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._value is not _UNSET
+
+    def get(self):
+        """The built object, constructing it on the first call."""
+        if self._value is _UNSET:
+            with self._lock:
+                if self._value is _UNSET:
+                    self._value = self._factory()
+        return self._value
+
+    warm = get
+
+    def __getattr__(self, name):
+        # Only reached for names not set on the wrapper itself
+        return getattr(self.get(), name)
+
+    def __bool__(self):
+        return bool(self.get())
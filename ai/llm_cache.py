@@ -0,0 +1,172 @@
+"""
+Prompt-hash keyed cache and request coalescing for LLM calls.
+
+Responses are stored by a hash of the model, prompt and generation config.
+Concurrent identical requests are coalesced so only one upstream call is in
+flight per key (single-flight); the others wait for and share its result.
+Failures are never cached, so callers can still fall back per request.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from result_cache import MISS, ResultCache
+
+
+class MemoryBackend:
+    """Per-process LRU backend."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None):
+        self._cache = ResultCache(maxsize=maxsize, ttl=ttl)
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def put(self, key, value):
+        self._cache.put(key, value)
+
+
+class SQLiteBackend:
+    """
+    Backend in a local SQLite file, shared by every worker process on the
+    host. Least recently used rows are pruned beyond ``maxsize``.
+    """
+
+    def __init__(self, path: str, maxsize: int = 10000, ttl: float = None):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "expires_at REAL, last_used REAL NOT NULL)"
+            )
+
+    def _connect(self):
+        # A connection per call keeps the backend safe across threads and forks
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        now = time.time()
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISS
+            value, expires_at = row
+            if expires_at is not None and expires_at <= now:
+                db.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return MISS
+            db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+            return json.loads(value)
+
+    def put(self, key, value):
+        now = time.time()
+        expires_at = now + self.ttl if self.ttl else None
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO llm_cache VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), expires_at, now),
+            )
+            db.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache "
+                "ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+
+class LLMCache:
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model: str, prompt: str, config: dict = None):
+        payload = json.dumps(
+            {"model": model, "prompt": prompt, "config": config or {}}, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def lookup(self, key: str):
+        """Cached response for ``key`` or ``MISS``."""
+        value = self.backend.get(key)
+        if value is MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def store(self, key: str, value):
+        """Store a response produced outside ``get_or_generate`` (e.g. streamed)."""
+        self.backend.put(key, value)
+
+    def get_or_generate(self, key: str, generate):
+        """
+        Return the cached response for ``key`` or call ``generate()`` once,
+        sharing its result (or exception) with concurrent identical callers.
+        """
+        cached = self.backend.get(key)
+        if cached is not MISS:
+            self.hits += 1
+            return cached
+
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            return future.result()
+
+        try:
+            value = generate()
+            self.backend.put(key, value)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+        }
+
+
+def create_llm_cache():
+    """Build the LLM cache selected by ``LLM_CACHE_BACKEND`` (memory|sqlite)."""
+    backend = os.getenv("LLM_CACHE_BACKEND", "memory")
+    ttl = float(os.getenv("LLM_CACHE_TTL", 24 * 60 * 60)) or None
+    maxsize = int(os.getenv("LLM_CACHE_SIZE", 1024))
+    if backend == "sqlite":
+        path = os.getenv("LLM_CACHE_PATH", "cache/llm_cache.sqlite3")
+        return LLMCache(SQLiteBackend(path, maxsize=maxsize, ttl=ttl))
+    if backend != "memory":
+        raise ValueError(f"Unknown LLM cache backend: {backend}")
+    return LLMCache(MemoryBackend(maxsize=maxsize, ttl=ttl))
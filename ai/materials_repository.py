@@ -0,0 +1,156 @@
+"""
+In-memory materials catalog with O(1) lookups and vectorized footprints.
+
+``materials_enriched.csv`` is read once into compact ``MaterialRecord``
+objects plus NumPy columns, so per-request footprint lookups are a dict hit
+instead of a DataFrame boolean scan.
+"""
+
+import csv
+import hashlib
+import json
+import math
+
+import numpy as np
+
+# Common alternative names, applied only when the canonical material exists
+DEFAULT_ALIASES = {
+    "cotton (organic)": "Organic Cotton",
+    "rpet": "Recycled Polyester",
+    "recycled pet": "Recycled Polyester",
+    "lyocell": "TENCEL Lyocell",
+    "tencel": "TENCEL Lyocell",
+    "bamboo": "Bamboo Viscose",
+    "cork": "Cork Fabric",
+}
+
+
+def normalize(name: str) -> str:
+    """Case- and whitespace-insensitive lookup key."""
+    return " ".join(str(name).split()).casefold()
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class MaterialRecord:
+    __slots__ = (
+        "name",
+        "product_types",
+        "certifications",
+        "co2_kg_per_kg",
+        "water_l_per_kg",
+        "region_availability",
+        "biodegradable",
+        "recycled",
+        "live_co2e_kg",
+    )
+
+    def __init__(self, row: dict):
+        self.name = row["Material"]
+        self.product_types = row.get("Product_Types", "")
+        self.certifications = row.get("Certifications", "")
+        self.co2_kg_per_kg = _float(row.get("CO2_kg_per_kg"))
+        self.water_l_per_kg = _float(row.get("Water_L_per_kg"))
+        self.region_availability = row.get("Region_Availability", "")
+        self.biodegradable = row.get("Biodegradable", "")
+        self.recycled = row.get("Recycled", "")
+        self.live_co2e_kg = _float(row.get("live_co2e_kg"))
+
+
+class MaterialsRepository:
+    def __init__(self, csv_path="materials_enriched.csv", aliases=None):
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        self._init_records([MaterialRecord(row) for row in rows], aliases)
+
+    @classmethod
+    def from_rows(cls, rows, aliases=None):
+        """Build a repository from CSV-style row dicts (see ``catalog.py``)."""
+        repository = cls.__new__(cls)
+        repository._init_records([MaterialRecord(row) for row in rows], aliases)
+        return repository
+
+    def _init_records(self, records, aliases=None):
+        self.records = records
+        self._index = {}
+        for i, record in enumerate(records):
+            # First occurrence wins, matching the old ``.iloc[0]`` lookups
+            self._index.setdefault(normalize(record.name), i)
+
+        for alias, canonical in {**DEFAULT_ALIASES, **(aliases or {})}.items():
+            target = self._index.get(normalize(canonical))
+            if target is not None:
+                self._index.setdefault(normalize(alias), target)
+
+        # Columns end in a NaN sentinel so row -1 ("not found") gathers NaN
+        self.co2e_kg = np.array(
+            [r.live_co2e_kg for r in records] + [math.nan], dtype=np.float64
+        )
+        self.water_l = np.array(
+            [r.water_l_per_kg for r in records] + [math.nan], dtype=np.float64
+        )
+        self.co2_kg_per_kg = np.array(
+            [r.co2_kg_per_kg for r in records] + [math.nan], dtype=np.float64
+        )
+        # Live emission factors where fetched, the catalog value otherwise
+        self.co2_factor = np.where(
+            np.isfinite(self.co2e_kg), self.co2e_kg, self.co2_kg_per_kg
+        )
+
+        # Content hash of the lookups and CO2 factors, so results derived
+        # from them (e.g. footprint-weighted rankings) can be cached
+        self.version = hashlib.sha1(
+            json.dumps(sorted(self._index.items())).encode("utf-8")
+            + self.co2_factor.tobytes()
+        ).hexdigest()[:16]
+
+        self.names = list(dict.fromkeys(r.name for r in records))
+        self.materials_json = json.dumps(
+            {"materials": self.names, "count": len(self.names), "status": "success"}
+        )
+
+    def __len__(self):
+        return len(self.records)
+
+    def index_of(self, name: str):
+        """Row of ``name`` (case-insensitive, aliases resolved) or None."""
+        return self._index.get(normalize(name))
+
+    def get(self, name: str):
+        """The ``MaterialRecord`` for ``name`` or None."""
+        i = self.index_of(name)
+        return None if i is None else self.records[i]
+
+    def footprint(self, name: str, quantity: float):
+        """(co2_kg, water_l) for ``quantity`` kg of ``name``, or None if unknown."""
+        i = self.index_of(name)
+        if i is None:
+            return None
+        co2 = round(float(self.co2_factor[i]) * quantity, 3)
+        water = round(float(self.water_l[i]) * quantity, 1)
+        return co2, water
+
+    def footprint_many(self, names, quantities):
+        """
+        Vectorized footprints for parallel sequences of material names and
+        quantities. Returns ``(co2_kg, water_l, found)`` arrays; unknown
+        materials yield NaN and ``found=False``. CO2 uses the live emission
+        factor where one was fetched and ``CO2_kg_per_kg`` otherwise.
+        """
+        # Resolve each distinct name once; bills of materials repeat them
+        unique, inverse = np.unique(
+            np.asarray(names, dtype=object), return_inverse=True
+        )
+        rows = np.array(
+            [-1 if (i := self.index_of(n)) is None else i for n in unique],
+            dtype=np.int64,
+        )[inverse]
+        quantities = np.asarray(quantities, dtype=np.float64)
+        co2 = self.co2_factor[rows] * quantities
+        water = self.water_l[rows] * quantities
+        return co2, water, rows >= 0
@@ -0,0 +1,336 @@
+"""
+Built-in request and pipeline instrumentation in Prometheus text format.
+
+Endpoint latencies, pipeline stage latencies, upstream (image backend,
+Gemini) call counts and durations, and in-flight gauges are recorded in a
+small in-process registry; cache hit ratios and queue depths are read from
+collectors at scrape time. ``instrument(app)`` adds ``/metrics`` and a
+``Server-Timing`` header listing the stages the request spent time in.
+
+No ``prometheus_flask_exporter`` is needed. Metrics are per process: under
+gunicorn every worker exports its own values, so scrape each worker (or
+aggregate) rather than assuming one scrape covers the server.
+"""
+
+import contextlib
+import math
+import threading
+import time
+from contextvars import ContextVar
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; image generation can take a minute or more
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120,
+)  # fmt: skip
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return self.header() + [
+            f"{self.name}{_labels(self.labelnames, key)} {_number(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        counts, _ = self._values.get(self._key(labels), ((), 0.0))
+        return sum(counts)
+
+    def render(self):
+        with self._lock:
+            items = sorted((key, (list(c), s)) for key, (c, s) in self._values.items())
+        lines = self.header()
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _labels(self.labelnames, key, [("le", _number(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def collector(self, fn):
+        """
+        Register ``fn() -> [(name, kind, help, {labels: value})]``, called at
+        every scrape for values owned elsewhere (cache stats, queue depths).
+        """
+        self._collectors.append(fn)
+        return fn
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collect in self._collectors:
+            try:
+                families = collect()
+            except Exception:
+                continue  # a broken collector must not take /metrics down
+            for name, kind, help, samples in families:
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples.items():
+                    lines.append(f"{name}{_labels((), (), labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_LATENCY = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Time to produce the response headers, by endpoint",
+        ("method", "endpoint", "status"),
+    )
+)
+REQUESTS_IN_FLIGHT = registry.register(
+    Gauge("http_requests_in_flight", "Requests being handled", ("endpoint",))
+)
+STAGE_LATENCY = registry.register(
+    Histogram(
+        "pipeline_stage_duration_seconds",
+        "Duration of request pipeline stages, including pool queueing",
+        ("stage", "outcome"),
+    )
+)
+UPSTREAM_CALLS = registry.register(
+    Counter(
+        "upstream_calls_total",
+        "Calls to remote services by outcome",
+        ("service", "outcome"),
+    )
+)
+UPSTREAM_LATENCY = registry.register(
+    Histogram(
+        "upstream_call_duration_seconds", "Duration of remote calls", ("service",)
+    )
+)
+UPSTREAM_IN_FLIGHT = registry.register(
+    Gauge("upstream_calls_in_flight", "Remote calls in progress", ("service",))
+)
+
+# Server-Timing entries for the request being handled on this thread
+_timings = ContextVar("server_timings", default=None)
+
+
+def record_stage(stage, seconds, outcome="ok"):
+    """Observe a stage duration and add it to the current Server-Timing header."""
+    STAGE_LATENCY.observe(seconds, stage=stage, outcome=outcome)
+    timings = _timings.get()
+    if timings is not None:
+        timings.append((stage, seconds, outcome))
+
+
+@contextlib.contextmanager
+def stage(name):
+    """Time a synchronous stage of the current request."""
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        yield
+        outcome = "ok"
+    finally:
+        record_stage(name, time.perf_counter() - start, outcome)
+
+
+@contextlib.contextmanager
+def upstream(service):
+    """
+    Count and time a call to a remote service. Code in the block may set
+    ``call.outcome`` (e.g. "fallback") when it handles a failure itself.
+    """
+
+    class Call:
+        outcome = "ok"
+
+    call = Call()
+    start = time.perf_counter()
+    UPSTREAM_IN_FLIGHT.inc(service=service)
+    try:
+        yield call
+    except Exception:
+        call.outcome = "error"
+        raise
+    finally:
+        UPSTREAM_IN_FLIGHT.dec(service=service)
+        UPSTREAM_LATENCY.observe(time.perf_counter() - start, service=service)
+        UPSTREAM_CALLS.inc(service=service, outcome=call.outcome)
+
+
+def server_timing(timings, total):
+    """``Server-Timing`` header value, e.g. ``matching;dur=12.5, total;dur=40.1``."""
+    entries = [
+        f"{name};dur={seconds * 1000:.1f}"
+        + (f';desc="{outcome}"' if outcome != "ok" else "")
+        for name, seconds, outcome in timings
+    ]
+    entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+def cache_collector(caches):
+    """Collector for objects with ``stats()`` returning hits/misses/hit_ratio."""
+
+    def collect():
+        stats = {name: cache.stats() for name, cache in caches().items()}
+        return [
+            (
+                "cache_hits_total",
+                "counter",
+                "Cache hits",
+                {(("cache", n),): s.get("hits", 0) for n, s in stats.items()},
+            ),
+            (
+                "cache_misses_total",
+                "counter",
+                "Cache misses",
+                {(("cache", n),): s.get("misses", 0) for n, s in stats.items()},
+            ),
+            (
+                "cache_hit_ratio",
+                "gauge",
+                "Hits over lookups since start",
+                {(("cache", n),): s.get("hit_ratio", 0.0) for n, s in stats.items()},
+            ),
+        ]
+
+    return collect
+
+
+def instrument(app):
+    """Time every request, add Server-Timing headers and serve /metrics."""
+    from flask import Response, g, request
+
+    @app.before_request
+    def start_timer():
+        g.metrics_start = time.perf_counter()
+        g.metrics_endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        _timings.set([])
+        REQUESTS_IN_FLIGHT.inc(endpoint=g.metrics_endpoint)
+
+    @app.after_request
+    def observe(response):
+        if "metrics_start" not in g:
+            return response
+        total = time.perf_counter() - g.metrics_start
+        REQUEST_LATENCY.observe(
+            total,
+            method=request.method,
+            endpoint=g.metrics_endpoint,
+            status=response.status_code,
+        )
+        g.metrics_observed = True
+        response.headers["Server-Timing"] = server_timing(_timings.get() or [], total)
+        return response
+
+    @app.teardown_request
+    def finish(error=None):
+        if "metrics_start" not in g:
+            return
+        REQUESTS_IN_FLIGHT.dec(endpoint=g.metrics_endpoint)
+        if not g.get("metrics_observed"):
+            # Unhandled exception: after_request never ran
+            REQUEST_LATENCY.observe(
+                time.perf_counter() - g.metrics_start,
+                method=request.method,
+                endpoint=g.metrics_endpoint,
+                status=500,
+            )
+        _timings.set(None)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(registry.render(), content_type=CONTENT_TYPE)
+
+    return app
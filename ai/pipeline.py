@@ -0,0 +1,81 @@
+"""
+Concurrent stage runner for the /create-product pipeline.
+
+Independent stages (image generation, supplier matching, narrative) are
+submitted to thread pools and awaited with per-stage timeouts, so a request
+takes roughly as long as its slowest stage instead of their sum.
+
+A timed-out stage keeps its thread until it returns, so image generation
+runs on its own pool, no larger than the image backend's concurrency. Slow
+or failing designs then queue behind each other (and are cancelled while
+still queued) instead of holding the threads matching and narrative need.
+"""
+
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from metrics import record_stage
+
+STAGE_TIMEOUTS = {
+    "design": float(os.getenv("DESIGN_STAGE_TIMEOUT", 90)),
+    "matching": float(os.getenv("MATCHING_STAGE_TIMEOUT", 10)),
+    "narrative": float(os.getenv("NARRATIVE_STAGE_TIMEOUT", 30)),
+}
+
+executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("PIPELINE_WORKERS", 8)),
+    thread_name_prefix="pipeline",
+)
+design_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("DESIGN_WORKERS", os.getenv("IMAGE_CONCURRENCY", 4))),
+    thread_name_prefix="design",
+)
+STAGE_EXECUTORS = {"design": design_executor}
+
+
+def run_stage(stage: str, fn, *args, **kwargs):
+    """Submit a stage to its pool and return its future."""
+    timing = {"submitted": time.perf_counter()}
+
+    def timed():
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            timing["finished"] = time.perf_counter()
+
+    # Run in a copy of the caller's context so the stage sees its request trace
+    pool = STAGE_EXECUTORS.get(stage, executor)
+    future = pool.submit(contextvars.copy_context().run, timed)
+    future.timing = timing
+    return future
+
+
+def await_stage(stage: str, future, fallback):
+    """
+    Wait for a stage up to its timeout.
+
+    Returns ``(result, timed_out)``. On timeout the future is abandoned and
+    ``fallback()`` supplies the result; exceptions raised by the stage
+    propagate to the caller. The stage's duration, from submission to
+    completion (or to the timeout), is recorded in the request metrics.
+    """
+    timing = getattr(future, "timing", None)
+
+    def elapsed():
+        if timing is None:
+            return 0.0
+        return timing.get("finished", time.perf_counter()) - timing["submitted"]
+
+    try:
+        result = future.result(timeout=STAGE_TIMEOUTS[stage])
+    except TimeoutError:
+        future.cancel()
+        record_stage(stage, elapsed(), "timeout")
+        return fallback(), True
+    except Exception:
+        record_stage(stage, elapsed(), "error")
+        raise
+    record_stage(stage, elapsed(), "ok")
+    return result, False
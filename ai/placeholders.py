@@ -0,0 +1,91 @@
+"""
+Precomputed placeholder designs.
+
+When image generation fails or times out every request used to draw a fresh
+full-size image and encode it to its own PNG. Instead one template per size
+is rendered once per process and encoded once per host, with its WebP/AVIF
+variants, to a shared file under ``static/``; failed requests all point at
+that URL and cost no rendering, encoding or disk writes. Failed generations
+return a ``Placeholder``, which carries only the size, so no pixels are
+copied or drawn on the failure path either.
+"""
+
+import functools
+import os
+import threading
+import uuid
+
+from PIL import Image, ImageDraw, ImageFont
+
+from design_variants import write_variants
+
+# Bump when the template changes so clients never keep a stale cached copy
+TEMPLATE_VERSION = 1
+
+
+@functools.lru_cache(maxsize=8)
+def template(width: int = 1024, height: int = 1024) -> Image.Image:
+    """The shared placeholder template for a size; callers must not modify it."""
+    image = Image.new("RGB", (width, height), color="lightblue")
+    draw = ImageDraw.Draw(image)
+    draw.text(
+        (50, height // 2 - 20),
+        "Product Design\nPreview unavailable",
+        fill="darkblue",
+        font=ImageFont.load_default(),
+    )
+    return image
+
+
+class Placeholder:
+    """A failed design: just the size of the shared placeholder to serve."""
+
+    __slots__ = ("size",)
+
+    def __init__(self, width: int = 1024, height: int = 1024):
+        self.size = (width, height)
+
+
+class PlaceholderAssets:
+    """Pre-encoded placeholder files, one per size, shared by every request."""
+
+    def __init__(self, directory: str = "static"):
+        self.directory = directory
+        self.served = 0
+        self.rendered = 0
+        self._ready = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def filename(width: int, height: int):
+        return f"placeholder-{width}x{height}-v{TEMPLATE_VERSION}.png"
+
+    def get(self, width: int = 1024, height: int = 1024):
+        """Filename of the placeholder for a size, encoding it on first use."""
+        size = (width, height)
+        if size not in self._ready:
+            with self._lock:
+                if size not in self._ready:
+                    self._render(width, height)
+                    self._ready.add(size)
+        self.served += 1
+        return self.filename(width, height)
+
+    warm = get
+
+    def _render(self, width, height):
+        path = os.path.join(self.directory, self.filename(width, height))
+        if os.path.isfile(path):
+            # Another worker (or the gunicorn master) already wrote it
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        image = template(width, height)
+        # Variants first: once the PNG exists, every variant does too
+        write_variants(image, path)
+        tmp = os.path.join(self.directory, f".{uuid.uuid4().hex}.tmp.png")
+        image.save(tmp, optimize=True)
+        os.replace(tmp, path)
+        self.rendered += 1
+
+    def stats(self):
+        return {"served": self.served, "rendered": self.rendered}
@@ -0,0 +1,86 @@
+"""
+Size-bounded LRU cache with optional TTL and catalog-version tagging.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+MISS = object()
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache for query results.
+
+    Every entry is tagged with the catalog version it was computed against.
+    A lookup with a different version counts as a miss and drops the stale
+    entry, so reloading the catalog invalidates results without a flush.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = None, clock=time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key, version=None):
+        """Return the cached value for ``key`` or ``MISS``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return MISS
+
+            entry_version, expires_at, value = entry
+            if entry_version != version or (
+                expires_at is not None and self._clock() >= expires_at
+            ):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return MISS
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value, version=None):
+        """Store ``value`` under ``key``, evicting the least recently used entry."""
+        if self.maxsize <= 0:
+            return
+        expires_at = self._clock() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (version, expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry while keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Counters and hit ratio for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
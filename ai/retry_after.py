@@ -0,0 +1,28 @@
+"""
+Parsing of the HTTP ``Retry-After`` header.
+"""
+
+import time
+from email.utils import parsedate_to_datetime
+
+
+def parse_retry_after(value, now=None):
+    """
+    Seconds to wait from a ``Retry-After`` value, either delay seconds or an
+    HTTP-date. Returns None for a missing or unparseable value.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        return None  # HTTP-dates are always GMT; anything else is malformed
+    now = time.time() if now is None else now
+    return max(0.0, when.timestamp() - now)
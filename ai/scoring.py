@@ -0,0 +1,213 @@
+"""
+Composite supplier scores.
+
+A supplier's score is a weighted sum of components, each mapping the
+candidate rows of a query to an array of values in [0, 1]. Components are
+registered with ``@component(name)``. Weights come from a named profile plus
+per-request overrides and are normalized to sum to 1. A component whose
+inputs a query lacks (distance without a location, footprint without
+materials data) returns None and is left out, and the remaining weights are
+renormalized.
+"""
+
+import math
+import numbers
+
+import numpy as np
+
+DEFAULT_PROFILE = "balanced"
+PROFILES = {
+    "balanced": {"sim": 0.5, "cert": 0.3, "cap": 0.2},
+    "certified": {"sim": 0.4, "cert": 0.5, "cap": 0.1},
+    "high_capacity": {"sim": 0.4, "cert": 0.1, "cap": 0.5},
+    "nearby": {"sim": 0.3, "cert": 0.2, "cap": 0.1, "distance": 0.4},
+    "low_footprint": {"sim": 0.4, "cert": 0.2, "cap": 0.1, "footprint": 0.3},
+}
+
+# name -> (fn(candidates) -> scores or None, record field for the scores)
+COMPONENTS = {}
+
+
+def component(name, field=None):
+    """Register ``fn(candidates)`` as the score component ``name``."""
+
+    def register(fn):
+        COMPONENTS[name] = (fn, field or f"{name}_score")
+        return fn
+
+    return register
+
+
+def top_k_indices(scores, k):
+    """
+    Positions of the k highest scores in descending order, ties broken by position
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < len(scores):
+        picked = np.argpartition(-scores, k - 1)[:k]
+    else:
+        picked = np.arange(len(scores))
+    return picked[np.lexsort((picked, -scores[picked]))]
+
+
+def resolve_weights(profile=None, overrides=None):
+    """
+    Component weights of ``profile`` (default "balanced") with ``overrides``
+    ({component: weight}) applied. Raises ValueError for unknown profiles or
+    components and for weights that are not finite non-negative numbers.
+    """
+    profile = profile or DEFAULT_PROFILE
+    if not isinstance(profile, str) or profile not in PROFILES:
+        raise ValueError(
+            f"Unknown scoring profile {profile!r}; expected one of {sorted(PROFILES)}"
+        )
+    weights = dict(PROFILES[profile])
+    for name, weight in (overrides or {}).items():
+        if name not in COMPONENTS:
+            raise ValueError(
+                f"Unknown score component {name!r}; expected one of {sorted(COMPONENTS)}"
+            )
+        if isinstance(weight, bool) or not isinstance(weight, numbers.Real):
+            raise ValueError(f"Weight for {name!r} must be a number")
+        weight = float(weight)
+        if not (math.isfinite(weight) and weight >= 0):
+            raise ValueError(f"Weight for {name!r} must be a finite number >= 0")
+        weights[name] = weight
+    return weights
+
+
+def normalize_weights(weights):
+    """
+    ``weights`` scaled to sum to 1 (all zeros if none is positive). Weights
+    are divided by the largest first, so huge values cannot overflow the sum.
+    """
+    peak = max(weights.values(), default=0.0)
+    if not peak > 0:
+        return {name: 0.0 for name in weights}
+    scaled = {name: weight / peak for name, weight in weights.items()}
+    total = sum(scaled.values())
+    return {name: weight / total for name, weight in scaled.items()}
+
+
+class Candidates:
+    """
+    The rows being ranked for one query and the inputs components read.
+
+    Components may add per-row values to ``fields``, which are reported on
+    the winners' records under those names (and override the component's
+    own score field).
+    """
+
+    def __init__(
+        self,
+        index,
+        rows,
+        sim,
+        material=None,
+        near=None,
+        cert_weights=None,
+        materials=None,
+    ):
+        self.index = index
+        self.rows = rows
+        self.sim = sim
+        self.material = material
+        self.near = near
+        self.cert_weights = cert_weights or {}
+        self.materials = materials
+        self.fields = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def score(candidates, weights):
+    """
+    Final scores for ``candidates`` and the record fields of every component
+    in ``weights``, as ``(final, {field: per-row values})``. Components with
+    a zero weight are computed and reported but do not affect the score.
+    """
+    parts = {}
+    for name in weights:
+        fn, field = COMPONENTS[name]
+        values = fn(candidates)
+        if values is not None:
+            parts[name] = (field, values)
+
+    final = np.zeros(len(candidates))
+    shares = normalize_weights({name: weights[name] for name in parts})
+    for name, (_, values) in parts.items():
+        if shares[name]:
+            final += values * shares[name]
+
+    fields = {field: values for field, values in parts.values()}
+    fields.update(candidates.fields)
+    return final, fields
+
+
+def _relative(values, lower_is_better=False):
+    """Scale values against the best candidate; missing (NaN) values score 0."""
+    finite = np.isfinite(values)
+    if not finite.any():
+        return np.zeros(len(values))
+    if lower_is_better:
+        low, high = values[finite].min(), values[finite].max()
+        scaled = 1 - (values - low) / (high - low) if high > low else 1.0
+    else:
+        high = values[finite].max()
+        scaled = values / high if high > 0 else 0.0
+    return np.where(finite, scaled, 0.0)
+
+
+@component("sim")
+def similarity(candidates):
+    return candidates.sim
+
+
+@component("cert")
+def certification(candidates):
+    # Weighted certifications from the precomputed bitmasks, normalized by
+    # the total weight so a supplier holding all of them scores 1
+    index, weights = candidates.index, candidates.cert_weights
+    raw = index.cert_scores(candidates.rows, index.cert_weights(weights))
+    candidates.fields["cert_score"] = raw
+    total = sum(weights.values())
+    return raw / total if total > 0 else np.zeros(len(candidates))
+
+
+@component("cap")
+def capacity(candidates):
+    # Capacity scores are normalized against the best candidate
+    return _relative(candidates.index.capacity[candidates.rows])
+
+
+@component("distance", field="dist_score")
+def distance(candidates):
+    # Proximity is normalized against the farthest candidate
+    if candidates.near is None:
+        return None
+    lat, lon = candidates.near
+    dist = candidates.index.geo.distances(lat, lon, candidates.rows)
+    candidates.fields["distance_km"] = dist
+    finite = np.isfinite(dist)
+    max_dist = dist[finite].max() if finite.any() else 0.0
+    return np.where(finite, 1 - dist / max_dist if max_dist > 0 else 1.0, 0.0)
+
+
+@component("footprint")
+def footprint(candidates):
+    # The lowest CO2 factor among the supplier's materials matching the query
+    if candidates.materials is None or not candidates.material:
+        return None
+    lowest = np.full(len(candidates), np.nan)
+    matches = candidates.index.matching_materials(candidates.material)
+    for name, rows in matches.items():
+        i = candidates.materials.index_of(name)
+        if i is None:
+            continue
+        hit = np.isin(candidates.rows, rows, assume_unique=True)
+        lowest[hit] = np.fmin(lowest[hit], candidates.materials.co2_factor[i])
+    candidates.fields["co2_kg_per_kg"] = lowest
+    return _relative(lowest, lower_is_better=True)
@@ -0,0 +1,94 @@
+"""
+Static asset responses with content-hash ETags and long-lived caching.
+
+Generated designs never change once written (their names are content hashes
+or unique timestamps), so they are served ``immutable`` with strong ETags.
+``send_file`` answers ``If-None-Match`` with 304 and ``Range`` with 206, and
+streams through the server's sendfile support when available.
+"""
+
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+
+from flask import send_file
+from werkzeug.exceptions import NotFound
+from werkzeug.security import safe_join
+
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+SHORT_MAX_AGE = 60
+
+CONTENT_ADDRESS = re.compile(r"^[0-9a-f]{64}")
+
+# Precompressed sidecars, preferred in this order
+SIDECAR_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+class StaticAssets:
+    def __init__(self):
+        self._etags = {}
+        self._lock = threading.Lock()
+
+    def etag(self, path: str):
+        """
+        Strong ETag derived from the file contents. Content-addressed names
+        already carry their hash; other files are hashed once per mtime/size.
+        """
+        name = os.path.basename(path)
+        if CONTENT_ADDRESS.match(name):
+            # The name pins the design; suffixes distinguish size/format variants
+            return name
+
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._etags.get(path)
+        if cached and cached[0] == signature:
+            return cached[1]
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        etag = digest.hexdigest()[:32]
+        with self._lock:
+            self._etags[path] = (signature, etag)
+        return etag
+
+    def send(self, directory: str, filename: str, request, immutable: bool = True):
+        """
+        Send ``filename`` from ``directory`` with caching headers, using a
+        precompressed ``.br``/``.gz`` sidecar when the client accepts it.
+        """
+        path = safe_join(directory, filename)
+        if path is None or not os.path.isfile(path):
+            raise NotFound()
+
+        mimetype = mimetypes.guess_type(filename)[0]
+        etag = self.etag(path)
+        encoding = None
+
+        # Sidecars are whole-file encodings, so byte ranges use the original
+        if not request.range:
+            for name, suffix in SIDECAR_ENCODINGS:
+                if name in request.accept_encodings and os.path.isfile(path + suffix):
+                    encoding, path = name, path + suffix
+                    etag = f"{etag}-{name}"
+                    break
+
+        response = send_file(
+            path,
+            mimetype=mimetype,
+            etag=etag,
+            conditional=True,
+            max_age=IMMUTABLE_MAX_AGE if immutable else SHORT_MAX_AGE,
+        )
+        response.cache_control.public = True
+        if immutable:
+            response.cache_control.immutable = True
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+        return response
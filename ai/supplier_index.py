@@ -0,0 +1,314 @@
+"""
+Precomputed columnar index over the manufacturers catalog.
+
+Built once per catalog so that supplier queries only resolve posting lists
+and slice rows instead of copying and re-vectorizing the whole DataFrame.
+"""
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from geo_index import GeoIndex
+
+MATERIAL_SEPARATOR = ", "
+# Certifications are bits of a per-supplier mask stored as uint64 words
+WORD_BITS = 64
+# Bit i of every byte value, for expanding mask bytes into weight sums
+_BYTE_BITS = ((np.arange(256)[:, None] >> np.arange(8)) & 1).astype(np.float64)
+POSTINGS = ("material_tokens", "material_strings", "cities")
+
+
+def _build_postings(keys):
+    """Map each distinct key to the sorted array of row indices holding it."""
+    postings = {}
+    for row, row_keys in enumerate(keys):
+        for key in row_keys:
+            postings.setdefault(key, []).append(row)
+    return {key: np.asarray(rows, dtype=np.int64) for key, rows in postings.items()}
+
+
+def _pack_postings(postings):
+    """Flatten posting lists into (keys, offsets, rows) arrays for storage."""
+    keys = list(postings)
+    lengths = [len(postings[key]) for key in keys]
+    offsets = np.concatenate([[0], np.cumsum(lengths, dtype=np.int64)])
+    rows = [postings[key] for key in keys]
+    return (
+        np.array(keys, dtype=str),
+        offsets,
+        np.concatenate(rows) if rows else np.empty(0, dtype=np.int64),
+    )
+
+
+def _unpack_postings(keys, offsets, rows):
+    return {
+        key: rows[start:end]
+        for key, start, end in zip(keys.tolist(), offsets[:-1], offsets[1:])
+    }
+
+
+def _mask_words(mask, words):
+    """Split the integer bitmask ``mask`` into ``words`` uint64 words."""
+    low = (1 << WORD_BITS) - 1
+    return np.array(
+        [(mask >> (WORD_BITS * i)) & low for i in range(words)], dtype=np.uint64
+    )
+
+
+def _pad_words(masks, words):
+    """``masks`` with zero words appended up to ``words`` columns."""
+    return np.pad(masks, ((0, 0), (0, words - masks.shape[1])))
+
+
+def _encode_certs(df, cert_names):
+    """
+    Certification bitmasks for the rows of ``df`` as an (n, words) uint64
+    array, with bit i set when the supplier holds ``cert_names[i]``. Names
+    are matched case-insensitively. Returns the masks and ``cert_names``
+    extended with certifications seen for the first time.
+    """
+    cert_names = list(cert_names)
+    bits = {name.lower(): i for i, name in enumerate(cert_names)}
+    row_masks = []
+    for certs in df["Certifications"].fillna("").astype(str):
+        mask = 0
+        for cert in certs.split(MATERIAL_SEPARATOR):
+            cert = cert.strip()
+            if not cert:
+                continue
+            if cert.lower() not in bits:
+                bits[cert.lower()] = len(cert_names)
+                cert_names.append(cert)
+            mask |= 1 << bits[cert.lower()]
+        row_masks.append(mask)
+
+    words = max(1, -(-len(cert_names) // WORD_BITS))
+    masks = np.zeros((len(row_masks), words), dtype=np.uint64)
+    for row, mask in enumerate(row_masks):
+        if mask:
+            masks[row] = _mask_words(mask, words)
+    return masks, cert_names
+
+
+def _encode(df, vec, cert_names):
+    """TF-IDF rows and certification bitmasks for the rows of ``df``."""
+    materials = df["Supported_Materials"].fillna("").astype(str)
+
+    # TF-IDF rows are L2-normalised, so a dot product is the cosine similarity
+    tfidf = vec.transform(materials).tocsr()
+
+    # Certifications do not depend on the query, so they are parsed once
+    return (tfidf, *_encode_certs(df, cert_names))
+
+
+class SupplierIndex:
+    """
+    Read-only index over a cleaned manufacturers DataFrame.
+
+    Holds the per-supplier TF-IDF matrix, posting lists for material tokens,
+    full material strings and cities, the capacity and certification bitmask
+    columns as NumPy arrays, and a haversine ball tree over the coordinates.
+    Certification bits follow ``cert_priority``, then the order in which
+    other certifications first appear.
+    """
+
+    def __init__(self, df: pd.DataFrame, vec, cert_priority=()):
+        self._init_columns(df, *_encode(df, vec, cert_priority))
+
+    def updated(self, df: pd.DataFrame, kept, vec):
+        """
+        Index over ``df``, whose leading rows are this index's rows ``kept``
+        and whose remaining rows are new. Only the new rows are vectorized.
+        """
+        kept_rows = len(kept)
+        added = df.iloc[kept_rows:]
+        # New certifications take new bits, so existing masks stay valid
+        # (padded with zero words when the new bits need more of them)
+        words = self.cert_masks.shape[1]
+        if len(added):
+            tfidf, cert_masks, cert_names = _encode(added, vec, self.cert_names)
+        else:
+            tfidf = sparse.csr_matrix((0, self.tfidf.shape[1]))
+            cert_masks = np.empty((0, words), dtype=np.uint64)
+            cert_names = self.cert_names
+        words = max(words, cert_masks.shape[1])
+        index = self.__class__.__new__(self.__class__)
+        index._init_columns(
+            df,
+            sparse.vstack([self.tfidf[kept], tfidf], format="csr"),
+            np.concatenate(
+                [
+                    _pad_words(self.cert_masks[kept], words),
+                    _pad_words(cert_masks, words),
+                ]
+            ),
+            cert_names,
+        )
+        return index
+
+    @classmethod
+    def from_arrays(cls, df: pd.DataFrame, arrays):
+        """Rebuild an index from ``to_arrays()`` output without refitting TF-IDF."""
+        index = cls.__new__(cls)
+        tfidf = sparse.csr_matrix(
+            (arrays["tfidf_data"], arrays["tfidf_indices"], arrays["tfidf_indptr"]),
+            shape=tuple(arrays["tfidf_shape"]),
+        )
+        postings = {
+            name: _unpack_postings(
+                arrays[f"{name}_keys"],
+                arrays[f"{name}_offsets"],
+                arrays[f"{name}_rows"],
+            )
+            for name in POSTINGS
+        }
+        index._init_columns(
+            df, tfidf, arrays["cert_masks"], arrays["cert_names"].tolist(), postings
+        )
+        return index
+
+    def to_arrays(self):
+        """The precomputed columns that cannot be cheaply derived from the rows."""
+        arrays = {
+            "tfidf_data": self.tfidf.data,
+            "tfidf_indices": self.tfidf.indices,
+            "tfidf_indptr": self.tfidf.indptr,
+            "tfidf_shape": np.asarray(self.tfidf.shape, dtype=np.int64),
+            "cert_masks": self.cert_masks,
+            "cert_names": np.array(self.cert_names, dtype=str),
+        }
+        for name in POSTINGS:
+            keys, offsets, rows = _pack_postings(getattr(self, name))
+            arrays[f"{name}_keys"] = keys
+            arrays[f"{name}_offsets"] = offsets
+            arrays[f"{name}_rows"] = rows
+        return arrays
+
+    def _init_columns(self, df, tfidf, cert_masks, cert_names, postings=None):
+        self.size = len(df)
+        self.tfidf = tfidf
+        self.cert_masks = np.asarray(cert_masks, dtype=np.uint64).reshape(self.size, -1)
+        self.cert_names = list(cert_names)
+        self._cert_bits = {name.lower(): i for i, name in enumerate(self.cert_names)}
+        self.capacity = df["Max_Weekly_Capacity"].to_numpy(dtype=np.float64)
+
+        if {"Latitude", "Longitude"} <= set(df.columns):
+            self.geo = GeoIndex(df["Latitude"], df["Longitude"])
+        else:
+            self.geo = GeoIndex(np.full(self.size, np.nan), np.full(self.size, np.nan))
+
+        if postings is None:
+            lowered = df["Supported_Materials"].fillna("").astype(str).str.lower()
+            cities = df["City"].fillna("").astype(str)
+            postings = {
+                "material_tokens": _build_postings(
+                    [m.split(MATERIAL_SEPARATOR) if m else [] for m in lowered]
+                ),
+                "material_strings": _build_postings([[m] for m in lowered]),
+                "cities": _build_postings([[c.lower()] for c in cities]),
+            }
+        self.material_tokens = postings["material_tokens"]
+        self.material_strings = postings["material_strings"]
+        self.cities = postings["cities"]
+
+    def cert_mask(self, names):
+        """
+        Bitmask of the named certifications (case-insensitive), or None if a
+        name is held by no supplier.
+        """
+        mask = 0
+        for name in names:
+            bit = self._cert_bits.get(name.strip().lower())
+            if bit is None:
+                return None
+            mask |= 1 << bit
+        return mask
+
+    def cert_weights(self, weights):
+        """
+        Weight vector over the certification bits from a {name: weight}
+        mapping; names held by no supplier are ignored.
+        """
+        vector = np.zeros(len(self.cert_names))
+        for name, weight in weights.items():
+            bit = self._cert_bits.get(name.strip().lower())
+            if bit is not None:
+                vector[bit] = weight
+        return vector
+
+    def cert_scores(self, rows, weights):
+        """Sum of ``weights`` (a ``cert_weights`` vector) over each row's certifications."""
+        masks = self.cert_masks[rows]
+        scores = np.zeros(len(rows))
+        # One 256-entry table of weight sums per mask byte that has weights
+        for start in range(0, len(weights), 8):
+            stop = start + 8
+            byte_weights = weights[start:stop]
+            if not byte_weights.any():
+                continue
+            word, shift = divmod(start, WORD_BITS)
+            table = _BYTE_BITS[:, : len(byte_weights)] @ byte_weights
+            scores += table[(masks[:, word] >> np.uint64(shift)) & np.uint64(0xFF)]
+        return scores
+
+    def _match_postings(self, postings, needle):
+        """Union the posting lists whose key contains ``needle`` (case-insensitive)."""
+        needle = needle.lower()
+        hits = [rows for key, rows in postings.items() if needle in key]
+        if not hits:
+            return np.empty(0, dtype=np.int64)
+        if len(hits) == 1:
+            return hits[0]
+        return np.unique(np.concatenate(hits))
+
+    def _material_postings(self, material: str):
+        if MATERIAL_SEPARATOR.strip() in material:
+            # The query spans several materials, so match the full strings
+            return self.material_strings
+        return self.material_tokens
+
+    def material_rows(self, material: str):
+        """Rows whose supported materials contain ``material`` as a substring."""
+        return self._match_postings(self._material_postings(material), material)
+
+    def matching_materials(self, material: str):
+        """{lowercased material: rows} for the materials ``material`` matches."""
+        needle = material.lower()
+        postings = self._material_postings(material)
+        return {key: rows for key, rows in postings.items() if needle in key}
+
+    def region_rows(self, region: str):
+        """Rows whose city contains ``region`` as a substring."""
+        return self._match_postings(self.cities, region)
+
+    def candidates(
+        self,
+        material: str,
+        region: str = None,
+        min_capacity: int = 0,
+        near=None,
+        radius_km: float = None,
+        cert_mask: int = 0,
+    ):
+        """
+        Sorted row indices matching the material, region and capacity filters,
+        holding every certification in ``cert_mask`` and lying within
+        ``radius_km`` of ``near`` (lat, lon) when both are given.
+        """
+        rows = self.material_rows(material)
+        if region and len(rows):
+            rows = np.intersect1d(rows, self.region_rows(region), assume_unique=True)
+        if near is not None and radius_km is not None and len(rows):
+            nearby = self.geo.within_radius(near[0], near[1], radius_km)
+            rows = np.intersect1d(rows, nearby, assume_unique=True)
+        if len(rows):
+            rows = rows[self.capacity[rows] >= min_capacity]
+        if cert_mask and len(rows):
+            required = _mask_words(cert_mask, self.cert_masks.shape[1])
+            held = (self.cert_masks[rows] & required) == required
+            rows = rows[held.all(axis=1)]
+        return rows
+
+    def similarity(self, query_vec, rows):
+        """Cosine similarity between a transformed query and the given rows."""
+        return np.asarray(self.tfidf[rows] @ query_vec.T.toarray()).ravel()
@@ -1,11 +1,22 @@
 import pytest
 from app import app as flask_app
+from placeholders import PlaceholderAssets
+
 
 @pytest.fixture
 def app():
     flask_app.config.update({"TESTING": True})
     yield flask_app
 
+
 @pytest.fixture
 def client(app):
     return app.test_client()
+
+
+@pytest.fixture(autouse=True)
+def placeholder_assets(monkeypatch, tmp_path):
+    # Keep placeholders rendered by tests out of the real static/ directory
+    assets = PlaceholderAssets(str(tmp_path))
+    monkeypatch.setattr("app.placeholder_assets", assets)
+    return assets
@@ -1,4 +1,12 @@
+import io
 import json
+import os
+import subprocess
+import sys
+import threading
+
+import pipeline
+from placeholders import PlaceholderAssets
 
 
 def test_create_product(client, monkeypatch):
@@ -53,3 +61,529 @@ def test_health_check(client):
     data = json.loads(response.data)
     assert data["status"] == "healthy"
     assert "timestamp" in data
+
+
+def test_suppliers_batch(client):
+    queries = [
+        {"material": "Organic Cotton", "min_capacity": 100},
+        {"material": "Hemp", "region": "Jaipur"},
+        {"material": "Unobtainium"},
+    ]
+    response = client.post("/suppliers/batch", json={"queries": queries, "top_n": 2})
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["status"] == "success"
+    assert [r["query"] for r in data["results"]] == queries
+    assert data["results"][2]["suppliers"] == []
+    for result in data["results"][:2]:
+        assert len(result["suppliers"]) <= 2
+
+
+def test_suppliers_batch_rejects_invalid_queries(client, monkeypatch):
+    response = client.post("/suppliers/batch", json={"queries": [{"region": "Milan"}]})
+    assert response.status_code == 400
+
+    # One bad query fails the whole request instead of emptying every result
+    for bad in (
+        {"material": "Hemp", "min_capacity": "lots"},
+        {"material": "Hemp", "min_capacity": -1},
+        {"material": "Hemp", "region": ["Milan"]},
+        {"material": 5},
+    ):
+        body = {"queries": [{"material": "Cotton"}, bad]}
+        response = client.post("/suppliers/batch", json=body)
+        assert response.status_code == 400
+        assert "Query 1" in json.loads(response.data)["message"]
+
+    queries = [{"material": "Hemp"}]
+    for top_n in ("many", 2.5, 0, None):
+        body = {"queries": queries, "top_n": top_n}
+        assert client.post("/suppliers/batch", json=body).status_code == 400
+
+    monkeypatch.setattr("app.SUPPLIER_BATCH_MAX_QUERIES", 2)
+    body = {"queries": queries * 3}
+    assert client.post("/suppliers/batch", json=body).status_code == 400
+
+
+def test_suppliers_certification_filter(client):
+    response = client.get(
+        "/suppliers?material=Cotton&certifications=GOTS,OEKO-TEX&cert_weights=GOTS:2"
+    )
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["filters"]["certifications"] == ["GOTS", "OEKO-TEX"]
+    for supplier in data["suppliers"]:
+        assert {"GOTS", "OEKO-TEX"} <= set(supplier["Certifications"].split(", "))
+        assert supplier["cert_score"] == 2
+
+    response = client.get("/suppliers?material=Cotton&cert_weights=GOTS:-1")
+    assert response.status_code == 400
+
+
+def test_suppliers_scoring_profiles(client):
+    response = client.get("/suppliers?material=Cotton&profile=low_footprint")
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["filters"]["profile"] == "low_footprint"
+    assert all("footprint_score" in s for s in data["suppliers"])
+
+    batch = client.post(
+        "/suppliers/batch",
+        json={"queries": [{"material": "Hemp"}], "weights": {"cap": 1}},
+    )
+    assert batch.status_code == 200
+
+    for query in (
+        "profile=fastest",
+        "weights=price:1",
+        "weights=sim",
+        "weights=cap:inf",
+        "weights=cap:nan",
+        "cert_weights=GOTS:inf",
+        "cert_weights=GOTS:1e308,FSC:1e308",
+    ):
+        assert client.get(f"/suppliers?material=Cotton&{query}").status_code == 400
+
+    # Huge but finite weights are normalized without overflowing
+    response = client.get("/suppliers?material=Cotton&weights=cap:1e308,sim:1e308")
+    scores = [s["final_score"] for s in json.loads(response.data)["suppliers"]]
+    assert scores and all(0 < score <= 1 for score in scores)
+
+    for body in (
+        {"weights": {"cap": None}},
+        {"weights": {"cap": [1]}},
+        {"profile": ["nearby"]},
+    ):
+        body["queries"] = [{"material": "Hemp"}]
+        assert client.post("/suppliers/batch", json=body).status_code == 400
+
+
+def test_nearest_suppliers(client):
+    response = client.get("/suppliers/nearest?lat=45.46&lon=9.19&k=2")
+    assert response.status_code == 200
+    data = json.loads(response.data)
+    assert data["count"] == 2
+    assert data["suppliers"][0]["City"] == "Milan"
+
+    assert client.get("/suppliers/nearest?lat=45.46").status_code == 400
+
+    url = "/suppliers?material=Cotton&lat=45.46&lon=9.19&distance_weight="
+    assert client.get(url + "0.5").status_code == 200
+    for weight in ("-3", "5", "inf", "nan"):
+        assert client.get(url + weight).status_code == 400
+
+
+def test_create_product_runs_stages_concurrently(client, monkeypatch):
+    # Each stage waits for the other to start, which only works if they overlap
+    both_running = threading.Barrier(2, timeout=5)
+    overlapped = []
+
+    def slow_design(prompt):
+        both_running.wait()
+        overlapped.append("design")
+        return None
+
+    def slow_match(material, region, min_capacity):
+        both_running.wait()
+        overlapped.append("matching")
+        return []
+
+    monkeypatch.setattr("app.generate_design", slow_design)
+    monkeypatch.setattr("app.save_design", lambda img, path: None)
+    monkeypatch.setattr("app.matcher.find_top_suppliers", slow_match)
+    monkeypatch.setattr("app.gemini_model", None)
+
+    response = client.post(
+        "/create-product", json={"prompt": "Test design", "material": "Hemp"}
+    )
+    assert response.status_code == 200
+    assert sorted(overlapped) == ["design", "matching"]
+
+
+def test_stuck_designs_do_not_starve_matching(client, monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr("app.generate_design", lambda prompt: release.wait(10))
+    monkeypatch.setattr("app.gemini_model", None)
+    monkeypatch.setitem(pipeline.STAGE_TIMEOUTS, "design", 0.01)
+
+    try:
+        # More stuck designs than the shared pool has threads
+        for i in range(pipeline.executor._max_workers + 2):
+            response = client.post(
+                "/create-product", json={"prompt": f"Stuck {i}", "material": "Hemp"}
+            )
+            assert json.loads(response.data)["suppliers"]
+    finally:
+        release.set()
+
+
+def test_create_product_falls_back_when_design_times_out(client, monkeypatch):
+    release = threading.Event()
+    saved = []
+    monkeypatch.setattr("app.generate_design", lambda prompt: release.wait(5))
+    monkeypatch.setattr("app.save_design", lambda img, path: saved.append(img))
+    monkeypatch.setattr("app.gemini_model", None)
+    monkeypatch.setitem(pipeline.STAGE_TIMEOUTS, "design", 0.05)
+
+    response = client.post(
+        "/create-product", json={"prompt": "Test design", "material": "Hemp"}
+    )
+    release.set()
+    assert response.status_code == 200
+    # The shared pre-encoded placeholder is served; nothing is encoded per request
+    assert saved == []
+    image_url = json.loads(response.data)["image_url"]
+    assert image_url.endswith(PlaceholderAssets.filename(1024, 1024))
+
+
+def test_create_product_job_mode(client, monkeypatch):
+    release = threading.Event()
+
+    def slow_design(prompt):
+        release.wait(5)
+        return None
+
+    monkeypatch.setattr("app.generate_design", slow_design)
+    monkeypatch.setattr("app.save_design", lambda img, path: None)
+    monkeypatch.setattr("app.gemini_model", None)
+
+    response = client.post(
+        "/create-product",
+        json={"prompt": "Test design", "material": "Hemp", "async": True},
+    )
+    assert response.status_code == 202
+    data = json.loads(response.data)
+    assert data["status"] == "accepted" and "narrative" in data
+
+    job = json.loads(client.get(f"/jobs/{data['job_id']}").data)
+    assert job["state"] in ("queued", "running")
+
+    # Streams end well before the worker timeout; clients resume after the
+    # last event they saw
+    monkeypatch.setenv("SSE_MAX_SECONDS", "0.2")
+    events_url = f"/jobs/{data['job_id']}/events"
+    events = client.get(events_url).get_data(as_text=True)
+    assert "event: done" not in events
+    last_id = [line for line in events.splitlines() if line.startswith("id: ")][-1]
+
+    monkeypatch.setenv("SSE_MAX_SECONDS", "5")
+    release.set()
+    headers = {"Last-Event-ID": last_id.removeprefix("id: ")}
+    events = client.get(events_url, headers=headers).get_data(as_text=True)
+    assert "event: done" in events and last_id not in events
+    job = json.loads(client.get(f"/jobs/{data['job_id']}").data)
+    assert job["state"] == "done" and job["image_url"].endswith(".png")
+
+    assert client.get("/jobs/unknown").status_code == 404
+
+
+def test_create_product_reuses_cached_design(client, monkeypatch, tmp_path):
+    from PIL import Image
+
+    from design_cache import DesignCache
+
+    calls = []
+
+    def fake_design(prompt):
+        calls.append(prompt)
+        return Image.new("RGB", (8, 8), color="green")
+
+    monkeypatch.setattr("app.design_cache", DesignCache(str(tmp_path)))
+    monkeypatch.setattr("app.generate_design", fake_design)
+    monkeypatch.setattr("app.gemini_model", None)
+
+    body = {"prompt": "Cached tee", "material": "Hemp"}
+    first = json.loads(client.post("/create-product", json=body).data)
+    second = json.loads(client.post("/create-product", json=body).data)
+
+    assert calls == ["Cached tee"]
+    assert first["image_url"] == second["image_url"]
+    assert first["image_url"].endswith(".png")
+    assert len({path.name[:64] for path in tmp_path.iterdir()}) == 1
+
+
+def test_static_images_negotiate_format(app, client, monkeypatch, tmp_path):
+    from PIL import Image
+
+    from design_variants import write_variants
+
+    monkeypatch.setattr(app, "root_path", str(tmp_path))
+    (tmp_path / "static").mkdir()
+    image = Image.new("RGB", (600, 600), color="white")
+    image.save(tmp_path / "static" / "design.png")
+    write_variants(image, str(tmp_path / "static" / "design.png"))
+
+    response = client.get("/static/design.png", headers={"Accept": "image/webp"})
+    assert response.mimetype == "image/webp"
+    assert "Accept" in response.headers["Vary"]
+
+    response = client.get("/static/design.png?size=thumb")
+    assert response.mimetype == "image/png"
+    with Image.open(io.BytesIO(response.data)) as thumb:
+        assert thumb.size == (256, 256)
+
+
+def test_create_app_builds_independent_apps(app, tmp_path):
+    from PIL import Image
+
+    import app as app_module
+
+    second = app_module.create_app()
+    assert second is not app
+    second.root_path = str(tmp_path)
+    (tmp_path / "static").mkdir()
+    Image.new("RGB", (8, 8)).save(tmp_path / "static" / "own.png")
+
+    # Handlers resolve paths against the app serving the request
+    assert second.test_client().get("/static/own.png").status_code == 200
+    assert app.test_client().get("/static/own.png").status_code == 404
+    assert second.test_client().get("/health").status_code == 200
+
+
+def test_static_images_are_cacheable(client):
+    response = client.get("/static/20250713185244.png")
+    assert response.status_code == 200
+    assert "immutable" in response.headers["Cache-Control"]
+    etag = response.headers["ETag"]
+
+    response = client.get("/static/20250713185244.png", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    response = client.get("/static/20250713185244.png", headers={"Range": "bytes=0-99"})
+    assert response.status_code == 206
+    assert len(response.data) == 100
+
+    assert client.get("/static/missing.png").status_code == 404
+
+
+def test_static_assets_use_precompressed_sidecars(app, client, monkeypatch, tmp_path):
+    import gzip
+
+    monkeypatch.setattr(app, "root_path", str(tmp_path))
+    (tmp_path / "static").mkdir()
+    svg = b"<svg xmlns='http://www.w3.org/2000/svg'/>"
+    (tmp_path / "static" / "logo.svg").write_bytes(svg)
+    (tmp_path / "static" / "logo.svg.gz").write_bytes(gzip.compress(svg))
+
+    response = client.get("/static/logo.svg", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.mimetype == "image/svg+xml"
+    assert gzip.decompress(response.data) == svg
+
+    response = client.get("/static/logo.svg")
+    assert "Content-Encoding" not in response.headers
+    assert response.data == svg
+
+
+def test_sustainability_report_is_cached(client, monkeypatch):
+    from llm_cache import LLMCache, MemoryBackend
+
+    calls = []
+
+    class Model:
+        def generate_content(self, prompt, generation_config=None):
+            calls.append(prompt)
+            return type("Response", (), {"text": "Cached report"})()
+
+    monkeypatch.setattr("app.gemini_model", Model())
+    monkeypatch.setattr("app.llm_cache", LLMCache(MemoryBackend()))
+
+    body = {"material": "Hemp", "quantity": 2}
+    for _ in range(2):
+        response = client.post("/sustainability-report", json=body)
+        assert json.loads(response.data)["report"] == "Cached report"
+    assert len(calls) == 1
+
+
+def parse_sse(body):
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_sustainability_report_stream(client, monkeypatch):
+    from llm_cache import LLMCache, MemoryBackend
+
+    class Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    class Model:
+        def generate_content(self, prompt, generation_config=None, stream=False):
+            assert stream
+            return iter([Chunk("Hemp is "), Chunk("low impact.")])
+
+    monkeypatch.setattr("app.gemini_model", Model())
+    monkeypatch.setattr("app.llm_cache", LLMCache(MemoryBackend()))
+
+    response = client.post(
+        "/sustainability-report/stream", json={"material": "Hemp", "quantity": 2}
+    )
+    assert response.mimetype == "text/event-stream"
+    events = parse_sse(response.get_data(as_text=True))
+    assert events[0][0] == "metrics"
+    assert "".join(e[1]["text"] for e in events if e[0] == "token") == (
+        "Hemp is low impact."
+    )
+    assert events[-1] == ("done", {"status": "success"})
+
+    # The streamed report now serves the non-streaming endpoint from cache
+    response = client.post(
+        "/sustainability-report", json={"material": "Hemp", "quantity": 2}
+    )
+    assert json.loads(response.data)["report"] == "Hemp is low impact."
+
+
+def test_sustainability_report_stream_falls_back(client, monkeypatch):
+    monkeypatch.setattr("app.gemini_model", None)
+
+    response = client.post("/sustainability-report/stream", json={"material": "Hemp"})
+    events = parse_sse(response.get_data(as_text=True))
+    text = "".join(e[1]["text"] for e in events if e[0] == "token")
+    assert "SUSTAINABILITY REPORT" in text
+    assert events[-1][0] == "done"
+
+
+def test_footprint_batch(client):
+    body = "\n".join(
+        [
+            '{"product_id": "tee", "material": "Organic Cotton", "quantity": 0.2}',
+            '{"product_id": "tee", "material": "Hemp", "quantity": 0.1}',
+            '{"product_id": "bag", "material": "Cork Fabric", "quantity": 1}',
+        ]
+    )
+    response = client.post(
+        "/footprint/batch", data=body, content_type="application/x-ndjson"
+    )
+    assert response.status_code == 200
+    records = [
+        json.loads(line) for line in response.get_data(as_text=True).splitlines()
+    ]
+    assert [r["type"] for r in records] == ["line"] * 3 + ["product"] * 2 + ["catalog"]
+    assert records[-1]["water_l"] == round(2700 * 0.2 + 400 * 0.1 + 50, 1)
+
+    csv_body = "product_id,material,quantity\ntee,Hemp,1\n"
+    response = client.post(
+        "/footprint/batch?lines=0", data=csv_body, content_type="text/csv"
+    )
+    records = [
+        json.loads(line) for line in response.get_data(as_text=True).splitlines()
+    ]
+    assert [r["type"] for r in records] == ["product", "catalog"]
+
+    response = client.post(
+        "/footprint/batch",
+        data='{"material": "Hemp"}',
+        content_type="application/x-ndjson",
+    )
+    assert response.status_code == 400
+
+
+def test_import_is_fork_safe():
+    # Gunicorn preloads the app and forks workers from it; threads started at
+    # import time would not exist in the workers
+    script = "import threading, app; print(threading.active_count())"
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        env={**os.environ, "HF_TOKEN": os.getenv("HF_TOKEN", "test")},
+        check=True,
+    )
+    assert result.stdout.strip().splitlines()[-1] == "1"
+
+
+def test_startup_stays_within_budget():
+    # Health checks and /materials must be served without importing the ML
+    # stack or the model clients, which load on first use (or in warm())
+    budget = float(os.getenv("STARTUP_BUDGET_SECONDS", "1.5"))
+    script = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+client = app.app.test_client()
+statuses = [client.get("/health").status_code, client.get("/materials").status_code]
+heavy = ["sklearn", "pandas", "google.generativeai", "huggingface_hub"]
+print(json.dumps({
+    "elapsed": elapsed,
+    "statuses": statuses,
+    "loaded": [name for name in heavy if name in sys.modules],
+}))
+"""
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        env={**os.environ, "HF_TOKEN": os.getenv("HF_TOKEN", "test")},
+        check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    assert report["statuses"] == [200, 200]
+    assert report["loaded"] == []
+    assert report["elapsed"] < budget
+
+
+def test_admin_catalog_endpoints(client, monkeypatch):
+    from catalog_manager import CatalogManager, CatalogSnapshot
+    from enhanced_manufacturer_matcher import ManufacturerMatcher
+    from materials_repository import MaterialsRepository
+
+    manager = CatalogManager(
+        lambda: CatalogSnapshot(
+            ManufacturerMatcher("manufacturers.csv"),
+            MaterialsRepository("materials_enriched.csv"),
+        )
+    )
+    monkeypatch.setattr("app.catalogs", manager)
+
+    monkeypatch.delenv("ADMIN_TOKEN", raising=False)
+    assert client.get("/admin/catalog").status_code == 403
+    monkeypatch.setenv("ADMIN_TOKEN", "secret")
+    assert client.get("/admin/catalog").status_code == 401
+    auth = {"Authorization": "Bearer secret"}
+
+    status = client.get("/admin/catalog", headers=auth).get_json()
+    assert status["source"] == "csv" and status["suppliers"] == 30
+
+    response = client.post(
+        "/admin/catalog/suppliers",
+        json={
+            "upsert": [
+                {
+                    "Manufacturer_Name": "EcoMakerNew",
+                    "City": "Pune",
+                    "Supported_Materials": "Hemp",
+                    "Certifications": "GOTS",
+                    "Max_Weekly_Capacity": 5000,
+                }
+            ]
+        },
+        headers=auth,
+    )
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data["suppliers"] == 31 and data["persisted"] is False
+    assert "this worker only" in data["warning"]
+    suppliers = client.get("/suppliers?material=Hemp&region=Pune").get_json()
+    assert suppliers["suppliers"][0]["Manufacturer_Name"] == "EcoMakerNew"
+
+    bad = client.post(
+        "/admin/catalog/suppliers",
+        json={"upsert": [{"City": "Nowhere"}]},
+        headers=auth,
+    )
+    assert bad.status_code == 400
+
+    reloaded = client.post("/admin/catalog/reload?wait=1", headers=auth).get_json()
+    assert reloaded["suppliers"] == 30 and reloaded["reloads"] == 1
+    assert "CATALOG_POLL_INTERVAL" in reloaded["warning"]
+
+    # With polling on, the other workers follow and there is nothing to warn about
+    manager.poll_interval = 60
+    reloaded = client.post("/admin/catalog/reload?wait=1", headers=auth).get_json()
+    assert "warning" not in reloaded
@@ -0,0 +1,28 @@
+import json
+
+from benchmarks.run import compare, run_size
+from benchmarks.synthetic import generate_manufacturers, generate_queries
+from enhanced_manufacturer_matcher import ManufacturerMatcher
+
+
+def test_synthetic_catalog_is_seeded_and_loadable(tmp_path):
+    df = generate_manufacturers(500, seed=7)
+    assert df.equals(generate_manufacturers(500, seed=7))
+    assert not df.equals(generate_manufacturers(500, seed=8))
+    assert list(df.columns) == list(ManufacturerMatcher("manufacturers.csv").df.columns)
+
+    df.to_csv(tmp_path / "manufacturers.csv", index=False)
+    matcher = ManufacturerMatcher(str(tmp_path / "manufacturers.csv"))
+    query = generate_queries(1, seed=7)[0]
+    assert matcher.find_top_suppliers(query["material"], top_n=3)
+
+
+def test_run_size_reports_json_results():
+    result = run_size(300, repeat=1, queries=10, requests_per_endpoint=3, lines=2000)
+
+    assert result["rows"] == 300
+    assert result["matcher"]["query_single"]["runs"] == 10
+    assert set(result["http"]) >= {"GET /suppliers", "POST /create-product"}
+    report = json.loads(json.dumps({"results": {"tiny": result}}))
+    ratios = compare(report, report)["tiny"]
+    assert ratios["matcher.query_single"] == 1.0
@@ -0,0 +1,86 @@
+import os
+import shutil
+
+import pytest
+
+from catalog import CatalogError, build_catalog, load_matcher, open_catalog
+from enhanced_manufacturer_matcher import ManufacturerMatcher
+from materials_repository import MaterialsRepository
+
+
+def test_catalog_matches_csv(tmp_path):
+    root = str(tmp_path / "catalog")
+    build_catalog(root)
+    catalog = open_catalog(root)
+
+    from_csv = ManufacturerMatcher("manufacturers.csv")
+    from_catalog = catalog.matcher()
+    assert from_catalog.catalog_version == from_csv.catalog_version
+    for material, region in [("Organic Cotton", None), ("hemp", "a"), ("Cork", None)]:
+        assert from_catalog.find_top_suppliers(
+            material, region, top_n=5
+        ) == from_csv.find_top_suppliers(material, region, top_n=5)
+    assert from_catalog.find_nearest_suppliers(
+        20, 75, k=3
+    ) == from_csv.find_nearest_suppliers(20, 75, k=3)
+
+    materials = catalog.materials()
+    assert materials.names == MaterialsRepository("materials_enriched.csv").names
+    assert materials.footprint("Hemp", 2.0) == (3.6, 800.0)
+
+
+def test_missing_catalog_falls_back_to_csv(tmp_path):
+    catalog = open_catalog(str(tmp_path / "missing"))
+    assert catalog is None
+    assert len(load_matcher(catalog).df) == 30
+
+
+def test_rebuild_keeps_versions_and_rejects_corruption(tmp_path):
+    root = str(tmp_path / "catalog")
+    first = build_catalog(root)
+    # Same sources produce the same version, which stays in place
+    assert build_catalog(root).directory == first.directory
+
+    with open(f"{first.directory}/suppliers.npz", "ab") as f:
+        f.write(b"corrupt")
+    with pytest.raises(CatalogError):
+        open_catalog(root)
+
+
+def test_open_checks_sizes_and_verifies_checksums_on_request(tmp_path):
+    root = str(tmp_path / "catalog")
+    catalog = build_catalog(root)
+
+    # Same size, different bytes: only a checksum catches it
+    path = f"{catalog.directory}/vectorizer.pkl"
+    with open(path, "r+b") as f:
+        first = f.read(1)
+        f.seek(0)
+        f.write(bytes([first[0] ^ 0xFF]))
+    assert open_catalog(root).version == catalog.version
+    with pytest.raises(CatalogError):
+        open_catalog(root, verify=True)
+
+
+def test_open_warns_when_sources_changed(tmp_path, caplog, monkeypatch):
+    root = str(tmp_path / "catalog")
+    csv = tmp_path / "manufacturers.csv"
+    shutil.copy("manufacturers.csv", csv)
+    build_catalog(root, str(csv))
+    caplog.clear()
+
+    # Unchanged sizes and mtimes are trusted without hashing
+    with monkeypatch.context() as m:
+        m.setattr("catalog._sha256", None)
+        open_catalog(root, [str(csv), "materials_enriched.csv"])
+    assert not caplog.records
+
+    # A touched but unchanged file is hashed and found current
+    os.utime(csv, ns=(0, 0))
+    open_catalog(root, [str(csv)])
+    assert not caplog.records
+
+    with open(csv, "a", encoding="utf-8") as f:
+        f.write("EcoMaker99,Pune,18.5,73.8,Hemp,GOTS,1000\n")
+    open_catalog(root, [str(csv)])
+    assert "manufacturers.csv" in caplog.text
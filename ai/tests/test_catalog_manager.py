@@ -0,0 +1,103 @@
+import os
+import shutil
+import time
+
+from catalog_manager import CatalogManager, CatalogSnapshot
+from enhanced_manufacturer_matcher import ManufacturerMatcher
+from materials_repository import MaterialsRepository
+
+
+def csv_loader(directory):
+    manufacturers = os.path.join(directory, "manufacturers.csv")
+    materials = os.path.join(directory, "materials_enriched.csv")
+
+    def load():
+        return CatalogSnapshot(
+            ManufacturerMatcher(manufacturers),
+            MaterialsRepository(materials),
+            sources=(manufacturers, materials),
+        )
+
+    return load
+
+
+def copy_sources(tmp_path):
+    for name in ("manufacturers.csv", "materials_enriched.csv"):
+        shutil.copy(name, tmp_path / name)
+
+
+def drop_last_supplier(tmp_path):
+    path = tmp_path / "manufacturers.csv"
+    lines = path.read_text().splitlines(keepends=True)
+    path.write_text("".join(lines[:-1]))
+
+
+def test_reload_swaps_snapshot_atomically(tmp_path):
+    copy_sources(tmp_path)
+    manager = CatalogManager(csv_loader(tmp_path))
+    before = manager.current
+    assert not manager.changed()
+
+    drop_last_supplier(tmp_path)
+    assert manager.changed()
+    after = manager.reload().result(timeout=10)
+
+    assert manager.current is after and manager.reloads == 1
+    assert len(after.matcher.df) == len(before.matcher.df) - 1
+    # Readers holding the old snapshot keep a complete, unchanged view
+    assert len(before.matcher.df) == 30
+    assert not manager.changed()
+
+
+def test_failed_reload_keeps_current_snapshot(tmp_path):
+    copy_sources(tmp_path)
+    manager = CatalogManager(csv_loader(tmp_path))
+    before = manager.current
+    os.remove(tmp_path / "manufacturers.csv")
+
+    future = manager.reload()
+    assert future.exception(timeout=10) is not None
+    assert manager.current is before
+    assert manager.last_error
+
+
+def test_watcher_picks_up_changes(tmp_path):
+    copy_sources(tmp_path)
+    manager = CatalogManager(csv_loader(tmp_path), poll_interval=0.05)
+    assert len(manager.current.matcher.df) == 30
+    manager.start_watching()
+    drop_last_supplier(tmp_path)
+
+    deadline = time.monotonic() + 10
+    while manager.reloads == 0 and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert manager.reloads == 1
+    assert len(manager.current.matcher.df) == 29
+
+
+def test_supplier_delta_is_persisted_to_catalog(tmp_path):
+    from catalog import build_catalog, open_catalog
+
+    root = str(tmp_path / "catalog")
+    build_catalog(root)
+
+    def load():
+        catalog = open_catalog(root)
+        return CatalogSnapshot(
+            catalog.matcher(),
+            catalog.materials(),
+            catalog,
+            (os.path.join(root, "CURRENT"),),
+        )
+
+    manager = CatalogManager(
+        load, persist=lambda catalog, matcher: catalog.with_suppliers(matcher)
+    )
+    snapshot, refit, persisted = manager.apply_supplier_delta(removals=["EcoMaker2"])
+    assert persisted and not refit
+    assert not manager.changed()
+
+    # Another process loading the catalog now sees the delta
+    reloaded = load()
+    assert reloaded.version == snapshot.version
+    assert "EcoMaker2" not in reloaded.matcher.df["Manufacturer_Name"].tolist()
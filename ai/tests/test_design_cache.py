@@ -0,0 +1,67 @@
+import os
+
+from PIL import Image
+
+from design_cache import DesignCache
+from design_visualization import design_cache_key, is_cacheable, placeholder_design
+from placeholders import Placeholder
+
+
+def save(image, path):
+    image.save(path)
+
+
+def test_key_covers_prompt_and_generation_parameters():
+    assert design_cache_key("tee") == design_cache_key("tee", width=1024)
+    assert design_cache_key("tee") != design_cache_key("tee", width=512)
+    assert design_cache_key("tee") != design_cache_key("hoodie")
+
+
+def test_key_does_not_need_a_working_backend(monkeypatch):
+    monkeypatch.setenv("IMAGE_BACKEND", "http")
+    monkeypatch.delenv("IMAGE_BACKEND_URL", raising=False)
+    monkeypatch.setattr("design_visualization._backend", None)
+    assert design_cache_key("tee") != design_cache_key("hoodie")
+
+
+def test_placeholders_are_not_cacheable():
+    assert not is_cacheable(placeholder_design("tee", 64, 64))
+    assert not is_cacheable(Placeholder(64, 64))
+    assert is_cacheable(Image.new("RGB", (4, 4)))
+
+
+def test_least_recently_used_designs_are_evicted(tmp_path):
+    cache = DesignCache(str(tmp_path), max_bytes=10**9)
+    image = Image.new("RGB", (64, 64), color="red")
+    keys = [f"{i:064x}" for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.store(key, image, save)
+        os.utime(cache.path(key), (age, age))
+
+    assert cache.lookup(keys[0]) == cache.filename(keys[0])
+    cache.max_bytes = 2 * os.path.getsize(cache.path(keys[0]))
+    cache.evict()
+
+    assert cache.lookup(keys[1]) is None
+    assert cache.lookup(keys[0]) and cache.lookup(keys[2])
+
+
+def test_directory_is_scanned_only_past_the_bound(tmp_path, monkeypatch):
+    cache = DesignCache(str(tmp_path), max_bytes=10**9)
+    scans = []
+    real_scandir = os.scandir
+    monkeypatch.setattr(
+        "design_cache.os.scandir", lambda path: scans.append(path) or real_scandir(path)
+    )
+    image = Image.new("RGB", (64, 64), color="red")
+    keys = [f"{i:064x}" for i in range(3)]
+    for key in keys:
+        cache.store(key, image, save)
+    assert len(scans) == 1  # the first store learns the size on disk
+
+    size = os.path.getsize(cache.path(keys[0]))
+    cache.max_bytes = 3 * size + 10
+    (tmp_path / f"{keys[2]}-thumb.webp").write_bytes(b"x" * 20)
+    cache.add(20)  # variants are counted once they are written
+    assert len(scans) == 2
+    assert cache.stats()["evictions"] == 1
@@ -0,0 +1,59 @@
+import threading
+
+import pytest
+
+from design_jobs import (
+    DONE,
+    FAILED,
+    RUNNING,
+    LocalJobQueue,
+    QueueFull,
+    SQLiteJobQueue,
+)
+
+
+def wait_for_state(jobs, job_id, *states):
+    job = jobs.get(job_id)
+    while job["state"] not in states:
+        job = jobs.wait(job_id, since=job["updated_at"], timeout=1)
+    return job
+
+
+def test_queue_applies_backpressure_and_reports_results():
+    release = threading.Event()
+    jobs = LocalJobQueue(workers=1, max_pending=1)
+
+    running = jobs.submit(release.wait, 5)
+    wait_for_state(jobs, running, RUNNING)
+    queued = jobs.submit(lambda: "ok")
+    with pytest.raises(QueueFull):
+        jobs.submit(lambda: "rejected")
+
+    release.set()
+    assert wait_for_state(jobs, running, DONE)["result"] is True
+    assert wait_for_state(jobs, queued, DONE)["result"] == "ok"
+
+
+def test_failed_jobs_record_the_error():
+    jobs = LocalJobQueue(workers=1)
+
+    def boom():
+        raise RuntimeError("upstream down")
+
+    job = wait_for_state(jobs, jobs.submit(boom), DONE, FAILED)
+    assert job["state"] == FAILED
+    assert job["error"] == "upstream down"
+
+
+def test_sqlite_queue_shares_job_states_between_workers(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    accepting = SQLiteJobQueue(path, workers=1, poll_interval=0.01)
+    other = SQLiteJobQueue(path, workers=1, poll_interval=0.01)
+
+    job_id = accepting.submit(lambda: {"filename": "design.png"})
+    job = wait_for_state(other, job_id, DONE)
+    assert job["result"] == {"filename": "design.png"}
+
+    # Nothing changes after a finished job, so waiting on it times out
+    assert other.wait(job_id, since=job["updated_at"], timeout=0.05) == job
+    assert other.get("unknown") is None
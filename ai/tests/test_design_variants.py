@@ -0,0 +1,24 @@
+from PIL import Image
+
+from design_variants import formats, negotiate, variant_name, write_variants
+
+
+def test_variants_are_written_and_negotiated(tmp_path):
+    path = tmp_path / "design.png"
+    image = Image.new("RGB", (1024, 1024), color="white")
+    image.save(path)
+    write_variants(image, str(path))
+
+    with Image.open(tmp_path / "design-thumb.png") as thumb:
+        assert thumb.size == (256, 256)
+
+    best = formats()[0]
+    mimetype = f"image/{best}"
+    assert negotiate(str(tmp_path), "design.png", {mimetype}) == f"design.{best}"
+    assert negotiate(str(tmp_path), "design.png", {mimetype}, "thumb") == (
+        variant_name("design.png", "thumb", best)
+    )
+    assert negotiate(str(tmp_path), "design.png", {"image/png"}, "medium") == (
+        "design-medium.png"
+    )
+    assert negotiate(str(tmp_path), "design.png", set(), "huge") == "design.png"
@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from enrich_materials import (
+    Checkpoint,
+    ClimatiqFetcher,
+    FetchError,
+    enrich,
+    fetch_with_retry,
+    read_rows,
+    write_rows,
+)
+from materials_repository import MaterialsRepository
+from retry_after import parse_retry_after
+
+FACTORS = {"textiles-type_hemp": 1.7, "textiles-type_cork_fabric": 0.8}
+
+
+@pytest.fixture
+def stub_server():
+    """Local stand-in for the estimate API that fails each activity once."""
+    calls = []
+    seen = set()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            activity = body["emission_factor"]["activity_id"]
+            calls.append(activity)
+            if activity not in seen:
+                seen.add(activity)
+                self.send_response(503)
+                self.end_headers()
+                return
+            if activity not in FACTORS:
+                self.send_response(400)
+                self.end_headers()
+                return
+            payload = json.dumps({"co2e": FACTORS[activity]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}", calls
+    server.shutdown()
+    server.server_close()
+
+
+def test_enrich_retries_checkpoints_and_resumes(stub_server, tmp_path):
+    base_url, calls = stub_server
+    rows = [
+        r
+        for r in read_rows("materials_enriched.csv")
+        if r["Material"] in ("Hemp", "Cork Fabric", "Recycled Wool")
+    ]
+    fetch = ClimatiqFetcher("test-key", base_url=base_url, timeout=5)
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+
+    enriched = enrich(
+        rows, fetch, Checkpoint(checkpoint_path), concurrency=3, backoff=0.01
+    )
+    by_name = {r["Material"]: r for r in enriched}
+    assert by_name["Hemp"]["live_co2e_kg"] == 1.7
+    assert by_name["Cork Fabric"]["co2e_fetch_error"] == ""
+    assert by_name["Recycled Wool"]["live_co2e_kg"] == ""
+    assert "HTTP 400" in by_name["Recycled Wool"]["co2e_fetch_error"]
+    # Each material failed once with a 503 before its final answer
+    assert len(calls) == 6
+
+    # A rerun only refetches the row that failed
+    calls.clear()
+    enrich(rows, fetch, Checkpoint(checkpoint_path), concurrency=3, backoff=0.01)
+    assert calls == ["textiles-type_recycled_wool"]
+
+    output = str(tmp_path / "materials_enriched.csv")
+    write_rows(output, enriched)
+    repo = MaterialsRepository(output)
+    assert repo.footprint("Hemp", 2.0)[0] == 3.4
+    # No live value: the catalog CO2_kg_per_kg (2.5) is used instead
+    assert repo.footprint("Recycled Wool", 2.0)[0] == 5.0
+
+
+def test_failed_refresh_keeps_previous_values(tmp_path):
+    def down(material):
+        raise FetchError("HTTP 503")
+
+    checkpoint = Checkpoint(str(tmp_path / "checkpoint.jsonl"))
+    checkpoint.record("Hemp", co2e_kg=1.7)
+    rows = [
+        {"Material": "Hemp", "live_co2e_kg": ""},
+        {"Material": "Cork Fabric", "live_co2e_kg": "0.8"},
+    ]
+
+    # max_age=0 makes the checkpointed value stale, so both are refetched
+    enriched = enrich(rows, down, checkpoint, max_age=0, retries=0)
+    assert [r["live_co2e_kg"] for r in enriched] == [1.7, 0.8]
+    assert all("HTTP 503" in r["co2e_fetch_error"] for r in enriched)
+
+    # The failures are retried on the next run and still keep their values
+    resumed = Checkpoint(checkpoint.path)
+    assert not resumed.is_fresh("Hemp", max_age=3600, now=time.time())
+    assert resumed.entries["Cork Fabric"]["co2e_kg"] == 0.8
+
+
+def test_retry_after_is_parsed_and_capped(monkeypatch):
+    assert parse_retry_after("7") == 7.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412470) == 10
+    assert parse_retry_after("soon") is None
+
+    delays = []
+    monkeypatch.setattr("enrich_materials.time.sleep", delays.append)
+    monkeypatch.setattr("enrich_materials.random.uniform", lambda a, b: 1.0)
+    attempts = iter([FetchError("busy", retryable=True, retry_after=3600)])
+
+    def fetch(material):
+        error = next(attempts, None)
+        if error:
+            raise error
+        return 1.0
+
+    assert fetch_with_retry(fetch, "Hemp", max_backoff=30) == 1.0
+    assert delays == [30]
@@ -0,0 +1,60 @@
+import io
+
+import numpy as np
+import pytest
+
+from footprint import (
+    FootprintEngine,
+    FootprintTotals,
+    InvalidLine,
+    parse_csv,
+    parse_jsonl,
+)
+from materials_repository import MaterialsRepository
+
+
+def test_engine_scores_lines_and_accumulates_totals():
+    repo = MaterialsRepository("materials_enriched.csv")
+    engine = FootprintEngine(repo, chunk_size=2)
+    totals = FootprintTotals()
+    lines = [
+        ("tee", "Organic Cotton", 0.2),
+        ("tee", "Recycled Polyester", 0.05),
+        ("bag", "Hemp", 1.0),
+        ("bag", "Unobtainium", 3.0),
+    ]
+
+    results = list(engine.score(iter(lines), totals))
+
+    assert [r["found"] for r in results] == [True, True, True, False]
+    assert results[3]["co2_kg"] is None
+    # No live factors are available, so the catalog CO2 factors apply
+    assert results[0]["co2_kg"] == round(2.1 * 0.2, 3)
+
+    products = {p["product_id"]: p for p in totals.products()}
+    assert products["tee"]["water_l"] == round(2700 * 0.2 + 100 * 0.05, 1)
+    assert products["bag"]["unknown_lines"] == 1
+    catalog = totals.catalog()
+    assert catalog["lines"] == 4 and catalog["unknown_materials"] == ["Unobtainium"]
+    assert np.isclose(catalog["co2_kg"], 2.1 * 0.2 + 1.5 * 0.05 + 1.8)
+
+
+def test_parse_csv_streams_rows():
+    data = b"product_id,material,quantity\np1,Hemp,2\np2,Cork Fabric,0.5\n"
+    assert list(parse_csv(io.BytesIO(data))) == [
+        ("p1", "Hemp", 2.0),
+        ("p2", "Cork Fabric", 0.5),
+    ]
+
+
+def test_parsers_reject_non_finite_and_negative_quantities():
+    for line in (
+        b'{"product_id": "p", "material": "Hemp", "quantity": NaN}',
+        b'{"product_id": "p", "material": "Hemp", "quantity": -5}',
+    ):
+        with pytest.raises(InvalidLine):
+            list(parse_jsonl(io.BytesIO(line)))
+    for quantity in (b"inf", b"-5"):
+        data = b"product_id,material,quantity\np1,Hemp," + quantity + b"\n"
+        with pytest.raises(InvalidLine):
+            list(parse_csv(io.BytesIO(data)))
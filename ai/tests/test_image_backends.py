@@ -0,0 +1,175 @@
+import io
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from PIL import Image
+
+from image_backends import (
+    BackendError,
+    BackendUnavailable,
+    CircuitBreaker,
+    HTTPBackend,
+    LocalBackend,
+    ResilientBackend,
+    _http_error,
+    create_image_backend,
+    image_backend_model,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FlakyBackend:
+    model = "flaky"
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def generate(self, prompt, **params):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise BackendError("HTTP 503", retryable=True)
+        return Image.new("RGB", (4, 4))
+
+
+@pytest.fixture
+def stub_server():
+    """Image endpoint that answers 503 once, then a PNG sized as requested."""
+    requests_seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            requests_seen.append(body)
+            if len(requests_seen) == 1:
+                self.send_response(503)
+                self.end_headers()
+                return
+            params = body["parameters"]
+            buffer = io.BytesIO()
+            Image.new("RGB", (params["width"], params["height"])).save(buffer, "PNG")
+            payload = buffer.getvalue()
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/generate", requests_seen
+    server.shutdown()
+    server.server_close()
+
+
+def test_local_backend_is_deterministic():
+    backend = LocalBackend()
+    first = backend.generate("green tee", width=64, height=48)
+    assert first.size == (64, 48)
+    assert first.tobytes() == backend.generate("green tee", width=64, height=48).tobytes()
+    assert first.tobytes() != backend.generate("blue tee", width=64, height=48).tobytes()
+
+
+def test_configured_model_is_known_without_building_the_backend(monkeypatch):
+    monkeypatch.setenv("IMAGE_BACKEND_URL", "http://images.internal/generate")
+    for backend in ("hf", "http", "local"):
+        monkeypatch.setenv("IMAGE_BACKEND", backend)
+        expected = create_image_backend("sdxl").model
+        assert image_backend_model("sdxl") == expected
+
+    monkeypatch.setenv("IMAGE_BACKEND", "bogus")
+    assert image_backend_model("sdxl") == "bogus"
+
+
+def test_retry_after_accepts_http_dates():
+    class Response:
+        status_code = 503
+        headers = {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}
+
+    class Failure(Exception):
+        response = Response()
+
+    error = _http_error(Failure())
+    assert error.retryable and error.retry_after == 0.0
+
+    Response.headers = {"Retry-After": "soon"}
+    assert _http_error(Failure()).retry_after is None
+
+
+def test_http_backend_retries_transient_errors(stub_server):
+    url, requests_seen = stub_server
+    backend = ResilientBackend(HTTPBackend(url, timeout=5), backoff=0.01)
+
+    image = backend.generate("tee", width=32, height=16, negative_prompt=None)
+
+    assert image.size == (32, 16)
+    assert len(requests_seen) == 2
+    assert requests_seen[-1] == {
+        "inputs": "tee",
+        "parameters": {"width": 32, "height": 16},
+    }
+    assert backend.status()["circuit"] == CircuitBreaker.CLOSED
+
+
+def test_circuit_opens_fails_fast_and_recovers():
+    clock = FakeClock()
+    upstream = FlakyBackend(failures=2)
+    backend = ResilientBackend(
+        upstream,
+        retries=0,
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=clock),
+    )
+
+    for _ in range(2):
+        with pytest.raises(BackendError):
+            backend.generate("tee")
+    assert backend.breaker.state == CircuitBreaker.OPEN
+
+    # Open: rejected without calling the upstream
+    with pytest.raises(BackendUnavailable):
+        backend.generate("tee")
+    assert upstream.calls == 2
+
+    # After the reset timeout a trial call goes through and closes it
+    clock.now = 31
+    assert backend.breaker.state == CircuitBreaker.HALF_OPEN
+    assert backend.generate("tee").size == (4, 4)
+    assert backend.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_concurrency_is_bounded():
+    release = threading.Event()
+
+    class SlowBackend:
+        model = "slow"
+
+        def generate(self, prompt, **params):
+            release.wait(5)
+            return Image.new("RGB", (4, 4))
+
+    backend = ResilientBackend(SlowBackend(), max_concurrency=1, acquire_timeout=0.05)
+    holder = threading.Thread(target=backend.generate, args=("tee",))
+    holder.start()
+    while backend.status()["in_flight"] == 0:
+        time.sleep(0.001)
+    try:
+        with pytest.raises(BackendUnavailable):
+            backend.generate("hoodie")
+    finally:
+        release.set()
+        holder.join()
+    assert backend.status()["in_flight"] == 0
@@ -0,0 +1,56 @@
+import threading
+import time
+
+import pytest
+
+from llm_cache import LLMCache, MemoryBackend, SQLiteBackend
+
+
+def test_concurrent_identical_requests_make_one_call():
+    cache = LLMCache(MemoryBackend())
+    calls = []
+
+    def generate():
+        calls.append(1)
+        time.sleep(0.1)
+        return "narrative"
+
+    key = cache.key("model", "prompt", {"temperature": 0.5})
+    results = []
+    threads = [
+        threading.Thread(
+            target=lambda: results.append(cache.get_or_generate(key, generate))
+        )
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["narrative"] * 8
+    assert len(calls) == 1
+    assert cache.get_or_generate(key, generate) == "narrative"
+    assert cache.stats()["hits"] == 1
+
+
+def test_failures_are_not_cached():
+    cache = LLMCache(MemoryBackend())
+
+    def fail():
+        raise RuntimeError("quota exceeded")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_generate("k", fail)
+    assert cache.get_or_generate("k", lambda: "ok") == "ok"
+
+
+def test_sqlite_backend_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    LLMCache(SQLiteBackend(path)).get_or_generate("k", lambda: "shared")
+
+    other = LLMCache(SQLiteBackend(path, maxsize=1))
+    assert other.get_or_generate("k", lambda: "regenerated") == "shared"
+
+    other.get_or_generate("k2", lambda: "newer")
+    assert other.get_or_generate("k", lambda: "evicted") == "evicted"
@@ -0,0 +1,81 @@
+import json
+import logging
+
+import app_monitoring
+from app_monitoring import BackgroundHandler, JsonFormatter
+from enhanced_manufacturer_matcher import ManufacturerMatcher
+
+
+def test_matcher_queries_log_nothing_at_info(capsys, caplog):
+    matcher = ManufacturerMatcher("manufacturers.csv")
+    capsys.readouterr()
+    caplog.clear()
+
+    with caplog.at_level(logging.INFO):
+        assert matcher.find_top_suppliers("Organic Cotton", min_capacity=7, top_n=3)
+        matcher.find_top_suppliers_many([("Hemp", None, 7)])
+
+    assert capsys.readouterr() == ("", "")
+    assert caplog.records == []
+
+
+def test_background_handler_writes_json_lines(tmp_path):
+    target = logging.FileHandler(tmp_path / "app.log")
+    target.setFormatter(JsonFormatter())
+    handler = BackgroundHandler([target])
+    logger = logging.getLogger("tests.background")
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning('before "start" is written inline')
+        handler.start()
+        logger.warning("queued for %s", "the writer")
+        handler.stop()
+    finally:
+        logger.removeHandler(handler)
+        target.close()
+
+    lines = (tmp_path / "app.log").read_text(encoding="utf-8").splitlines()
+    entries = [json.loads(line) for line in lines]
+    assert [e["message"] for e in entries] == [
+        'before "start" is written inline',
+        "queued for the writer",
+    ]
+    assert entries[0]["level"] == "WARNING"
+    assert handler.dropped == 0
+
+
+def test_sampled_requests_log_debug_traces(client, monkeypatch, caplog):
+    monkeypatch.setattr("app.generate_design", lambda prompt: None)
+    monkeypatch.setattr("app.gemini_model", None)
+    monkeypatch.setattr(app_monitoring, "TRACE_SAMPLE_RATE", 1.0)
+    payload = {"prompt": "Traced tee", "material": "Hemp", "region": "Traceville"}
+    response = client.post("/create-product", json=payload)
+
+    trace_id = response.headers["X-Trace-Id"]
+    traces = [r for r in caplog.records if getattr(r, "trace_id", None) == trace_id]
+    # Matching runs on the pipeline pool and still carries the request's trace
+    assert any(
+        r.name == "enhanced_manufacturer_matcher" and r.levelno == logging.DEBUG
+        for r in traces
+    )
+
+    monkeypatch.setattr(app_monitoring, "TRACE_SAMPLE_RATE", 0)
+    caplog.clear()
+    payload["region"] = "Untraced"
+    response = client.post("/create-product", json=payload)
+    assert "X-Trace-Id" not in response.headers
+    assert not [r for r in caplog.records if r.levelno == logging.DEBUG]
+
+
+def test_create_app_registers_logging_metrics_once(client):
+    import app as app_module
+
+    app_module.create_app()
+    body = client.get("/metrics").get_data(as_text=True)
+    samples = [
+        line
+        for line in body.splitlines()
+        if line.startswith("log_records_dropped_total")
+    ]
+    assert len(samples) == 1
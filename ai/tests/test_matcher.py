@@ -1,3 +1,5 @@
+import pytest
+
 from enhanced_manufacturer_matcher import ManufacturerMatcher
 
 
@@ -14,3 +16,158 @@ def test_matcher_basic():
     # Score order should be descending
     scores = [r["final_score"] for r in results]
     assert scores == sorted(scores, reverse=True)
+
+
+def test_index_candidates_match_dataframe_filters():
+    matcher = ManufacturerMatcher("manufacturers.csv")
+    df = matcher.df
+    expected = df[
+        (df["Max_Weekly_Capacity"] >= 500)
+        & df["Supported_Materials"].str.contains("cotton", case=False)
+        & df["City"].str.contains("a", case=False)
+    ].index.tolist()
+    rows = matcher.index.candidates("cotton", region="a", min_capacity=500)
+    assert rows.tolist() == expected
+
+
+def test_certification_bitmasks_filter_and_weight():
+    matcher = ManufacturerMatcher("manufacturers.csv")
+    df = matcher.df
+    certs = df["Certifications"].str.split(", ")
+
+    # Priority certifications take the low bits, in priority order
+    assert matcher.index.cert_names[:3] == ["GOTS", "OEKO-TEX", "Fair Trade"]
+    required = matcher.index.cert_mask(["gots", "FSC"])
+    rows = matcher.index.candidates("", cert_mask=required)
+    assert rows.tolist() == df[certs.apply({"GOTS", "FSC"}.issubset)].index.tolist()
+    assert matcher.index.cert_mask(["Unknown Cert"]) is None
+
+    results = matcher.find_top_suppliers("Cotton", certifications=["GOTS"], top_n=10)
+    assert results and all("GOTS" in r["Certifications"] for r in results)
+    assert matcher.find_top_suppliers("Cotton", certifications=["Nope"]) == []
+
+    # The default weighting counts the priority certifications a supplier holds
+    default = matcher.find_top_suppliers("Cotton", top_n=10)
+    for record in default:
+        held = set(record["Certifications"].split(", "))
+        assert record["cert_score"] == len(
+            held & {"GOTS", "OEKO-TEX", "Fair Trade", "GRS", "FSC"}
+        )
+
+    weighted = matcher.find_top_suppliers(
+        "Cotton", top_n=10, cert_weights={"B Corp": 2, "GOTS": 0}
+    )
+    for record in weighted:
+        assert record["cert_score"] == 2 * ("B Corp" in record["Certifications"])
+
+
+def test_find_top_suppliers_many_matches_single_queries():
+    matcher = ManufacturerMatcher("manufacturers.csv")
+    queries = [("Organic Cotton", None, 0), ("Recycled", "an", 500), ("Hemp", None, 0)]
+    batch = matcher.find_top_suppliers_many(queries, top_n=3)
+    assert batch == [matcher.find_top_suppliers(*q, top_n=3) for q in queries]
+
+
+def test_results_are_cached_per_catalog_version():
+    matcher = ManufacturerMatcher("manufacturers.csv")
+    first = matcher.find_top_suppliers("Organic Cotton", top_n=3)
+    again = matcher.find_top_suppliers("  organic cotton ", top_n=3)
+    assert again == first
+    assert matcher.cache.stats()["hits"] == 1
+
+    # Results from an older catalog version are never served
+    matcher.catalog_version = "reloaded"
+    assert matcher.find_top_suppliers("Organic Cotton", top_n=3) == first
+    assert matcher.cache.stats()["hits"] == 1
+
+
+def test_radius_filter_and_nearest_suppliers():
+    matcher = ManufacturerMatcher("manufacturers.csv")
+    ahmedabad = (23.02, 72.57)
+
+    nearby = matcher.find_top_suppliers(
+        "Cotton", near=ahmedabad, radius_km=1000, top_n=10
+    )
+    assert nearby and all(r["distance_km"] <= 1000 for r in nearby)
+
+    nearest = matcher.find_nearest_suppliers(*ahmedabad, k=3)
+    distances = [r["distance_km"] for r in nearest]
+    assert len(nearest) == 3 and distances == sorted(distances)
+    assert nearest[0]["City"] == "Ahmedabad"
+
+    blended = matcher.find_top_suppliers("Cotton", near=ahmedabad, distance_weight=1)
+    assert all(0 <= r["final_score"] <= 1 for r in blended)
+    for weight in (-3, 5, float("inf"), float("nan")):
+        with pytest.raises(ValueError):
+            matcher.find_top_suppliers("Cotton", near=ahmedabad, distance_weight=weight)
+
+
+def test_apply_delta_reuses_vocabulary_and_leaves_original_untouched():
+    matcher = ManufacturerMatcher("manufacturers.csv")
+    original = matcher.df.copy()
+    new_supplier = {
+        "Manufacturer_Name": "EcoMakerNew",
+        "City": "Pune",
+        "Latitude": 18.52,
+        "Longitude": 73.86,
+        "Supported_Materials": "Hemp, Organic Cotton",
+        "Certifications": "GOTS, FSC",
+        "Max_Weekly_Capacity": 9999,
+    }
+
+    updated, refit = matcher.apply_delta([new_supplier], removals=["EcoMaker1"])
+    assert not refit
+    assert updated.vec is matcher.vec
+    assert updated.catalog_version != matcher.catalog_version
+    assert matcher.df.equals(original)
+
+    names = updated.df["Manufacturer_Name"].tolist()
+    assert "EcoMaker1" not in names and names[-1] == "EcoMakerNew"
+    # Incrementally built rows equal a full transform with the same vocabulary
+    expected = matcher.vec.transform(updated.df["Supported_Materials"])
+    assert abs(updated.index.tfidf - expected).max() < 1e-12
+    top = updated.find_top_suppliers("Hemp", region="Pune")
+    assert top[0]["Manufacturer_Name"] == "EcoMakerNew"
+
+    unseen = dict(new_supplier, Supported_Materials="Pineapple Leather")
+    refitted, refit = matcher.apply_delta([unseen])
+    assert refit and "pineapple" in refitted.vec.vocabulary_
+
+
+def test_certifications_beyond_one_mask_word(tmp_path):
+    import pandas as pd
+
+    many = ", ".join(["GOTS"] + [f"C{i}" for i in range(1, 60)])
+    suppliers = pd.DataFrame(
+        {
+            "Manufacturer_Name": ["Many", "Few", "None"],
+            "City": ["Pune"] * 3,
+            "Supported_Materials": ["Hemp"] * 3,
+            "Certifications": [many, "gots, C59", "C2"],
+            "Max_Weekly_Capacity": [1000] * 3,
+        }
+    )
+    suppliers.to_csv(tmp_path / "manufacturers.csv", index=False)
+    matcher = ManufacturerMatcher(str(tmp_path / "manufacturers.csv"))
+    index = matcher.index
+    # Spellings differing only in case share one bit
+    assert [n for n in index.cert_names if n.lower() == "gots"] == ["GOTS"]
+    assert len(index.cert_names) == 64
+
+    new = {
+        "Manufacturer_Name": "Newcomer",
+        "City": "Pune",
+        "Supported_Materials": "Hemp",
+        "Certifications": "C60, C59",
+        "Max_Weekly_Capacity": 1000,
+    }
+    updated, _ = matcher.apply_delta([new])
+    index = updated.index
+    assert index.cert_masks.shape == (4, 2)
+    rows = index.candidates("Hemp", cert_mask=index.cert_mask(["C59"]))
+    assert rows.tolist() == [0, 1, 3]
+    rows = index.candidates("Hemp", cert_mask=index.cert_mask(["C60", "C59"]))
+    assert rows.tolist() == [3]
+
+    weights = index.cert_weights({"C60": 1, "gots": 2, "C59": 4})
+    assert index.cert_scores([0, 1, 2, 3], weights).tolist() == [6, 6, 0, 5]
@@ -0,0 +1,26 @@
+import math
+
+import numpy as np
+
+from materials_repository import MaterialsRepository
+
+
+def test_lookup_is_case_insensitive_and_resolves_aliases():
+    repo = MaterialsRepository("materials_enriched.csv")
+    assert repo.get("  organic   COTTON ").name == "Organic Cotton"
+    assert repo.get("rPET").name == "Recycled Polyester"
+    assert repo.get("Unobtainium") is None
+    # No live emission factor was fetched, so CO2 falls back to the catalog
+    assert repo.footprint("hemp", 2.0) == (3.6, 800.0)
+    assert repo.footprint("Unobtainium", 1.0) is None
+
+
+def test_footprint_many_matches_single_lookups():
+    repo = MaterialsRepository(
+        "materials_enriched.csv", aliases={"wool": "Recycled Wool"}
+    )
+    co2, water, found = repo.footprint_many(["Hemp", "wool", "Unobtainium"], [1, 3, 2])
+    assert found.tolist() == [True, True, False]
+    assert water[:2].tolist() == [400.0, 450.0]
+    assert co2[:2].tolist() == [1.8, 7.5]
+    assert math.isnan(water[2]) and np.isnan(co2[2])
@@ -0,0 +1,82 @@
+import json
+
+import design_visualization
+from metrics import (
+    UPSTREAM_CALLS,
+    Counter,
+    Histogram,
+    Registry,
+    record_stage,
+    server_timing,
+)
+from placeholders import Placeholder
+
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    latency = registry.register(
+        Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1))
+    )
+    requests = registry.register(Counter("requests_total", "Requests", ("route",)))
+    for value in (0.05, 0.5, 5):
+        latency.observe(value, route='/a"b')
+    requests.inc(route="/a")
+
+    text = registry.render()
+    assert 'latency_seconds_bucket{route="/a\\"b",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{route="/a\\"b",le="1"} 2' in text
+    assert 'latency_seconds_bucket{route="/a\\"b",le="+Inf"} 3' in text
+    assert 'latency_seconds_count{route="/a\\"b"} 3' in text
+    assert 'requests_total{route="/a"} 1' in text
+    assert "# TYPE latency_seconds histogram" in text
+
+
+def test_server_timing_header_format():
+    header = server_timing([("matching", 0.0125, "ok"), ("design", 2, "timeout")], 2.5)
+    assert header == (
+        'matching;dur=12.5, design;dur=2000.0;desc="timeout", total;dur=2500.0'
+    )
+    # Outside a request the stage is still observed, just not reported
+    record_stage("matching", 0.01)
+
+
+def test_create_product_reports_stage_timings(client, monkeypatch):
+    monkeypatch.setattr("app.generate_design", lambda prompt: None)
+    monkeypatch.setattr("app.gemini_model", None)
+
+    response = client.post(
+        "/create-product", json={"prompt": "Timed tee", "material": "Hemp"}
+    )
+    stages = [
+        entry.split(";")[0] for entry in response.headers["Server-Timing"].split(", ")
+    ]
+    assert set(stages) >= {"matching", "footprint", "narrative", "design", "save"}
+    assert stages[-1] == "total"
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert (
+        'http_request_duration_seconds_count{method="POST",'
+        'endpoint="/create-product",status="200"}'
+    ) in text
+    assert (
+        'pipeline_stage_duration_seconds_count{stage="matching",outcome="ok"}' in text
+    )
+    assert 'cache_hit_ratio{cache="supplier"}' in text
+    assert "design_jobs_queued 0" in text
+
+
+def test_upstream_failures_are_counted(monkeypatch):
+    class BrokenBackend:
+        model = "broken"
+
+        def generate(self, prompt, **params):
+            raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(design_visualization, "_backend", BrokenBackend())
+    before = UPSTREAM_CALLS.value(service="image", outcome="error")
+
+    image = design_visualization.generate_design("tee", width=32, height=32)
+
+    assert isinstance(image, Placeholder) and image.size == (32, 32)
+    assert UPSTREAM_CALLS.value(service="image", outcome="error") == before + 1
+    assert json.dumps(design_visualization.backend_status()) == "null"
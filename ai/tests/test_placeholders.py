@@ -0,0 +1,32 @@
+import os
+
+from design_variants import formats, variant_name
+from design_visualization import placeholder_design
+from placeholders import PlaceholderAssets, template
+
+
+def test_placeholder_is_encoded_once_and_shared(tmp_path):
+    assets = PlaceholderAssets(str(tmp_path))
+    first = assets.get(64, 32)
+    path = tmp_path / first
+    mtime = os.stat(path).st_mtime_ns
+
+    assert [assets.get(64, 32) for _ in range(3)] == [first] * 3
+    assert os.stat(path).st_mtime_ns == mtime
+    assert assets.stats() == {"served": 4, "rendered": 1}
+    for fmt in formats():
+        assert (tmp_path / variant_name(first, fmt=fmt)).is_file()
+
+    # Another process finds the file already written
+    other = PlaceholderAssets(str(tmp_path))
+    assert other.get(64, 32) == first
+    assert other.stats()["rendered"] == 0
+    assert assets.get(128, 64) != first
+
+
+def test_placeholder_design_leaves_template_untouched():
+    before = template(64, 64).tobytes()
+    image = placeholder_design("a long prompt for a tee", 64, 64)
+
+    assert image.info["placeholder"] and image.size == (64, 64)
+    assert template(64, 64).tobytes() == before
@@ -0,0 +1,16 @@
+from result_cache import MISS, ResultCache
+
+
+def test_lru_eviction_and_ttl():
+    now = [0.0]
+    cache = ResultCache(maxsize=2, ttl=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is MISS
+    assert cache.stats()["evictions"] == 1
+
+    now[0] = 11.0
+    assert cache.get("a") is MISS
+    assert cache.stats()["expirations"] == 1
@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import scoring
+from enhanced_manufacturer_matcher import ManufacturerMatcher
+from materials_repository import MaterialsRepository
+from scoring import normalize_weights, resolve_weights, top_k_indices
+
+
+@pytest.fixture
+def matcher(tmp_path):
+    suppliers = pd.DataFrame(
+        {
+            "Manufacturer_Name": ["Conventional", "Organic", "Recycled"],
+            "City": ["Pune", "Pune", "Pune"],
+            "Latitude": [18.5, 18.5, 18.5],
+            "Longitude": [73.8, 73.8, 73.8],
+            "Supported_Materials": ["Cotton", "Organic Cotton", "Recycled Cotton"],
+            "Certifications": ["GOTS, FSC", "GOTS", "GRS"],
+            "Max_Weekly_Capacity": [3000, 2000, 1000],
+        }
+    )
+    suppliers.to_csv(tmp_path / "manufacturers.csv", index=False)
+    return ManufacturerMatcher(str(tmp_path / "manufacturers.csv"))
+
+
+@pytest.fixture
+def materials():
+    return MaterialsRepository.from_rows(
+        [
+            {"Material": "Cotton", "CO2_kg_per_kg": "5.0"},
+            {"Material": "Organic Cotton", "CO2_kg_per_kg": "2.0"},
+            {"Material": "Recycled Cotton", "CO2_kg_per_kg": "1.0"},
+        ]
+    )
+
+
+def test_resolve_weights_applies_overrides_to_profiles():
+    assert resolve_weights() == {"sim": 0.5, "cert": 0.3, "cap": 0.2}
+    assert resolve_weights("nearby", {"cap": 0})["cap"] == 0
+    assert resolve_weights(None, {"footprint": 1})["footprint"] == 1
+
+    for profile, overrides in [
+        ("fastest", None),
+        (["balanced"], None),
+        (None, {"price": 1}),
+        (None, {"sim": -1}),
+        (None, {"sim": None}),
+        (None, {"sim": "1"}),
+        (None, {"sim": float("inf")}),
+        (None, {"sim": float("nan")}),
+    ]:
+        with pytest.raises(ValueError):
+            resolve_weights(profile, overrides)
+
+
+def test_normalize_weights_does_not_overflow():
+    assert normalize_weights({"sim": 1e308, "cap": 1e308}) == {"sim": 0.5, "cap": 0.5}
+    assert normalize_weights({"sim": 0.0}) == {"sim": 0.0}
+
+
+def test_top_k_indices_matches_a_full_sort():
+    scores = np.random.default_rng(0).permutation(500).astype(float)
+    expected = np.argsort(-scores)[:7]
+    assert top_k_indices(scores, 7).tolist() == expected.tolist()
+    assert top_k_indices(scores, 0).tolist() == []
+
+
+def test_footprint_profile_prefers_low_carbon_materials(matcher, materials):
+    default = matcher.find_top_suppliers("Cotton", materials=materials)
+    assert default[0]["Manufacturer_Name"] == "Conventional"
+    assert "footprint_score" not in default[0]
+
+    greenest = matcher.find_top_suppliers(
+        "Cotton", materials=materials, weights={"footprint": 1, "cap": 0, "cert": 0}
+    )
+    assert [r["Manufacturer_Name"] for r in greenest] == [
+        "Recycled",
+        "Organic",
+        "Conventional",
+    ]
+    assert greenest[0]["co2_kg_per_kg"] == 1.0
+    assert greenest[0]["footprint_score"] == 1.0
+
+    # Without materials data the footprint component is left out
+    fallback = matcher.find_top_suppliers("Cotton", profile="low_footprint")
+    assert "footprint_score" not in fallback[0]
+
+
+def test_custom_components_can_be_weighted(matcher, monkeypatch):
+    monkeypatch.setattr(scoring, "COMPONENTS", dict(scoring.COMPONENTS))
+
+    @scoring.component("small_first")
+    def small_first(candidates):
+        return 1 - scoring._relative(candidates.index.capacity[candidates.rows])
+
+    results = matcher.find_top_suppliers(
+        "Cotton", weights={"small_first": 1, "sim": 0, "cert": 0, "cap": 0}
+    )
+    assert results[0]["Manufacturer_Name"] == "Recycled"
+    assert results[0]["small_first_score"] == pytest.approx(2 / 3)
+
+
+def test_distance_weight_adds_to_the_profile_distance_weight(matcher, monkeypatch):
+    used = []
+    real_score = scoring.score
+    monkeypatch.setattr(
+        scoring, "score", lambda c, w: used.append(w) or real_score(c, w)
+    )
+
+    matcher.find_top_suppliers(
+        "Cotton", near=(18.5, 73.8), profile="nearby", distance_weight=0.5
+    )
+    # nearby gives distance 0.4 of the score; the blend adds half on top
+    assert used[-1]["distance"] == pytest.approx(0.4 * 0.5 + 0.5)
+    assert sum(used[-1].values()) == pytest.approx(1.0)
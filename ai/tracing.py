@@ -0,0 +1,54 @@
+"""
+Sampled debug traces.
+
+Per-query diagnostics go through ``trace(logger, msg, *args)`` instead of
+``logger.debug``. They are emitted when the logger is at DEBUG, or when the
+current request was picked for tracing (see ``app_monitoring``), tagged with
+the request's trace ID. Otherwise a trace costs a level check: the message
+is never formatted and nothing is written.
+"""
+
+import logging
+import uuid
+from contextvars import ContextVar
+
+_trace_id = ContextVar("trace_id", default=None)
+
+
+def begin(trace_id: str = None):
+    """Trace the rest of the current request (or task); returns the trace ID."""
+    trace_id = trace_id or uuid.uuid4().hex[:16]
+    _trace_id.set(trace_id)
+    return trace_id
+
+
+def end():
+    _trace_id.set(None)
+
+
+def current():
+    """The trace ID of the current request, or None when it is not traced."""
+    return _trace_id.get()
+
+
+def trace(logger: logging.Logger, msg: str, *args):
+    """Log a debug trace if DEBUG is enabled or the current request is traced."""
+    trace_id = _trace_id.get()
+    if trace_id is None:
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(msg, *args, stacklevel=2)
+        return
+    # Traced requests log regardless of the logger's level
+    fn, lno, func, _ = logger.findCaller(stacklevel=2)
+    record = logger.makeRecord(
+        logger.name,
+        logging.DEBUG,
+        fn,
+        lno,
+        msg,
+        args,
+        None,
+        func,
+        extra={"trace_id": trace_id},
+    )
+    logger.handle(record)